@@ -1,109 +1,39 @@
 import streamlit as st
-from utils import supabase, get_user_role
+import resilience
+import tracing
+from utils import supabase, load_session_profile, refresh_session
+import os
 import time
 
-from student_view import show_student_view
-from company_view import show_company_view
+CSS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "style.css")
 
 st.set_page_config(page_title="Internship Management System", layout="wide")
 
+@st.cache_resource
+def load_css():
+    # Read once per process; each run only re-emits the cached string
+    with open(CSS_PATH) as f:
+        return f"<style>{f.read()}</style>"
+
 # Custom CSS for Premium Look
-st.markdown("""
-<style>
-    /* Global Theme */
-    .stApp {
-        background-color: #0F172A; /* Slate 900 */
-        color: #F8FAFC; /* Slate 50 */
-        font-family: 'Inter', sans-serif;
-    }
-    
-    /* Headings */
-    h1, h2, h3 {
-        color: #38BDF8 !important; /* Sky 400 */
-        font-weight: 700 !important;
-    }
-    
-    /* Buttons */
-    .stButton>button {
-        background: linear-gradient(135deg, #0EA5E9 0%, #0284C7 100%); /* Sky 500 to 600 */
-        color: white;
-        border-radius: 12px;
-        border: none;
-        padding: 0.75rem 1.5rem;
-        font-weight: 600;
-        transition: all 0.3s ease;
-        box-shadow: 0 4px 6px -1px rgba(14, 165, 233, 0.2);
-    }
-    .stButton>button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 10px 15px -3px rgba(14, 165, 233, 0.3);
-        background: linear-gradient(135deg, #38BDF8 0%, #0EA5E9 100%);
-    }
-    .stButton>button:active {
-        transform: translateY(0);
-    }
-    
-    /* Inputs */
-    .stTextInput>div>div>input, .stTextArea>div>div>textarea, .stSelectbox>div>div>div {
-        background-color: #1E293B; /* Slate 800 */
-        color: #F8FAFC;
-        border: 1px solid #334155; /* Slate 700 */
-        border-radius: 8px;
-    }
-    .stTextInput>div>div>input:focus, .stTextArea>div>div>textarea:focus {
-        border-color: #38BDF8;
-        box-shadow: 0 0 0 2px rgba(56, 189, 248, 0.2);
-    }
-    
-    /* Cards/Containers (Simulated with Expanders for now, or just general spacing) */
-    .streamlit-expanderHeader {
-        background-color: #1E293B;
-        border-radius: 8px;
-        color: #F8FAFC !important;
-    }
-    
-    /* Sidebar */
-    [data-testid="stSidebar"] {
-        background-color: #020617; /* Slate 950 */
-        border-right: 1px solid #1E293B;
-    }
-    
-    /* Metrics */
-    [data-testid="stMetricValue"] {
-        color: #38BDF8 !important;
-    }
-    
-    /* Tabs */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 8px;
-    }
-    .stTabs [data-baseweb="tab"] {
-        background-color: #1E293B;
-        border-radius: 8px 8px 0 0;
-        padding: 10px 20px;
-        color: #94A3B8;
-    }
-    .stTabs [aria-selected="true"] {
-        background-color: #38BDF8 !important;
-        color: white !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(load_css(), unsafe_allow_html=True)
 
+@tracing.view
 def login_page():
     st.markdown("### Welcome Back")
     email = st.text_input("Email", key="login_email")
     password = st.text_input("Password", type="password", key="login_password")
-    if st.button("Login", key="login_btn", use_container_width=True):
+    if st.button("Login", key="login_btn", width="stretch"):
         try:
             auth_response = supabase.auth.sign_in_with_password({"email": email, "password": password})
             st.session_state["user"] = auth_response.user
-            st.session_state["role"] = get_user_role(auth_response.user.id)
+            st.session_state["role"] = load_session_profile(auth_response.user)
             st.success("Logged in successfully!")
             st.rerun()
         except Exception as e:
             st.error(f"Login failed: {e}")
 
+@tracing.view
 def signup_page():
     st.markdown("### Create Account")
     email = st.text_input("Email", key="signup_email")
@@ -111,7 +41,7 @@ def signup_page():
     full_name = st.text_input("Full Name", key="signup_name")
     role = st.selectbox("I am a...", ["student", "company"], key="signup_role")
     
-    if st.button("Sign Up", key="signup_btn", use_container_width=True):
+    if st.button("Sign Up", key="signup_btn", width="stretch"):
         try:
             # Sign up with metadata
             auth_response = supabase.auth.sign_up({
@@ -128,22 +58,41 @@ def signup_page():
         except Exception as e:
             st.error(f"Signup failed: {e}")
 
+def can_view_diagnostics(user):
+    from diagnostics import is_admin
+    return is_admin(user)
+
 def main():
     if "user" not in st.session_state:
         st.session_state["user"] = None
         st.session_state["role"] = None
 
+    if resilience.get_breaker().is_open():
+        st.warning("The database is not responding. Showing saved data where possible; changes can't be saved right now.")
+
     if st.session_state["user"]:
+        try:
+            refresh_session()
+        except Exception as e:
+            st.error(f"Error refreshing session: {e}")
         st.sidebar.title(f"Welcome, {st.session_state['user'].email}")
         if st.sidebar.button("Logout"):
             supabase.auth.sign_out()
             st.session_state["user"] = None
             st.session_state["role"] = None
+            st.session_state["profile"] = None
             st.rerun()
         
-        if st.session_state["role"] == "student":
+        # Views are imported on first use, so the login page and each
+        # role only load the modules they need
+        if st.query_params.get("page") == "diagnostics" and can_view_diagnostics(st.session_state["user"]):
+            from diagnostics import show_diagnostics
+            show_diagnostics(st.session_state["user"])
+        elif st.session_state["role"] == "student":
+            from student_view import show_student_view
             show_student_view(st.session_state["user"])
         elif st.session_state["role"] == "company":
+            from company_view import show_company_view
             show_company_view(st.session_state["user"])
         else:
             st.error("Role not assigned. Please contact support.")
@@ -0,0 +1,696 @@
+"""Round-trip and latency budgets for every page, against the fake backend.
+
+Each page's view function is run through Streamlit's AppTest with a seeded
+FakeSupabase installed as the session's client, first cold (empty caches)
+and then as a rerun, PAGE_REPEATS times each. Round trips, payload bytes
+and the median wall time are compared against bench_budgets.json (p95 is
+reported alongside); any page over budget fails.
+
+    python bench.py                          # check the budgets
+    python bench.py --scale large --latency-ms 50 --no-budgets
+    python bench.py --update-budgets         # rewrite the budgets from this run
+    python bench.py --compare-mirror         # mirror vs direct browse reads
+    python bench.py --clicks                 # card clicks: full rerun vs fragment
+    python bench.py --assign 1000            # one task to 1000 interns: per-intern vs bulk
+    python bench.py --compare-concurrency    # fan-out reads in parallel vs one at a time
+    python bench.py --sessions 20            # concurrent sessions: isolation and throughput
+    python bench.py --catalog                # only browse at 100, 10k and 100k postings
+    python bench.py --startup                # only the app.py cold start
+
+Besides the pages at the budget scale, browse_internships is run against
+catalogs of CATALOG_SIZES postings, with its render time and response
+payload bytes budgeted at each size.
+
+The cold start check runs app.py's login page in a fresh interpreter and
+times its first render (including the app's imports) and a rerun. Heavy
+libraries the login page loads must be listed in the budget.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.testing.v1 import AppTest
+
+import fake_supabase
+import mirror
+import recommend
+import repository
+import resilience
+import sync
+from seed import generate_dataset
+from utils import get_supabase, use_client
+
+BUDGETS_PATH = "bench_budgets.json"
+APP_TEST_TIMEOUT_SECONDS = 60
+# Headroom added to measured times and payload bytes by --update-budgets;
+# round trips are exact
+BUDGET_TIME_HEADROOM = 2.0
+BUDGET_BYTES_HEADROOM = 1.1
+# Runs per page and phase; wall time is budgeted at the median, p95 is
+# only reported (with this few runs it is close to the slowest run)
+PAGE_REPEATS = 10
+UNBUDGETED = ("backend_ms", "wall_p95_ms")
+# Catalog sizes browse_internships is budgeted at, and runs at each size
+CATALOG_SIZES = (100, 10_000, 100_000)
+CATALOG_REPEATS = 3
+STARTUP_RUNS = 3
+# Libraries the login page should not need
+HEAVY_MODULES = ("pandas", "numpy", "scipy", "pyarrow", "plotly", "openpyxl")
+
+# Runs in a fresh interpreter; Streamlit itself is imported before timing,
+# as a server process has it loaded before any session starts
+STARTUP_SCRIPT = """
+import json, logging, sys, time
+from streamlit.testing.v1 import AppTest
+logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+before = set(sys.modules)
+at = AppTest.from_file(sys.argv[1], default_timeout=60)
+at.secrets["supabase"] = {"url": "http://fake.supabase.local", "key": "fake"}
+started = time.perf_counter()
+at.run()
+first = time.perf_counter() - started
+started = time.perf_counter()
+at.run()
+rerun = time.perf_counter() - started
+if at.exception:
+    raise SystemExit(at.exception[0].message)
+loaded = {name.split(".")[0] for name in set(sys.modules) - before}
+print(json.dumps({"first_render_ms": first * 1000, "rerun_ms": rerun * 1000, "modules": sorted(loaded)}))
+"""
+
+def latest_thread(fake, profile):
+    # The conversation the inbox lists first, or a new one with the first
+    # profile of the other role
+    threads = [t for (owner, _), t in fake.rows("message_threads").items() if owner == profile["id"]]
+    if threads:
+        partner_id = max(threads, key=lambda t: (t["last_message_at"], t["partner_id"]))["partner_id"]
+    else:
+        partner_id = first_profile(fake, "company" if profile["role"] == "student" else "student")["id"]
+    return (profile["id"], partner_id, "Bench partner")
+
+
+# Page name -> (module, view function, role, widget state set before the run);
+# callable state values are computed from (fake, profile)
+PAGES = {
+    "student_dashboard": ("student_view", "student_dashboard", "student", {}),
+    "recommended_internships": ("student_view", "recommended_internships", "student", {}),
+    "browse_internships": ("student_view", "browse_internships", "student", {}),
+    "browse_internships_search": ("student_view", "browse_internships", "student", {"browse_search_text": "data analy"}),
+    "student_profile": ("student_view", "student_profile", "student", {}),
+    "company_dashboard": ("company_view", "company_dashboard", "company", {}),
+    "post_internship": ("company_view", "post_internship", "company", {}),
+    "manage_applications": ("company_view", "manage_applications", "company", {}),
+    "assign_tasks": ("company_view", "assign_tasks", "company", {}),
+    "messages_inbox": ("messages_view", "messages", "company", {}),
+    "messages_conversation_student": ("messages_view", "messages", "student", {"message_partner": latest_thread}),
+    "messages_conversation_company": ("messages_view", "messages", "company", {"message_partner": latest_thread}),
+}
+
+
+def page_script(module_name, view_name):
+    # Runs inside AppTest; the user and client come from session state
+    import importlib
+    from types import SimpleNamespace
+
+    import streamlit as st
+
+    profile = st.session_state["profile"]
+    user = SimpleNamespace(id=profile["id"], email=profile["email"], user_metadata={"role": profile["role"]})
+    getattr(importlib.import_module(module_name), view_name)(user)
+
+
+def card_script(module_name, card_name, card_args):
+    # Runs inside AppTest: one card on its own, which is all a fragment
+    # rerun executes
+    import importlib
+    from types import SimpleNamespace
+
+    import streamlit as st
+
+    profile = st.session_state["profile"]
+    user = SimpleNamespace(id=profile["id"], email=profile["email"], user_metadata={"role": profile["role"]})
+    getattr(importlib.import_module(module_name), card_name)(user, *card_args)
+
+
+def first_profile(fake, role):
+    return next(p for p in fake.rows("profiles_names").values() if p["role"] == role)
+
+
+def new_app_test(fake, page, profile=None):
+    module_name, view_name, role, widget_state = PAGES[page]
+    return session_app_test(fake, profile or first_profile(fake, role), page_script, (module_name, view_name), widget_state)
+
+
+def session_app_test(fake, profile, script, args, widget_state=None):
+    fake.auth.user = fake.auth._user(fake.accounts[profile["email"]])
+    at = AppTest.from_function(script, args=args, default_timeout=APP_TEST_TIMEOUT_SECONDS)
+    at.secrets["supabase"] = {"url": "http://fake.supabase.local", "key": "fake"}
+    at.secrets["catalog"] = {"mode": "direct"}
+    at.session_state["supabase_client"] = fake
+    at.session_state["profile"] = dict(profile)
+    for key, value in (widget_state or {}).items():
+        at.session_state[key] = value(fake, profile) if callable(value) else value
+    return at
+
+
+def clear_caches():
+    repository.cache.clear()
+    recommend.get_catalog.clear()
+
+
+def run_once(at, fake):
+    fake.reset_stats()
+    started = time.perf_counter()
+    at.run()
+    wall_ms = round((time.perf_counter() - started) * 1000, 1)
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return {**fake.stats(), "wall_ms": wall_ms}
+
+
+def percentile(values, pct):
+    # Nearest rank
+    values = sorted(values)
+    return values[max(math.ceil(len(values) * pct / 100) - 1, 0)]
+
+
+def summarize(runs) -> dict:
+    """One phase over repeated runs: worst-case counts, median and p95 times."""
+    walls = [run["wall_ms"] for run in runs]
+    return {
+        "round_trips": max(run["round_trips"] for run in runs),
+        "backend_ms": round(statistics.median(run["backend_ms"] for run in runs), 1),
+        "response_bytes": max(run["response_bytes"] for run in runs),
+        "wall_ms": round(statistics.median(walls), 1),
+        "wall_p95_ms": round(percentile(walls, 95), 1),
+    }
+
+
+def measure_page(fake, page, latency, repeats=PAGE_REPEATS):
+    """Cold (fresh session, empty caches) and rerun phases, each ``repeats`` times."""
+    fake.latency = latency
+    cold, warm = [], []
+    for _ in range(repeats):
+        clear_caches()
+        at = new_app_test(fake, page)
+        cold.append(run_once(at, fake))
+        warm.append(run_once(at, fake))
+
+    # The page's own cost: the same cold run against a zero-latency backend
+    fake.latency = 0
+    renders = []
+    for _ in range(repeats):
+        clear_caches()
+        renders.append(run_once(new_app_test(fake, page), fake)["wall_ms"])
+    fake.latency = latency
+    return {"cold": {**summarize(cold), "render_ms": round(statistics.median(renders), 1)}, "warm": summarize(warm)}
+
+
+def startup_budget(measured) -> dict:
+    return {
+        "first_render_ms": round(measured["first_render_ms"] * BUDGET_TIME_HEADROOM + 50),
+        "import_ms": round(measured["import_ms"] * BUDGET_TIME_HEADROOM + 50),
+        "heavy_modules": measured["heavy_modules"],
+    }
+
+
+def write_budgets(budgets):
+    with open(BUDGETS_PATH, "w") as f:
+        json.dump(budgets, f, indent=2)
+        f.write("\n")
+    print(f"Wrote {BUDGETS_PATH}")
+
+
+def over_budget(measured, budget) -> list:
+    failures = []
+    for phase, limits in budget.items():
+        for metric, limit in limits.items():
+            value = measured[phase].get(metric)
+            if value is not None and value > limit:
+                failures.append(f"{phase} {metric} {value} > {limit}")
+    return failures
+
+
+def metric_budget(metric, value):
+    if metric == "round_trips":
+        return value
+    if metric == "response_bytes":
+        return round(value * BUDGET_BYTES_HEADROOM)
+    return round(value * BUDGET_TIME_HEADROOM + 50)
+
+
+def budgets_from(results) -> dict:
+    return {
+        page: {
+            phase: {metric: metric_budget(metric, value) for metric, value in measured.items() if metric not in UNBUDGETED}
+            for phase, measured in phases.items()
+        }
+        for page, phases in results.items()
+    }
+
+
+def measure_startup(runs=STARTUP_RUNS) -> dict:
+    """Median cold start of the login page over fresh interpreters."""
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT, app_path], capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    first = statistics.median(sample["first_render_ms"] for sample in samples)
+    rerun = statistics.median(sample["rerun_ms"] for sample in samples)
+    return {
+        "first_render_ms": round(first, 1),
+        # The first run pays for the app's imports; a rerun does not
+        "import_ms": round(first - rerun, 1),
+        "heavy_modules": sorted({m for sample in samples for m in sample["modules"] if m in HEAVY_MODULES}),
+    }
+
+
+def startup_over_budget(measured, budget) -> list:
+    failures = [
+        f"{metric} {measured[metric]} > {limit}"
+        for metric, limit in budget.items()
+        if metric != "heavy_modules" and measured[metric] > limit
+    ]
+    unexpected = set(measured["heavy_modules"]) - set(budget.get("heavy_modules", []))
+    if unexpected:
+        failures.append(f"login page loads {', '.join(sorted(unexpected))}")
+    return failures
+
+
+def compare_mirror(fake, latency, repeats=20):
+    """Time the browse reads against the SQLite mirror and directly."""
+    with tempfile.TemporaryDirectory() as directory:
+        catalog_mirror = mirror.CatalogMirror(f"{directory}/mirror.db")
+        fake.latency = 0
+        with use_client(fake):
+            catalog_mirror.sync()
+        fake.latency = latency
+
+        print(f"{'read':24} {'source':7} {'p50 ms':>8} {'p95 ms':>8} {'round trips':>12}")
+        for name, read in mirror.BENCH_READS.items():
+            for source_name, source in (("mirror", catalog_mirror), ("direct", repository)):
+                timings = []
+                fake.reset_stats()
+                for _ in range(repeats):
+                    repository.cache.clear()
+                    started = time.perf_counter()
+                    with use_client(fake):
+                        read(source)
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                round_trips = fake.stats()["round_trips"] / repeats
+                print(f"{name:24} {source_name:7} {timings[repeats // 2]:8.1f} {timings[int(repeats * 0.95) - 1]:8.1f} {round_trips:12.1f}")
+
+
+def student_with_open_tasks(fake):
+    open_tasks = {}
+    for task in fake.rows("tasks").values():
+        if task["status"] != "completed":
+            open_tasks[task["student_id"]] = open_tasks.get(task["student_id"], 0) + 1
+    return fake.rows("profiles_names")[max(open_tasks, key=open_tasks.get)]
+
+
+# Each target is (card args, the write its button makes)
+def apply_targets(fake, profile):
+    applied = repository.get_applied_internship_ids(profile["id"])
+    internships = [i for i in repository.get_open_internships_page(50)["rows"] if i["id"] not in applied]
+    return [((i, set(applied)), lambda i=i: repository.apply_for_internship(profile["id"], i)) for i in internships]
+
+
+def accept_targets(fake, profile):
+    applications = repository.get_company_applications_page(profile["id"], status="pending", page_size=50)["rows"]
+    return [((a,), lambda a=a: repository.update_application_status(profile["id"], a, "accepted")) for a in applications]
+
+
+def submit_targets(fake, profile):
+    tasks = fake.table("tasks").select(
+        "id, internship_id, title, description, due_date, status, submission_link, feedback, internships(title, company_id)"
+    ).eq("student_id", profile["id"]).neq("status", "completed").execute().data
+    return [((t,), lambda t=t: repository.submit_task(profile["id"], t, "https://example.com/bench")) for t in tasks]
+
+
+# Click name -> (page, card module, card function, profile, targets)
+CLICKS = {
+    "apply": ("browse_internships", "student_view", "internship_card", lambda fake: first_profile(fake, "student"), apply_targets),
+    "accept_application": ("manage_applications", "company_view", "application_card", lambda fake: first_profile(fake, "company"), accept_targets),
+    "submit_task": ("student_dashboard", "student_view", "task_card", student_with_open_tasks, submit_targets),
+}
+
+
+def measure_click(fake, click, latency):
+    """One click's write plus what it reruns: the whole page, or only its card.
+
+    Cards used to end in st.rerun(), which re-executes the page with the
+    caches the write invalidated; as fragments they rerun only themselves.
+    AppTest cannot run a fragment on its own, so the card's rerun is timed
+    as a script that renders just that card.
+    """
+    page, module_name, card_name, pick_profile, targets = CLICKS[click]
+    clear_caches()
+    fake.latency = latency
+    profile = pick_profile(fake)
+    at = new_app_test(fake, page, profile)
+    run_once(at, fake)
+    with use_client(fake):
+        (_, page_write), (card_args, card_write) = targets(fake, profile)[:2]
+    card = session_app_test(fake, profile, card_script, (module_name, card_name, card_args))
+    run_once(card, fake)
+
+    results = {}
+    for name, write, rerun in (("full rerun", page_write, at), ("fragment", card_write, card)):
+        fake.reset_stats()
+        started = time.perf_counter()
+        with use_client(fake):
+            write()
+        rerun.run()
+        if rerun.exception:
+            raise RuntimeError(rerun.exception[0].message)
+        results[name] = {**fake.stats(), "wall_ms": round((time.perf_counter() - started) * 1000, 1)}
+    return results
+
+
+def compare_clicks(fake, latency):
+    print(f"{'click':20} {'rerun':11} {'trips':>5} {'backend':>8} {'wall':>8}")
+    for click in CLICKS:
+        for name, measured in measure_click(fake, click, latency).items():
+            print(f"{click:20} {name:11} {measured['round_trips']:5} {measured['backend_ms']:8.1f} {measured['wall_ms']:8.1f}")
+
+
+def compare_assign(interns, latency):
+    """Assign one task to every accepted intern: one insert each vs one bulk insert."""
+    fake = fake_supabase.FakeSupabase(
+        generate_dataset(companies=1, students=interns, internships=10, applications=interns, tasks=0), latency=latency
+    )
+    for application in fake.rows("applications").values():
+        application["status"] = "accepted"
+    company_id = first_profile(fake, "company")["id"]
+    with use_client(fake):
+        accepted = repository.get_accepted_interns(company_id)
+    tasks = [
+        {"internship_id": intern["internship_id"], "student_id": intern["student_id"], "title": "Bench task",
+         "description": "Assigned by bench.py", "due_date": "2030-01-01", "status": "pending"}
+        for intern in accepted
+    ]
+
+    print(f"assigning one task to {len(tasks)} interns at {latency * 1000:g}ms")
+    print(f"{'insert':22} {'trips':>6} {'wall ms':>9} {'tasks/s':>9}")
+    for name, assign in (
+        # What the form did before: one request per intern
+        ("one per intern", lambda: [repository.assign_tasks(company_id, [task]) for task in tasks]),
+        ("bulk", lambda: repository.assign_tasks(company_id, tasks)),
+    ):
+        fake.reset_stats()
+        started = time.perf_counter()
+        with use_client(fake):
+            assign()
+        seconds = time.perf_counter() - started
+        print(f"{name:22} {fake.stats()['round_trips']:6} {seconds * 1000:9.0f} {len(tasks) / seconds:9.0f}")
+
+
+# Pages whose reads go through repository.fetch_concurrently
+FANOUT_PAGES = ("student_dashboard", "browse_internships", "manage_applications")
+
+
+def compare_concurrency(fake, latency, repeats=5):
+    """Cold page loads with the fan-out reads in parallel and one at a time."""
+    concurrent = repository._fanout_executor
+    sequential = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bench-sequential")
+
+    def median_cold_wall(page):
+        walls = []
+        for _ in range(repeats):
+            clear_caches()
+            run = run_once(new_app_test(fake, page), fake)
+            walls.append(run["wall_ms"])
+        return statistics.median(walls), run
+
+    # Backend is the sum of the round trips' latency, whatever overlapped;
+    # waited is the wall time beyond rendering against a zero-latency backend
+    print(f"{'page':24} {'fan-out':11} {'trips':>5} {'backend':>8} {'wall p50':>9} {'waited':>8}")
+    for page in FANOUT_PAGES:
+        fake.latency = 0
+        render_ms, _ = median_cold_wall(page)
+        fake.latency = latency
+        for mode, executor in (("sequential", sequential), ("concurrent", concurrent)):
+            repository._fanout_executor = executor
+            try:
+                wall, run = median_cold_wall(page)
+            finally:
+                repository._fanout_executor = concurrent
+            print(f"{page:24} {mode:11} {run['round_trips']:5} {run['backend_ms']:8.1f} {wall:9.1f} {wall - render_ms:8.1f}")
+    sequential.shutdown()
+
+
+def expected_reads(fake, profile) -> dict:
+    """What a user's dashboard reads must return, straight from the backend."""
+    user_id = profile["id"]
+    if profile["role"] == "company":
+        client = fake.session_client()
+        client.auth.sign_in_with_password({"email": profile["email"], "password": "password"})
+        return {
+            "stats": client.rpc("company_dashboard_stats").execute().data,
+            "internships": {row["id"] for row in fake.rows("internships").values() if row["company_id"] == user_id},
+        }
+    applications = [row for row in fake.rows("applications").values() if row["student_id"] == user_id]
+    return {
+        "applications": {row["id"] for row in applications},
+        "tasks": {row["id"] for row in fake.rows("tasks").values() if row["student_id"] == user_id},
+        "applied": {row["internship_id"] for row in applications},
+    }
+
+
+def dashboard_reads(profile, synced) -> dict:
+    """The reads behind the user's dashboard, through the session's client.
+
+    Company reads go through the process-wide query cache and an
+    auth.uid() RPC, student reads through session-local synced tables.
+    """
+    user_id = profile["id"]
+    if profile["role"] == "company":
+        return {
+            "stats": repository.get_company_stats(user_id),
+            "internships": {row["id"] for row in repository.get_company_internships(user_id)},
+        }
+    return {
+        "applications": set(synced["applications"].pull()),
+        "tasks": set(synced["tasks"].pull()),
+        "applied": set(repository.get_applied_internship_ids(user_id)),
+    }
+
+
+def load_test(fake, sessions, rounds, latency):
+    """Concurrent sessions, each signed in as its own user on its own client.
+
+    Every session reads its dashboard ``rounds`` times while the others do
+    the same, sharing the HTTP-level backend and the query cache like
+    sessions of one server process. Every read must return that user's
+    data only. AppTest cannot run sessions concurrently (each run swaps a
+    process-global runtime), so sessions are threads with their own client
+    installed through use_client, as the fan-out workers get theirs.
+    """
+    fake.latency = latency
+    clear_caches()
+    profiles = list(fake.rows("profiles_names").values())
+    # Alternate roles, one user per session
+    by_role = {role: [p for p in profiles if p["role"] == role] for role in ("student", "company")}
+    users = []
+    for i in range(sessions):
+        candidates = by_role[("student", "company")[i % 2]]
+        users.append(candidates[i // 2 % len(candidates)])
+    expected = [expected_reads(fake, profile) for profile in users]
+
+    def session(profile, want):
+        client = fake.session_client()
+        leaks, timings = [], []
+        with use_client(client):
+            client.auth.sign_in_with_password({"email": profile["email"], "password": "password"})
+            synced = {
+                table: sync.SyncedTable(table, "id, internship_id, status", {"student_id": profile["id"]})
+                for table in ("applications", "tasks")
+            }
+            for _ in range(rounds):
+                started = time.perf_counter()
+                got = dashboard_reads(profile, synced)
+                timings.append((time.perf_counter() - started) * 1000)
+                leaks.extend(f"{name} differs" for name in want if got[name] != want[name])
+                if get_supabase() is not client or client.auth.user.id != profile["id"]:
+                    leaks.append("session is not on its own client")
+        return leaks, timings
+
+    fake.reset_stats()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix="bench-session") as pool:
+        outcomes = list(pool.map(session, users, expected))
+    seconds = time.perf_counter() - started
+
+    failures = 0
+    for profile, (leaks, _) in zip(users, outcomes):
+        for leak in sorted(set(leaks)):
+            failures += 1
+            print(f"LEAK {profile['role']} {profile['email']}: {leak}")
+    timings = sorted(t for _, session_timings in outcomes for t in session_timings)
+    runs = len(timings)
+    print(
+        f"{sessions} sessions x {rounds} dashboard loads at {latency * 1000:g}ms: {runs / seconds:.1f} loads/s, "
+        f"p50 {timings[runs // 2]:.0f}ms, p95 {timings[int(runs * 0.95) - 1]:.0f}ms, "
+        f"{fake.stats()['round_trips']} round trips, {f'{failures} leaks' if failures else 'no leaks'}"
+    )
+    return failures
+
+
+PAGE_HEADER = (
+    f"{'trips':>5} {'backend':>8} {'wall':>8} {'p95':>8} {'render':>8} {'KB':>7} | "
+    f"{'rerun trips':>11} {'wall':>8} {'p95':>8} {'KB':>7}  budget"
+)
+
+
+def page_line(measured, status) -> str:
+    cold, warm = measured["cold"], measured["warm"]
+    return (
+        f"{cold['round_trips']:5} {cold['backend_ms']:8.1f} {cold['wall_ms']:8.1f} {cold['wall_p95_ms']:8.1f} "
+        f"{cold['render_ms']:8.1f} {cold['response_bytes'] / 1000:7.1f} | {warm['round_trips']:11} "
+        f"{warm['wall_ms']:8.1f} {warm['wall_p95_ms']:8.1f} {warm['response_bytes'] / 1000:7.1f}  {status}"
+    )
+
+
+def measure_catalog(latency, sizes=CATALOG_SIZES) -> dict:
+    """browse_internships against catalogs of each size, other tables at the small scale."""
+    results = {}
+    # The fake scans without indexes, so large catalogs answer slowly enough
+    # to send hedged duplicates an indexed query would not
+    hedged_views, resilience.HEDGED_VIEWS = resilience.HEDGED_VIEWS, ()
+    try:
+        for size in sizes:
+            fake = fake_supabase.seeded("small", latency=latency, internships=size)
+            results[str(size)] = measure_page(fake, "browse_internships", latency, CATALOG_REPEATS)
+    finally:
+        resilience.HEDGED_VIEWS = hedged_views
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=fake_supabase.SCALES, help="dataset size (default: from the budgets file)")
+    parser.add_argument("--latency-ms", type=float, help="simulated round-trip latency (default: from the budgets file)")
+    parser.add_argument("--pages", help="comma-separated page names (default: all)")
+    parser.add_argument("--repeats", type=int, default=PAGE_REPEATS, help="runs per page and phase")
+    parser.add_argument("--no-budgets", action="store_true", help="report only, do not check budgets")
+    parser.add_argument("--update-budgets", action="store_true", help=f"write {BUDGETS_PATH} from this run")
+    parser.add_argument("--compare-mirror", action="store_true", help="time browse reads on the mirror vs direct")
+    parser.add_argument("--startup", action="store_true", help="only check the app.py cold start")
+    parser.add_argument("--catalog", action="store_true", help="only check browse at each of CATALOG_SIZES postings")
+    parser.add_argument("--clicks", action="store_true", help="time card clicks as full reruns vs fragment reruns")
+    parser.add_argument("--compare-concurrency", action="store_true", help="time fan-out pages with parallel vs sequential reads")
+    parser.add_argument("--sessions", type=int, metavar="N", help="load test with N concurrent signed-in sessions")
+    parser.add_argument("--rounds", type=int, default=5, help="page runs per session in the load test")
+    parser.add_argument("--assign", type=int, metavar="INTERNS", help="time assigning one task to this many interns")
+    args = parser.parse_args()
+    # AppTest setup runs outside a script run; its context warnings are noise here
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+    # Slow calls are what the report is for; logging each one is noise
+    logging.getLogger("tracing").setLevel(logging.ERROR)
+
+    try:
+        with open(BUDGETS_PATH) as f:
+            budgets = json.load(f)
+    except FileNotFoundError:
+        budgets = {"scale": "small", "latency_ms": 20, "pages": {}}
+    scale = args.scale or budgets["scale"]
+    latency = (args.latency_ms if args.latency_ms is not None else budgets["latency_ms"]) / 1000
+    if (scale, latency * 1000) != (budgets["scale"], budgets["latency_ms"]) and not args.update_budgets:
+        # Budgets only hold for the settings they were recorded with
+        args.no_budgets = True
+
+    results, startup = {}, None
+    failed = False
+    if args.assign:
+        compare_assign(args.assign, latency)
+        return 0
+
+    if (args.startup or not args.pages) and not (args.compare_mirror or args.clicks or args.compare_concurrency or args.sessions or args.catalog):
+        startup = measure_startup()
+        # Startup does not depend on the dataset, so its budget always applies
+        failures = [] if args.update_budgets else startup_over_budget(startup, budgets.get("startup", {}))
+        failed = bool(failures)
+        status = "OVER: " + "; ".join(failures) if failures else "ok"
+        print(
+            f"startup: first render {startup['first_render_ms']:.1f}ms, imports {startup['import_ms']:.1f}ms, "
+            f"heavy modules {', '.join(startup['heavy_modules']) or 'none'}  {status}"
+        )
+    if args.startup:
+        if args.update_budgets:
+            write_budgets({**budgets, "startup": startup_budget(startup)})
+        return 1 if failed else 0
+
+    fake = fake_supabase.seeded(scale, latency=latency)
+    if args.compare_mirror:
+        compare_mirror(fake, latency)
+        return 0
+
+    # Import the views, and the libraries they load on first use, once so
+    # the first page does not pay for it
+    import pandas  # noqa: F401
+
+    import company_view  # noqa: F401
+    import messages_view  # noqa: F401
+    import student_view  # noqa: F401
+
+    if args.clicks:
+        compare_clicks(fake, latency)
+        return 0
+    if args.compare_concurrency:
+        compare_concurrency(fake, latency)
+        return 0
+    if args.sessions:
+        return 1 if load_test(fake, args.sessions, args.rounds, latency) else 0
+
+    def report(name, measured, budget):
+        nonlocal failed
+        failures = [] if args.no_budgets else over_budget(measured, budget)
+        failed = failed or bool(failures)
+        status = "OVER: " + "; ".join(failures) if failures else ("-" if args.no_budgets else "ok")
+        print(f"{name:28} {page_line(measured, status)}")
+
+    if not args.catalog:
+        pages = args.pages.split(",") if args.pages else list(PAGES)
+        print(f"scale={scale} latency={latency * 1000:g}ms")
+        print(f"{'page':28} {PAGE_HEADER}")
+        for page in pages:
+            results[page] = measure_page(fake, page, latency, args.repeats)
+            report(page, results[page], budgets["pages"].get(page, {}))
+
+    catalog = {}
+    if args.catalog or not args.pages:
+        print(f"browse_internships by catalog size, latency={latency * 1000:g}ms")
+        print(f"{'postings':28} {PAGE_HEADER}")
+        catalog = measure_catalog(latency)
+        for size, measured in catalog.items():
+            report(size, measured, budgets.get("catalog", {}).get(size, {}))
+
+    if args.update_budgets:
+        budgets = {**budgets, "latency_ms": latency * 1000}
+        if results:
+            budgets["scale"] = scale
+            budgets["pages"] = {**budgets["pages"], **budgets_from(results)}
+        if catalog:
+            budgets["catalog"] = budgets_from(catalog)
+        if startup:
+            budgets["startup"] = startup_budget(startup)
+        write_budgets(budgets)
+        return 0
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+-- Query plan / latency check for the inbox at 1M messages.
+-- Run against a local Supabase Postgres after applying schema.sql:
+--   psql "$DATABASE_URL" -f bench_messages.sql
+-- Everything runs inside a transaction that is rolled back at the end.
+
+begin;
+
+\timing on
+
+-- 50 companies and 2000 students (profiles created by on_auth_user_created)
+insert into auth.users (id, email, raw_user_meta_data)
+select ('00000000-0000-0000-0001-' || lpad(c::text, 12, '0'))::uuid, 'bench-company-' || c || '@example.com',
+       jsonb_build_object('role', 'company', 'full_name', 'Bench Co ' || c)
+from generate_series(1, 50) as c;
+
+insert into auth.users (id, email, raw_user_meta_data)
+select ('00000000-0000-0000-0002-' || lpad(s::text, 12, '0'))::uuid, 'bench-student-' || s || '@example.com',
+       jsonb_build_object('role', 'student', 'full_name', 'Bench Student ' || s)
+from generate_series(1, 2000) as s;
+
+-- 1M messages between companies and students, one every 30 seconds; the
+-- most recent 1% are unread. Threads are backfilled in one statement
+-- instead of by the per-row trigger.
+alter table public.messages disable trigger messages_record_thread;
+
+insert into public.messages (sender_id, receiver_id, content, read, created_at)
+select
+  case when n % 2 = 0 then company else student end,
+  case when n % 2 = 0 then student else company end,
+  'Message number ' || n || ' about the internship.',
+  n <= 990000,
+  now() - (1000000 - n) * interval '30 seconds'
+from (
+  select n,
+    ('00000000-0000-0000-0001-' || lpad((1 + n % 50)::text, 12, '0'))::uuid as company,
+    ('00000000-0000-0000-0002-' || lpad((1 + n * 7919 % 2000)::text, 12, '0'))::uuid as student
+  from generate_series(1, 1000000) as n
+) pairs;
+
+alter table public.messages enable trigger messages_record_thread;
+
+insert into public.message_threads (owner_id, partner_id, last_message_at, last_message_preview, last_sender_id)
+select distinct on (owner_id, partner_id) owner_id, partner_id, created_at, left(content, 120), sender_id
+from (
+  select sender_id as owner_id, receiver_id as partner_id, created_at, content, sender_id from public.messages
+  union all
+  select receiver_id, sender_id, created_at, content, sender_id from public.messages
+) m
+order by owner_id, partner_id, created_at desc
+on conflict (owner_id, partner_id) do nothing;
+
+analyze public.messages;
+analyze public.message_threads;
+
+-- Run the rest as company 1, through RLS like PostgREST does
+select set_config('request.jwt.claims', '{"sub": "00000000-0000-0000-0001-000000000001", "role": "authenticated"}', true);
+set local role authenticated;
+
+-- Unread badge (expect an Index Only Scan on messages_unread_idx)
+explain (analyze, buffers)
+select count(*) from public.messages
+where receiver_id = '00000000-0000-0000-0001-000000000001' and read = false;
+
+-- First inbox page and the page after it
+explain (analyze, buffers)
+select * from public.inbox_threads(page_size => 21);
+
+explain (analyze, buffers)
+select * from public.inbox_threads(
+  page_size => 21,
+  after_at => (select last_message_at from public.inbox_threads(page_size => 20) offset 19),
+  after_partner => (select partner_id from public.inbox_threads(page_size => 20) offset 19)
+);
+
+-- Newest page of one conversation, and a page further back
+-- (expect an Index Scan on messages_conversation_idx)
+explain (analyze, buffers)
+select id, sender_id, receiver_id, content, read, created_at from public.messages
+where user_low = '00000000-0000-0000-0001-000000000001' and user_high = '00000000-0000-0000-0002-000000001951'
+order by created_at desc, id desc limit 31;
+
+explain (analyze, buffers)
+select id, sender_id, receiver_id, content, read, created_at from public.messages
+where user_low = '00000000-0000-0000-0001-000000000001' and user_high = '00000000-0000-0000-0002-000000001951'
+  and (created_at < now() - interval '30 days'
+       or (created_at = now() - interval '30 days' and id < '00000000-0000-0000-0000-000000000000'))
+order by created_at desc, id desc limit 31;
+
+-- Poll for new messages since the newest one held
+explain (analyze, buffers)
+select id, sender_id, receiver_id, content, read, created_at from public.messages
+where user_low = '00000000-0000-0000-0001-000000000001' and user_high = '00000000-0000-0000-0002-000000001951'
+  and created_at > now() - interval '1 hour'
+order by created_at, id;
+
+-- Mark one thread read in a single update
+explain (analyze, buffers)
+update public.messages set read = true
+where receiver_id = '00000000-0000-0000-0001-000000000001'
+  and sender_id = '00000000-0000-0000-0002-000000001951'
+  and read = false;
+
+rollback;
@@ -0,0 +1,221 @@
+-- EXPLAIN ANALYZE harness for the queries the Python views issue.
+-- Seeds a local Supabase Postgres, then times every view query twice:
+--   before: without the performance indexes and with the original
+--           per-row "exists (...)" RLS policies
+--   after:  with schema.sql as shipped
+-- Run after applying schema.sql:
+--   psql "$DATABASE_URL" -f bench_queries.sql
+-- Everything runs inside a transaction that is rolled back at the end.
+
+begin;
+
+-- Seed: 50 companies, 5k students, 20k internships, 100k applications, 20k tasks, 20k messages
+insert into auth.users (id, email, raw_user_meta_data)
+select
+  ('00000000-0000-0000-0000-' || lpad(to_hex(n), 12, '0'))::uuid,
+  'bench-user-' || n || '@example.com',
+  json_build_object('role', case when n <= 50 then 'company' else 'student' end, 'full_name', 'Bench User ' || n)
+from generate_series(1, 5050) as n;
+
+update public.profiles_names set company_name = 'Company ' || email
+where role = 'company' and email like 'bench-user-%';
+
+insert into public.internships (company_id, title, role, description, location, duration, stipend, skills_required, status)
+select
+  ('00000000-0000-0000-0000-' || lpad(to_hex(1 + n % 50), 12, '0'))::uuid,
+  'Internship ' || n, 'Developer', 'Description ' || n, 'Remote', '3 months', '$1000/month',
+  array['Python', 'SQL'],
+  case when n % 10 = 0 then 'closed' else 'open' end
+from generate_series(1, 20000) as n;
+
+create temporary table bench_internships on commit drop as
+select id, row_number() over (order by id) as n from public.internships;
+
+insert into public.applications (internship_id, student_id, status)
+select i.id,
+  ('00000000-0000-0000-0000-' || lpad(to_hex(51 + s.n % 5000), 12, '0'))::uuid,
+  (array['pending', 'accepted', 'rejected'])[1 + s.n % 3]
+from generate_series(1, 100000) as s(n)
+join bench_internships i on i.n = 1 + (s.n * 7) % 20000
+on conflict do nothing;
+
+insert into public.tasks (internship_id, student_id, title, status)
+select internship_id, student_id, 'Task', 'pending'
+from public.applications where status = 'accepted' limit 20000;
+
+-- 20k messages between the first student and company pairs of accepted applications
+insert into public.messages (sender_id, receiver_id, content, created_at)
+select
+  case when s.n % 2 = 0 then i.company_id else a.student_id end,
+  case when s.n % 2 = 0 then a.student_id else i.company_id end,
+  'Message ' || s.n, now() - s.n * interval '1 minute'
+from (select * from public.applications where status = 'accepted' limit 2000) a
+join public.internships i on i.id = a.internship_id
+cross join generate_series(1, 10) as s(n);
+
+analyze;
+
+-- Queries issued by the views (see repository.py and sync.py), keyed by
+-- the view that issues them. PostgREST embeds are written as joins.
+create temporary table bench_view_queries (view_name text, query_name text, as_user uuid, sql text) on commit drop;
+insert into bench_view_queries values
+  ('browse_internships', 'open internships page', '00000000-0000-0000-0000-000000000033',
+   $q$select i.id, i.company_id, i.title, i.role, i.location, i.stipend, i.duration, i.skills_required, i.created_at, p.company_name
+      from public.internships i left join public.profiles_names p on p.id = i.company_id
+      where i.status = 'open' order by i.created_at desc, i.id desc limit 21$q$),
+  ('browse_internships', 'open internships next page', '00000000-0000-0000-0000-000000000033',
+   $q$with after as (select created_at, id from public.internships where status = 'open' order by created_at desc, id desc offset 19 limit 1)
+      select i.id, i.company_id, i.title, i.role, i.location, i.stipend, i.duration, i.skills_required, i.created_at, p.company_name
+      from public.internships i left join public.profiles_names p on p.id = i.company_id, after
+      where i.status = 'open' and (i.created_at < after.created_at or (i.created_at = after.created_at and i.id < after.id))
+      order by i.created_at desc, i.id desc limit 21$q$),
+  ('browse_internships', 'applied internship ids', '00000000-0000-0000-0000-000000000033',
+   $q$select internship_id from public.applications where student_id = '00000000-0000-0000-0000-000000000033'$q$),
+  ('browse_internships', 'internship description', '00000000-0000-0000-0000-000000000033',
+   $q$select description from public.internships
+      where id = (select id from public.internships where status = 'open' order by created_at desc limit 1)$q$),
+  ('browse_internships', 'search page', '00000000-0000-0000-0000-000000000033',
+   $q$select * from public.search_internships(search_text => 'internship 12', location_text => 'remote', page_size => 21)$q$),
+  ('browse_internships', 'facet counts', '00000000-0000-0000-0000-000000000033',
+   $q$select public.internship_facets(search_text => 'internship 12')$q$),
+  ('recommended_internships', 'catalog pull', '00000000-0000-0000-0000-000000000033',
+   $q$select public.pull_changes('internships', array['id', 'company_id', 'title', 'skills_required', 'status'])$q$),
+  ('recommended_internships', 'company names', '00000000-0000-0000-0000-000000000033',
+   $q$select id, company_name from public.profiles_names
+      where id in (select company_id from public.internships order by created_at desc limit 20)$q$),
+  ('student_dashboard', 'applications first pull', '00000000-0000-0000-0000-000000000033',
+   $q$select public.pull_changes('applications', array['id', 'internship_id', 'status', 'applied_at'],
+      json_build_object('student_id', '00000000-0000-0000-0000-000000000033'))$q$),
+  ('student_dashboard', 'applications delta pull', '00000000-0000-0000-0000-000000000033',
+   $q$select public.pull_changes('applications', array['id', 'internship_id', 'status', 'applied_at'],
+      json_build_object('student_id', '00000000-0000-0000-0000-000000000033'), now() - interval '5 seconds')$q$),
+  ('student_dashboard', 'tasks first pull', '00000000-0000-0000-0000-000000000033',
+   $q$select public.pull_changes('tasks', array['id', 'internship_id', 'title', 'description', 'due_date', 'status', 'submission_link', 'feedback'],
+      json_build_object('student_id', '00000000-0000-0000-0000-000000000033'))$q$),
+  ('student_dashboard', 'internship summaries', '00000000-0000-0000-0000-000000000033',
+   $q$select i.id, i.title, i.company_id, p.company_name
+      from public.internships i left join public.profiles_names p on p.id = i.company_id
+      where i.id in (select internship_id from public.applications where student_id = '00000000-0000-0000-0000-000000000033')$q$),
+  ('student_profile', 'profile', '00000000-0000-0000-0000-000000000033',
+   $q$select * from public.profiles_names where id = '00000000-0000-0000-0000-000000000033'$q$),
+  ('company_dashboard', 'dashboard stats', '00000000-0000-0000-0000-000000000001',
+   $q$select public.company_dashboard_stats()$q$),
+  ('manage_applications', 'company internships', '00000000-0000-0000-0000-000000000001',
+   $q$select id, title, status from public.internships where company_id = '00000000-0000-0000-0000-000000000001' order by created_at desc$q$),
+  ('manage_applications', 'application counts', '00000000-0000-0000-0000-000000000001',
+   $q$select * from public.company_application_counts(null)$q$),
+  ('manage_applications', 'applications page', '00000000-0000-0000-0000-000000000001',
+   $q$select a.id, a.internship_id, a.student_id, a.status, a.applied_at, i.title, i.company_id, p.full_name
+      from public.applications a
+      join public.internships i on i.id = a.internship_id
+      left join public.profiles_names p on p.id = a.student_id
+      where i.company_id = '00000000-0000-0000-0000-000000000001' order by a.applied_at desc, a.id desc limit 21$q$),
+  ('manage_applications', 'pending applications page', '00000000-0000-0000-0000-000000000001',
+   $q$select a.id, a.internship_id, a.student_id, a.status, a.applied_at, i.title, i.company_id, p.full_name
+      from public.applications a
+      join public.internships i on i.id = a.internship_id
+      left join public.profiles_names p on p.id = a.student_id
+      where i.company_id = '00000000-0000-0000-0000-000000000001' and a.status = 'pending' order by a.applied_at desc, a.id desc limit 21$q$),
+  ('manage_applications', 'change probe', '00000000-0000-0000-0000-000000000001',
+   $q$select public.table_changes('applications', now() - interval '5 seconds', 100)$q$),
+  ('assign_tasks', 'accepted interns', '00000000-0000-0000-0000-000000000001',
+   $q$select a.internship_id, a.student_id, p.full_name, i.title
+      from public.applications a
+      join public.internships i on i.id = a.internship_id
+      left join public.profiles_names p on p.id = a.student_id
+      where i.company_id = '00000000-0000-0000-0000-000000000001' and a.status = 'accepted'$q$),
+  ('assign_tasks', 'applications export page', '00000000-0000-0000-0000-000000000001',
+   $q$select a.id, a.status, a.applied_at, p.full_name, p.email, p.phone, p.location, p.skills, p.resume_url, p.portfolio_url
+      from public.applications a left join public.profiles_names p on p.id = a.student_id
+      where a.internship_id = (select id from public.internships where company_id = '00000000-0000-0000-0000-000000000001' order by created_at desc limit 1)
+      order by a.applied_at desc, a.id desc limit 1001$q$),
+  ('assign_tasks', 'tasks export page', '00000000-0000-0000-0000-000000000001',
+   $q$select t.id, t.title, t.status, t.due_date, t.submission_link, t.feedback, t.created_at, p.full_name, p.email
+      from public.tasks t left join public.profiles_names p on p.id = t.student_id
+      where t.internship_id = (select t2.internship_id from public.tasks t2
+        join public.internships i2 on i2.id = t2.internship_id where i2.company_id = '00000000-0000-0000-0000-000000000001' limit 1)
+      order by t.created_at desc, t.id desc limit 1001$q$),
+  ('messages', 'unread count', '00000000-0000-0000-0000-000000000033',
+   $q$select count(*) from public.messages where receiver_id = '00000000-0000-0000-0000-000000000033' and not read$q$),
+  ('messages', 'inbox page', '00000000-0000-0000-0000-000000000033',
+   $q$select * from public.inbox_threads(21)$q$),
+  ('messages', 'conversation page', '00000000-0000-0000-0000-000000000033',
+   $q$select id, sender_id, receiver_id, content, read, created_at from public.messages
+      where user_low = least('00000000-0000-0000-0000-000000000033'::uuid, '00000000-0000-0000-0000-000000000001'::uuid) and user_high = greatest('00000000-0000-0000-0000-000000000033'::uuid, '00000000-0000-0000-0000-000000000001'::uuid)
+      order by created_at desc, id desc limit 31$q$),
+  ('messages', 'contacts (company)', '00000000-0000-0000-0000-000000000001',
+   $q$select a.student_id, p.full_name
+      from public.applications a
+      join public.internships i on i.id = a.internship_id
+      left join public.profiles_names p on p.id = a.student_id
+      where i.company_id = '00000000-0000-0000-0000-000000000001' order by a.applied_at desc limit 500$q$),
+  ('messages', 'contacts (student)', '00000000-0000-0000-0000-000000000033',
+   $q$select i.company_id, p.company_name
+      from public.applications a
+      left join public.internships i on i.id = a.internship_id
+      left join public.profiles_names p on p.id = i.company_id
+      where a.student_id = '00000000-0000-0000-0000-000000000033' order by a.applied_at desc limit 500$q$);
+
+create temporary table bench_results (phase text, view_name text, query_name text, execution_ms numeric) on commit drop;
+
+create or replace function pg_temp.run_view_queries(phase text) returns void as $$
+declare
+  q record;
+  plan json;
+begin
+  for q in select * from bench_view_queries loop
+    -- Run as the authenticated user so RLS policies are part of the plan
+    perform set_config('request.jwt.claims', json_build_object('sub', q.as_user, 'role', 'authenticated')::text, true);
+    execute 'set local role authenticated';
+    execute 'explain (analyze, format json) ' || q.sql into plan;
+    execute 'reset role';
+    insert into bench_results values (phase, q.view_name, q.query_name, (plan->0->>'Execution Time')::numeric);
+  end loop;
+end;
+$$ language plpgsql;
+
+-- Before: drop the indexes and restore the original policies
+savepoint before_pack;
+
+drop index public.internships_open_created_idx, public.internships_company_created_idx,
+  public.applications_student_idx, public.applications_internship_status_idx, public.applications_pending_idx,
+  public.tasks_student_idx, public.tasks_internship_status_idx, public.messages_receiver_idx, public.messages_sender_idx;
+
+drop policy "Companies can see applications for their internships." on public.applications;
+create policy "Companies can see applications for their internships."
+  on public.applications for select
+  using ( exists (select 1 from public.internships where internships.id = applications.internship_id and internships.company_id = auth.uid()) );
+
+drop policy "Students can see their own applications." on public.applications;
+create policy "Students can see their own applications."
+  on public.applications for select
+  using ( auth.uid() = student_id );
+
+drop policy "Users can view tasks related to them" on public.tasks;
+create policy "Users can view tasks related to them"
+  on public.tasks for select
+  using ( auth.uid() = student_id or exists (select 1 from public.internships where internships.id = tasks.internship_id and internships.company_id = auth.uid()) );
+
+select pg_temp.run_view_queries('before');
+-- Keep the timings in a psql variable; the rollback below discards the rows
+select json_agg(bench_results)::text as before_results from bench_results \gset
+
+rollback to savepoint before_pack;
+
+-- After: schema as shipped
+insert into bench_results
+select * from json_populate_recordset(null::bench_results, :'before_results'::json);
+select pg_temp.run_view_queries('after');
+
+select
+  b.view_name,
+  b.query_name,
+  b.execution_ms as before_ms,
+  a.execution_ms as after_ms,
+  round(b.execution_ms / nullif(a.execution_ms, 0), 1) as speedup
+from bench_results b
+join bench_results a on a.query_name = b.query_name and a.phase = 'after'
+where b.phase = 'before'
+order by b.view_name, b.query_name;
+
+rollback;
@@ -0,0 +1,67 @@
+-- Query plan / latency check for search_internships at 100k postings.
+-- Run against a local Supabase Postgres after applying schema.sql:
+--   psql "$DATABASE_URL" -f bench_search.sql
+-- Everything runs inside a transaction that is rolled back at the end.
+
+begin;
+
+\timing on
+
+-- One company owns all the seeded postings (profile created by on_auth_user_created)
+insert into auth.users (id, email, raw_user_meta_data)
+values ('00000000-0000-0000-0000-00000000b001', 'bench-company@example.com',
+        '{"role": "company", "full_name": "Bench Co"}');
+update public.profiles_names set company_name = 'Bench Co'
+where id = '00000000-0000-0000-0000-00000000b001';
+
+insert into public.internships (company_id, title, role, description, location, duration, stipend, skills_required, status)
+select
+  '00000000-0000-0000-0000-00000000b001',
+  (array['Frontend Intern', 'Backend Intern', 'Data Analyst Intern', 'ML Research Intern', 'Design Intern'])[1 + n % 5] || ' #' || n,
+  (array['Frontend Developer', 'Backend Developer', 'Data Analyst', 'ML Engineer', 'Product Designer'])[1 + n % 5],
+  'Work with the team on real projects. Posting number ' || n || '.',
+  (array['Remote', 'New York', 'Bangalore', 'London', 'Berlin', 'San Francisco'])[1 + n % 6],
+  (1 + n % 6) || ' months',
+  '$' || (500 + n % 10 * 100) || '/month',
+  case n % 5
+    when 0 then array['ReactJS', 'TypeScript']
+    when 1 then array['Python', 'Django']
+    when 2 then array['SQL', 'Tableau']
+    when 3 then array['Python', 'PyTorch']
+    else array['Figma', 'UX Research']
+  end,
+  case when n % 10 = 0 then 'closed' else 'open' end
+from generate_series(1, 100000) as n;
+
+analyze public.internships;
+
+-- Full-text prefix search on title/role/skills/description
+explain (analyze, buffers)
+select * from public.search_internships(search_text => 'data analy', page_size => 21);
+
+-- Partial and misspelled location
+explain (analyze, buffers)
+select * from public.search_internships(location_text => 'Bangalor', page_size => 21);
+
+-- "React" must match "ReactJS"
+explain (analyze, buffers)
+select * from public.search_internships(skill_text => 'React', page_size => 21);
+
+-- Facet counts under a text filter and a facet selection
+explain (analyze, buffers)
+select public.internship_facets(search_text => 'intern', facet_location => 'Remote');
+
+-- Index usage for the individual predicates (expect Bitmap Index Scans)
+explain (analyze, buffers)
+select id from public.internships
+where search_vector @@ to_tsquery('english', 'analy:*');
+
+explain (analyze, buffers)
+select id from public.internships
+where location % 'Bangalor';
+
+explain (analyze, buffers)
+select id from public.internships
+where 'react' <% skills_text;
+
+rollback;
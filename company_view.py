@@ -1,17 +1,24 @@
 import streamlit as st
-from utils import supabase
-import pandas as pd
+import export
+import importer
+import messages_view
+import mirror
+import repository
+import sync
+import tracing
+from utils import get_session_profile, update_session_profile
 from datetime import datetime
 
+@tracing.view
 def post_internship(user):
     st.header("Post New Internship")
     
-    # Fetch current company details
-    try:
-        profile_response = supabase.table("profiles_names").select("company_name").eq("id", user.id).single().execute()
-        current_company_name = profile_response.data.get("company_name", "") if profile_response.data else ""
-    except:
-        current_company_name = ""
+    # Company details cached in the session at login
+    current_company_name = get_session_profile().get("company_name") or ""
+
+    if st.radio("Mode", ["Single posting", "Bulk import (CSV)"], horizontal=True, key="post_mode") != "Single posting":
+        import_internships(user, current_company_name)
+        return
 
     with st.form("post_internship_form"):
         company_name = st.text_input("Company Name", value=current_company_name)
@@ -25,18 +32,18 @@ def post_internship(user):
         
         submitted = st.form_submit_button("Post Internship")
         if submitted:
-            if not title or not role or not description or not company_name:
+            if importer.missing_fields({"title": title, "role": role, "description": description}) or not company_name:
                 st.error("Please fill in all required fields (Company Name, Title, Role, Description).")
             else:
-                skills = [s.strip() for s in skills_str.split(",") if s.strip()]
+                skills = importer.parse_skills(skills_str)
                 try:
                     # Update company name in profile if changed
                     if company_name != current_company_name:
-                        supabase.table("profiles_names").update({"company_name": company_name}).eq("id", user.id).execute()
+                        repository.update_profile(user.id, {"company_name": company_name})
+                        update_session_profile({"company_name": company_name})
                     
                     # Insert internship
-                    supabase.table("internships").insert({
-                        "company_id": user.id,
+                    repository.post_internship(user.id, {
                         "title": title,
                         "role": role,
                         "description": description,
@@ -45,136 +52,362 @@ def post_internship(user):
                         "stipend": stipend,
                         "skills_required": skills,
                         "status": "open"
-                    }).execute()
+                    })
+                    # Students browsing the local mirror see it without waiting for the next sync
+                    mirror.request_sync()
                     st.success("Internship posted successfully!")
                 except Exception as e:
                     st.error(f"Error posting internship: {e}")
 
+def import_internships(user, current_company_name):
+    st.write("Upload a CSV with one internship per row. Title, role and description are required; "
+             "skills_required is a comma separated list and status is open (default) or closed.")
+    st.download_button("Download Template", importer.TEMPLATE_CSV, file_name="internships_template.csv", mime="text/csv")
+
+    with st.form("import_internships_form"):
+        # Asked once for the whole file, and only if the profile has none yet
+        company_name = current_company_name or st.text_input("Company Name")
+        uploaded = st.file_uploader("Internships CSV", type="csv")
+        submitted = st.form_submit_button("Import Internships")
+
+    if submitted:
+        if not uploaded or not company_name:
+            st.error("Please provide the company name and a CSV file.")
+            return
+        try:
+            if company_name != current_company_name:
+                repository.update_profile(user.id, {"company_name": company_name})
+                update_session_profile({"company_name": company_name})
+
+            progress = st.progress(0.0, text="Importing...")
+            total = uploaded.size or 1
+
+            def on_progress(rows_read, inserted):
+                # Upload position is a good enough estimate of rows left
+                progress.progress(min(uploaded.tell() / total, 1.0), text=f"Read {rows_read} rows, inserted {inserted}...")
+
+            report = importer.import_internships(user.id, uploaded, on_progress=on_progress)
+            progress.empty()
+        except Exception as e:
+            st.error(f"Error importing internships: {e}")
+            return
+
+        if report["inserted"]:
+            mirror.request_sync()
+        rate = report["rows"] / report["seconds"] if report["seconds"] else 0
+        st.success(f"Imported {report['inserted']} of {report['rows']} rows in {report['seconds']:.1f}s ({rate:.0f} rows/s).")
+        if report["failed"]:
+            st.warning(f"{report['failed']} rows were not imported.")
+            st.dataframe(report["errors"], width="stretch", hide_index=True)
+            if report["failed"] > len(report["errors"]):
+                st.caption(f"Showing the first {len(report['errors'])} errors.")
+
+APPLICATION_STATUSES = ["pending", "accepted", "rejected"]
+PAGE_SIZE = 20
+
+@tracing.view
 def manage_applications(user):
     st.header("Manage Applications")
-    
+
+    # Filter values are read from widget state up front so the internship
+    # list, status counts and application page can be fetched in parallel
+    internship_id = st.session_state.get("applications_internship")
+    status = st.session_state.get("applications_status")
+
+    # Reset pagination whenever the filters change
+    filters = (internship_id, status)
+    if st.session_state.get("applications_filters") != filters:
+        st.session_state["applications_filters"] = filters
+        st.session_state["applications_cursors"] = [None]
+    cursors = st.session_state["applications_cursors"]
+
+    # Statuses set from application cards apply until the page is loaded again
+    st.session_state.pop("application_statuses", None)
+
+    # Cached pages are reused until a change probe sees a changed application
+    if sync.get_change_cursor("company_applications", "applications").changed():
+        repository.invalidate_company_applications(user.id)
+
+    results, errors = repository.fetch_concurrently({
+        "internships": lambda: repository.get_company_internships(user.id),
+        "counts": lambda: repository.get_application_counts(user.id, internship_id),
+        "page": lambda: repository.get_company_applications_page(user.id, internship_id, status, PAGE_SIZE, after=cursors[-1])
+    })
+
+    # Filters
+    if "internships" in errors:
+        st.error(f"Error fetching internships: {errors['internships']}")
+    internship_titles = {i['id']: i['title'] for i in results.get("internships", [])}
+    st.selectbox(
+        "Internship",
+        [None] + list(internship_titles.keys()),
+        format_func=lambda i: "All internships" if i is None else internship_titles.get(i, "Unknown internship"),
+        key="applications_internship"
+    )
+
+    if "counts" in errors:
+        st.error(f"Error fetching application counts: {errors['counts']}")
+    counts = results.get("counts", {})
+    st.radio(
+        "Status",
+        [None] + APPLICATION_STATUSES,
+        format_func=lambda s: f"All ({sum(counts.values())})" if s is None else f"{s.capitalize()} ({counts.get(s, 0)})",
+        horizontal=True,
+        key="applications_status"
+    )
+
     # Fetch applications for this company's internships
-    try:
-        response = supabase.table("applications").select("*, internships(title), profiles_names(full_name, email, resume_url, portfolio_url)").execute()
-        # RLS policies ensure companies only see their own applications
-        applications = response.data
-    except Exception as e:
-        st.error(f"Error fetching applications: {e}")
-        applications = []
-        
+    if "page" in errors:
+        st.error(f"Error fetching applications: {errors['page']}")
+    page = results.get("page", {"rows": [], "next_cursor": None})
+    applications = page["rows"]
+
+    # Report of the last bulk action, kept across the single rerun it triggers
+    summary = st.session_state.pop("triage_summary", None)
+    if summary:
+        st.success(summary)
+
     if not applications:
         st.info("No applications received yet.")
         return
 
+    if st.toggle("Triage mode", key="triage_mode"):
+        triage_applications(user, applications, internship_id, internship_titles)
+
     for app in applications:
-        with st.expander(f"{app['profiles_names']['full_name']} for {app['internships']['title']} ({app['status']})"):
-            st.write(f"**Email:** {app['profiles_names']['email']}")
-            st.write(f"**Resume:** {app['profiles_names']['resume_url']}")
-            st.write(f"**Portfolio:** {app['profiles_names']['portfolio_url']}")
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("Accept", key=f"accept_{app['id']}"):
-                    update_application_status(app['id'], "accepted")
-            with col2:
-                if st.button("Reject", key=f"reject_{app['id']}"):
-                    update_application_status(app['id'], "rejected")
-
-def update_application_status(app_id, status):
+        application_card(user, app)
+
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if st.button("Previous", disabled=len(cursors) == 1, key="applications_prev"):
+            cursors.pop()
+            st.rerun()
+    with col_page:
+        st.caption(f"Page {len(cursors)}")
+    with col_next:
+        if st.button("Next", disabled=page["next_cursor"] is None, key="applications_next"):
+            cursors.append(page["next_cursor"])
+            st.rerun()
+
+def triage_applications(user, applications, internship_id, internship_titles):
+    with st.container(border=True):
+        labels = {app['id']: f"{app['profiles_names']['full_name']} for {app['internships']['title']} ({app['status']})" for app in applications}
+        selected_ids = st.multiselect("Select applications", list(labels.keys()), format_func=lambda i: labels[i])
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            if st.button("Accept selected", disabled=not selected_ids, key="bulk_accept"):
+                bulk_update_application_status(user, selected_ids, "accepted")
+        with col2:
+            if st.button("Reject selected", disabled=not selected_ids, key="bulk_reject"):
+                bulk_update_application_status(user, selected_ids, "rejected")
+        with col3:
+            # Rules apply to a single internship, so one must be chosen in the filter
+            if st.button("Reject all remaining pending", disabled=internship_id is None, key="bulk_reject_pending"):
+                try:
+                    rows = repository.reject_pending_applications(user.id, internship_id)
+                    st.session_state["triage_summary"] = f"Rejected {len(rows)} pending application(s) for {internship_titles.get(internship_id, 'this internship')}."
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Error updating applications: {e}")
+
+def bulk_update_application_status(user, application_ids, status):
     try:
-        supabase.table("applications").update({"status": status}).eq("id", app_id).execute()
-        st.success(f"Application {status}!")
+        rows = repository.bulk_update_application_status(user.id, application_ids, status)
+        summary = f"{len(rows)} of {len(application_ids)} application(s) {status}."
+        skipped = len(application_ids) - len(rows)
+        if skipped:
+            summary += f" {skipped} could not be updated."
+        st.session_state["triage_summary"] = summary
         st.rerun()
+    except Exception as e:
+        st.error(f"Error updating applications: {e}")
+
+@st.fragment
+@tracing.view
+def application_card(user, app):
+    # Runs as a fragment so Accept/Reject only rerun this card, not the page.
+    # The row is shared with other sessions through the query cache, so a
+    # status set here is overlaid on a copy instead of written into it
+    statuses = st.session_state.get("application_statuses", {})
+    app = {**app, "status": statuses.get(app['id'], app['status'])}
+    with st.expander(f"{app['profiles_names']['full_name']} for {app['internships']['title']} ({app['status']})"):
+        # Applicant details are only fetched when requested
+        if st.toggle("Show applicant details", key=f"details_{app['id']}"):
+            try:
+                applicant = repository.get_profile(app['student_id'])
+            except Exception as e:
+                st.error(f"Error fetching applicant: {e}")
+                applicant = {}
+            st.write(f"**Email:** {applicant.get('email')}")
+            st.write(f"**Resume:** {applicant.get('resume_url')}")
+            st.write(f"**Portfolio:** {applicant.get('portfolio_url')}")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Accept", key=f"accept_{app['id']}"):
+                update_application_status(user, app, "accepted")
+        with col2:
+            if st.button("Reject", key=f"reject_{app['id']}"):
+                update_application_status(user, app, "rejected")
+
+def update_application_status(user, app, status):
+    try:
+        repository.update_application_status(user.id, app, status)
+        # Refresh this card from the write instead of refetching the page
+        st.session_state.setdefault("application_statuses", {})[app['id']] = status
+        st.toast(f"Application {status}!")
+        st.rerun(scope="fragment")
     except Exception as e:
         st.error(f"Error updating status: {e}")
 
+@tracing.view
 def assign_tasks(user):
     st.header("Assign Tasks")
     
     # Get accepted students
     try:
-        response = supabase.table("applications").select("*, internships(title), profiles_names(id, full_name)").eq("status", "accepted").execute()
-        accepted_apps = response.data
+        accepted_interns = repository.get_accepted_interns(user.id)
     except Exception as e:
         st.error(f"Error fetching accepted students: {e}")
-        accepted_apps = []
+        accepted_interns = []
         
-    if not accepted_apps:
+    if not accepted_interns:
         st.info("No active interns found.")
         return
+
+    intern_options = {(intern['internship_id'], intern['student_id']): intern for intern in accepted_interns}
+    internship_titles = {intern['internship_id']: intern['internships']['title'] for intern in accepted_interns}
+
+    mode = st.radio("Assign to", ["Selected interns", "All interns of an internship"], horizontal=True)
+    if mode == "Selected interns":
+        selected_keys = st.multiselect(
+            "Select Interns",
+            list(intern_options.keys()),
+            format_func=lambda k: f"{intern_options[k]['profiles_names']['full_name']} ({intern_options[k]['internships']['title']})"
+        )
+    else:
+        internship_id = st.selectbox("Internship", list(internship_titles.keys()), format_func=lambda i: internship_titles[i])
+        selected_keys = [k for k in intern_options if k[0] == internship_id]
+        st.caption(f"{len(selected_keys)} intern(s) will receive this task.")
         
-    student_options = {f"{app['profiles_names']['full_name']} ({app['internships']['title']})": app for app in accepted_apps}
-    selected_student_key = st.selectbox("Select Intern", list(student_options.keys()))
-    
-    if selected_student_key:
-        selected_app = student_options[selected_student_key]
+    with st.form("task_form"):
+        title = st.text_input("Task Title")
+        description = st.text_area("Task Description")
+        due_date = st.date_input("Due Date")
         
-        with st.form("task_form"):
-            title = st.text_input("Task Title")
-            description = st.text_area("Task Description")
-            due_date = st.date_input("Due Date")
-            
-            submitted = st.form_submit_button("Assign Task")
-            if submitted:
-                try:
-                    supabase.table("tasks").insert({
-                        "internship_id": selected_app['internship_id'],
-                        "student_id": selected_app['profiles_names']['id'],
+        submitted = st.form_submit_button("Assign Task")
+        if submitted:
+            if not selected_keys:
+                st.error("Please select at least one intern.")
+            elif not title:
+                st.error("Please enter a task title.")
+            else:
+                tasks = [
+                    {
+                        "internship_id": internship_id,
+                        "student_id": student_id,
                         "title": title,
                         "description": description,
                         "due_date": due_date.isoformat(),
                         "status": "pending"
-                    }).execute()
-                    st.success("Task assigned successfully!")
+                    }
+                    for internship_id, student_id in selected_keys
+                ]
+                try:
+                    repository.assign_tasks(user.id, tasks)
+                    st.success(f"Task assigned to {len(tasks)} intern(s)!")
                 except Exception as e:
                     st.error(f"Error assigning task: {e}")
 
+@tracing.view
+def export_data(user):
+    st.header("Export Data")
+
+    try:
+        internships = repository.get_company_internships(user.id)
+    except Exception as e:
+        st.error(f"Error fetching internships: {e}")
+        return
+    internship_titles = {i['id']: i['title'] for i in internships}
+
+    with st.form("export_form"):
+        kind = st.radio("Data", ["applications", "tasks"], format_func=lambda k: "Applicants" if k == "applications" else "Intern Tasks", horizontal=True)
+        internship_id = st.selectbox(
+            "Internship",
+            [None] + list(internship_titles.keys()),
+            format_func=lambda i: "All internships" if i is None else internship_titles.get(i, "Unknown internship")
+        )
+        status = st.selectbox("Application Status", [None] + APPLICATION_STATUSES, format_func=lambda s: "All" if s is None else s.capitalize())
+        file_format = st.radio("Format", list(export.FORMATS.keys()), horizontal=True)
+        submitted = st.form_submit_button("Prepare Export")
+
+    if submitted:
+        try:
+            # Rows are streamed page by page into the file; no DataFrame is built
+            with st.spinner("Preparing export..."):
+                file, count = export.export(kind, file_format, user.id, internship_id, status if kind == "applications" else None)
+            with file:
+                # The download button holds its own copy of the file
+                data = file.read()
+            extension, mime = export.FORMATS[file_format]
+            st.success(f"Exported {count} rows.")
+            st.download_button(
+                "Download",
+                data,
+                file_name=f"{kind}_{datetime.now().strftime('%Y%m%d_%H%M')}.{extension}",
+                mime=mime,
+                type="primary"
+            )
+        except Exception as e:
+            st.error(f"Error exporting data: {e}")
+
+@tracing.view
 def company_dashboard(user):
     st.header("Company Dashboard")
     
     # Fetch stats
     try:
-        # Internships
-        internships = supabase.table("internships").select("id", count="exact").eq("company_id", user.id).execute()
-        internship_count = internships.count
-        
-        # Applications (Pending)
-        # We need to filter applications by internships owned by this company. 
-        # Since we can't easily do deep joins with count in one go without a view, we'll fetch pending ones.
-        # A more efficient way would be RPC or a View, but for now let's fetch and filter (MVP).
-        my_internships = supabase.table("internships").select("id").eq("company_id", user.id).execute()
-        my_internship_ids = [i['id'] for i in my_internships.data]
-        
-        if my_internship_ids:
-            pending_apps = supabase.table("applications").select("id", count="exact").in_("internship_id", my_internship_ids).eq("status", "pending").execute()
-            pending_count = pending_apps.count
-            
-            active_tasks = supabase.table("tasks").select("id", count="exact").in_("internship_id", my_internship_ids).eq("status", "pending").execute()
-            task_count = active_tasks.count
-        else:
-            pending_count = 0
-            task_count = 0
-
+        stats = repository.get_company_stats(user.id)
     except Exception as e:
         st.error(f"Error fetching stats: {e}")
-        internship_count = 0
-        pending_count = 0
-        task_count = 0
+        stats = {}
 
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4, col5 = st.columns(5)
     with col1:
-        st.metric("Posted Internships", internship_count)
+        st.metric("Posted Internships", stats.get("internships", 0))
     with col2:
-        st.metric("Pending Applications", pending_count)
+        st.metric("Open Internships", stats.get("open_internships", 0))
     with col3:
-        st.metric("Active Tasks", task_count)
+        st.metric("Pending Applications", stats.get("pending_applications", 0))
+    with col4:
+        st.metric("Accepted Applications", stats.get("accepted_applications", 0))
+    with col5:
+        st.metric("Active Tasks", stats.get("active_tasks", 0))
+
+    if stats.get("per_internship"):
+        st.subheader("By Internship")
+        st.dataframe(
+            [
+                {
+                    "Internship": row['title'],
+                    "Status": row['status'],
+                    "Pending": row['pending_applications'],
+                    "Accepted": row['accepted_applications'],
+                    "Active Tasks": row['active_tasks']
+                }
+                for row in stats["per_internship"]
+            ],
+            width="stretch"
+        )
         
     st.divider()
     st.subheader("Quick Actions")
     st.write("Use the sidebar menu to manage your internships and applications.")
 
 def show_company_view(user):
-    selected = st.sidebar.radio("Menu", ["Dashboard", "Post Internship", "Manage Applications", "Assign Tasks"])
+    unread = messages_view.unread_count(user)
+    selected = st.sidebar.radio("Menu", ["Dashboard", "Post Internship", "Manage Applications", "Assign Tasks", "Export Data", "Messages"], format_func=lambda option: messages_view.menu_label(option, unread))
     
     if selected == "Dashboard":
         company_dashboard(user)
@@ -184,3 +417,7 @@ def show_company_view(user):
         manage_applications(user)
     elif selected == "Assign Tasks":
         assign_tasks(user)
+    elif selected == "Export Data":
+        export_data(user)
+    elif selected == "Messages":
+        messages_view.messages(user)
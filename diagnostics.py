@@ -0,0 +1,74 @@
+import streamlit as st
+import mirror
+import repository
+import resilience
+import sync
+import tracing
+
+def is_admin(user):
+    # Only accounts listed in secrets; no list means no admins, since anyone
+    # could sign up with a guessable default address
+    try:
+        emails = st.secrets.get("admin", {}).get("emails", [])
+    except FileNotFoundError:
+        return False
+    return bool(user.email) and user.email in emails
+
+def show_diagnostics(user):
+    # Not in any menu: reached with ?page=diagnostics by an admin account
+    import pandas as pd
+    tracer = tracing.get_tracer()
+    st.header("Diagnostics")
+
+    summary = tracer.summary()
+    st.subheader("Backend calls by view")
+    if summary:
+        st.dataframe(pd.DataFrame(summary), width="stretch", hide_index=True)
+    else:
+        st.info("No backend calls recorded yet.")
+
+    views = sorted({row['view'] for row in summary})
+    if views:
+        selected = st.selectbox("Latency histogram for view", views)
+        buckets = [0] * (len(tracing.LATENCY_BUCKETS) + 1)
+        for (view_name, _, _, _), histogram in tracer.snapshot().items():
+            if view_name == selected:
+                buckets = [a + b for a, b in zip(buckets, histogram['buckets'])]
+        labels = [f"≤ {bound * 1000:g} ms" for bound in tracing.LATENCY_BUCKETS] + ["slower"]
+        st.bar_chart(pd.DataFrame({"calls": buckets}, index=pd.CategoricalIndex(labels, categories=labels, ordered=True)))
+
+    st.subheader(f"Slow calls (≥ {tracer.slow_call_seconds:g} s)")
+    slow_calls = list(tracer.slow)
+    if slow_calls:
+        st.dataframe(pd.DataFrame(slow_calls[::-1]), width="stretch", hide_index=True)
+    else:
+        st.info("No slow calls recorded.")
+
+    st.subheader("Caches and sync")
+    col1, col2, col3, col4 = st.columns(4)
+    stats = repository.cache_stats()
+    col1.metric("Query Cache Entries", stats['entries'])
+    col2.metric("Hit Rate", f"{stats['hit_rate']:.0%}")
+    col3.metric("Hits / Misses", f"{stats['hits']} / {stats['misses']}")
+    col4.metric("Evictions", stats['evictions'])
+    breaker = resilience.get_breaker().stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Circuit Breaker", breaker['state'])
+    col2.metric("Consecutive Failures", breaker['consecutive_failures'])
+    col3.metric("Times Opened", breaker['times_opened'])
+    col4.metric("Stale Cache Hits", stats['stale_hits'])
+    if mirror.get_mode() == "mirror":
+        st.write("**Catalog mirror**")
+        st.json(mirror.get_mirror().stats())
+    synced = sync.sync_stats()
+    if synced:
+        st.write("**Synced tables (this session)**")
+        st.dataframe(pd.DataFrame(synced), width="stretch", hide_index=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("Download Prometheus Metrics", tracer.prometheus_text(), file_name="intern_metrics.prom", mime="text/plain")
+    with col2:
+        if st.button("Reset Histograms"):
+            tracer.reset()
+            st.rerun()
@@ -0,0 +1,171 @@
+import csv
+import io
+import re
+import tempfile
+
+import repository
+
+EXPORT_PAGE_SIZE = 1000
+# Export files are held in memory up to this size, then spill to disk
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+FORMATS = {"CSV": ("csv", "text/csv"), "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+
+# Control characters are not allowed in XLSX cells
+_ILLEGAL_XLSX_CHARACTERS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _profile(row):
+    return row.get('profiles_names') or {}
+
+
+APPLICATION_COLUMNS = (
+    ("Internship", lambda internship, row: internship['title']),
+    ("Applicant", lambda internship, row: _profile(row).get('full_name')),
+    ("Email", lambda internship, row: _profile(row).get('email')),
+    ("Phone", lambda internship, row: _profile(row).get('phone')),
+    ("Location", lambda internship, row: _profile(row).get('location')),
+    ("Skills", lambda internship, row: ", ".join(_profile(row).get('skills') or [])),
+    ("Resume URL", lambda internship, row: _profile(row).get('resume_url')),
+    ("Portfolio URL", lambda internship, row: _profile(row).get('portfolio_url')),
+    ("Status", lambda internship, row: row['status']),
+    ("Applied At", lambda internship, row: row['applied_at']),
+)
+
+TASK_COLUMNS = (
+    ("Internship", lambda internship, row: internship['title']),
+    ("Intern", lambda internship, row: _profile(row).get('full_name')),
+    ("Email", lambda internship, row: _profile(row).get('email')),
+    ("Task", lambda internship, row: row['title']),
+    ("Status", lambda internship, row: row['status']),
+    ("Due Date", lambda internship, row: row['due_date']),
+    ("Submission Link", lambda internship, row: row['submission_link']),
+    ("Feedback", lambda internship, row: row['feedback']),
+    ("Assigned At", lambda internship, row: row['created_at']),
+)
+
+
+def iter_pages(fetch_page):
+    """Yield rows from a keyset-paginated read until its last page."""
+    after = None
+    while True:
+        page = fetch_page(after)
+        yield from page["rows"]
+        after = page["next_cursor"]
+        if after is None:
+            return
+
+
+def _internships(company_id, internship_id=None):
+    internships = repository.get_company_internships(company_id)
+    return [i for i in internships if internship_id is None or i['id'] == internship_id]
+
+
+def application_rows(company_id, internship_id=None, status=None, page_size=EXPORT_PAGE_SIZE):
+    """Yield one export row per application, one page in memory at a time."""
+    for internship in _internships(company_id, internship_id):
+        pages = iter_pages(lambda after: repository.get_applications_export_page(internship['id'], status, page_size, after))
+        for row in pages:
+            yield [value(internship, row) for _, value in APPLICATION_COLUMNS]
+
+
+def task_rows(company_id, internship_id=None, page_size=EXPORT_PAGE_SIZE):
+    """Yield one export row per task, one page in memory at a time."""
+    for internship in _internships(company_id, internship_id):
+        pages = iter_pages(lambda after: repository.get_tasks_export_page(internship['id'], page_size, after))
+        for row in pages:
+            yield [value(internship, row) for _, value in TASK_COLUMNS]
+
+
+def _cell(value):
+    # Text starting with a formula character would be evaluated by spreadsheet
+    # apps, and applicants control most of these fields
+    if isinstance(value, str) and value[:1] in ("=", "+", "-", "@", "\t", "\r"):
+        return "'" + value
+    return value
+
+
+def write_csv(headers, rows, file) -> int:
+    # utf-8-sig so Excel detects the encoding
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    writer = csv.writer(text)
+    writer.writerow(headers)
+    count = 0
+    for row in rows:
+        writer.writerow([_cell(value) for value in row])
+        count += 1
+    text.flush()
+    text.detach()
+    return count
+
+
+def write_xlsx(headers, rows, file, sheet_title) -> int:
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise RuntimeError("Excel export needs openpyxl: pip install openpyxl")
+    # Write-only workbooks stream rows to disk instead of keeping every cell
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_title)
+    sheet.append(headers)
+    count = 0
+    for row in rows:
+        sheet.append([_ILLEGAL_XLSX_CHARACTERS.sub("", _cell(value)) if isinstance(value, str) else value for value in row])
+        count += 1
+    workbook.save(file)
+    return count
+
+
+def export(kind, file_format, company_id, internship_id=None, status=None):
+    """Stream applications or tasks into an export file.
+
+    Returns ``(file, row_count)``; the file is rewound and ready to read.
+    """
+    if kind == "applications":
+        columns, rows = APPLICATION_COLUMNS, application_rows(company_id, internship_id, status)
+    else:
+        columns, rows = TASK_COLUMNS, task_rows(company_id, internship_id)
+    headers = [header for header, _ in columns]
+
+    file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    if FORMATS[file_format][0] == "csv":
+        count = write_csv(headers, rows, file)
+    else:
+        count = write_xlsx(headers, rows, file, kind.capitalize())
+    file.seek(0)
+    return file, count
+
+
+if __name__ == "__main__":
+    # Peak memory per export size: python export.py [applications ...]
+    import logging
+    import sys
+    import time
+    import tracemalloc
+
+    import openpyxl  # noqa: F401 - imported up front so it is not counted
+
+    import fake_supabase
+    from seed import generate_dataset
+    from utils import use_client
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 20_000]
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+    # Peak memory includes the spooled output file until it spills to disk
+    print(f"{'rows':>8} {'format':6} {'seconds':>8} {'rows/s':>9} {'file MB':>8} {'peak MB':>8}")
+    for size in sizes:
+        fake = fake_supabase.FakeSupabase(generate_dataset(
+            companies=1, students=max(size // 5, 20), internships=max(size // 500, 10), applications=size, tasks=0
+        ))
+        company_id = next(p["id"] for p in fake.rows("profiles_names").values() if p["role"] == "company")
+        for file_format in FORMATS:
+            repository.cache.clear()
+            tracemalloc.start()
+            started = time.perf_counter()
+            with use_client(fake):
+                file, count = export("applications", file_format, company_id)
+            seconds = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            file_bytes = file.seek(0, io.SEEK_END)
+            file.close()
+            print(f"{count:8} {FORMATS[file_format][0]:6} {seconds:8.2f} {count / seconds:9.0f} {file_bytes / 1e6:8.2f} {peak / 1e6:8.2f}")
@@ -0,0 +1,796 @@
+"""In-memory stand-in for the Supabase client, for benchmarks and fault tests.
+
+Implements the subset of the postgrest builder chain, RPC functions and
+auth calls this app uses, over plain dicts. Every ``execute()`` counts as
+one round trip and sleeps for the configured latency first. Row level
+security is not modelled: the fake behaves like a service-role client,
+except that RPCs scoped to ``auth.uid()`` use the signed-in user.
+``inject_faults()`` makes round trips fail or stall on purpose.
+
+Install it for a session with ``st.session_state["supabase_client"] = fake``
+or for a thread with ``utils.use_client(fake)``. ``session_client()`` gives
+simulated concurrent sessions each their own auth state over the same data.
+"""
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import httpx
+from postgrest.exceptions import APIError
+
+from seed import SCALES, generate_dataset
+
+# (table, embedded table) -> foreign key column on the table
+RELATIONSHIPS = {
+    ("applications", "internships"): "internship_id",
+    ("applications", "profiles_names"): "student_id",
+    ("internships", "profiles_names"): "company_id",
+    ("tasks", "internships"): "internship_id",
+    ("tasks", "profiles_names"): "student_id",
+    ("messages", "profiles_names"): "sender_id",
+}
+
+# Column defaults applied on insert, mirroring schema.sql
+DEFAULTS = {
+    "internships": {"status": "open"},
+    "applications": {"status": "pending", "applied_at": None},
+    "tasks": {"status": "pending"},
+    "messages": {"read": False},
+}
+UNIQUE = {"applications": ("internship_id", "student_id")}
+TRACKED_TABLES = ("internships", "applications", "tasks")
+# Tables whose updates bump updated_at; profiles have no tombstones
+TOUCHED_TABLES = TRACKED_TABLES + ("profiles_names",)
+
+_TIMESTAMP = re.compile(r"^\d{4}-\d\d-\d\dT")
+
+
+def now():
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _comparable(value):
+    # Timestamps are compared as instants, whatever their ISO formatting
+    if isinstance(value, str) and _TIMESTAMP.match(value):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def _coerce(value, like):
+    # Values parsed out of or_() strings arrive as text
+    if isinstance(value, str) and isinstance(like, (int, float)) and not isinstance(like, bool):
+        return type(like)(value)
+    return value
+
+
+def _sort_key(value):
+    return (1, 0) if value is None else (0, _comparable(value))
+
+
+def _pattern(pattern):
+    regex = "".join(".*" if c == "%" else "." if c == "_" else re.escape(c) for c in pattern)
+    return re.compile(f"^{regex}$", re.IGNORECASE | re.DOTALL)
+
+
+def _split_top_level(text, separator=","):
+    parts, depth, current = [], 0, ""
+    for c in text:
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        if c == separator and depth == 0:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += c
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _parse_select(columns):
+    """Parse a select string into plain columns and embeds.
+
+    Embeds are (alias, table, hint, sub-select) for ``alias:table!hint(...)``.
+    """
+    plain, embeds = [], []
+    for item in _split_top_level(columns or "*"):
+        if "(" in item:
+            head, inner = item.split("(", 1)
+            alias, _, head = head.rpartition(":")
+            table, _, hint = head.partition("!")
+            embeds.append((alias or table, table, hint, _parse_select(inner[:-1])))
+        else:
+            plain.append(item)
+    return plain, embeds
+
+
+def _condition(column, operator, value):
+    """A predicate on a row for one PostgREST filter."""
+    def test(row):
+        actual = row.get(column)
+        if operator == "is":
+            return actual is value
+        if operator == "in":
+            return actual in value
+        if operator == "cs":
+            return actual is not None and set(value) <= set(actual)
+        if operator in ("like", "ilike"):
+            return actual is not None and bool(_pattern(value).match(str(actual)))
+        if actual is None:
+            return False
+        left, right = _comparable(actual), _comparable(_coerce(value, actual))
+        return {
+            "eq": left == right, "neq": left != right,
+            "gt": left > right, "gte": left >= right,
+            "lt": left < right, "lte": left <= right,
+        }[operator]
+    return test
+
+
+def _parse_or(expression):
+    # "a.lt.x,and(a.eq.x,b.lt.y)" -> predicate
+    tests = []
+    for part in _split_top_level(expression):
+        if part.startswith(("and(", "or(")):
+            combinator, inner = part.split("(", 1)
+            inner_tests = [_parse_or(p) for p in _split_top_level(inner[:-1])]
+            combine = all if combinator == "and" else any
+            tests.append(lambda row, inner_tests=inner_tests, combine=combine: combine(t(row) for t in inner_tests))
+        else:
+            column, operator, value = part.split(".", 2)
+            if value.startswith('"') and value.endswith('"'):
+                value = value[1:-1]
+            if operator == "is":
+                value = {"null": None, "true": True, "false": False}[value]
+            tests.append(_condition(column, operator, value))
+    return lambda row: any(t(row) for t in tests)
+
+
+class FakeResponse(SimpleNamespace):
+    pass
+
+
+class FakeQuery:
+    """One postgrest request: filters, ordering and paging over a table."""
+
+    def __init__(self, backend, table):
+        self.backend = backend
+        self.table = table
+        self.operation = "select"
+        self.columns = "*"
+        self.payload = None
+        self.count = None
+        self.head = False
+        self.filters = []
+        self.orders = []
+        self.offset = 0
+        self.max_rows = None
+        self.single_row = False
+        self.maybe = False
+        self.point_id = None
+        self.returning = "representation"
+
+    # --- Operations ---
+
+    def select(self, *columns, count=None, head=False):
+        self.columns = ", ".join(columns) or "*"
+        self.count = count
+        self.head = head
+        return self
+
+    def insert(self, rows, returning="representation", **kwargs):
+        self.operation = "insert"
+        self.payload = rows
+        self.returning = returning
+        return self
+
+    def upsert(self, rows, **kwargs):
+        self.operation = "upsert"
+        self.payload = rows
+        return self
+
+    def update(self, values, **kwargs):
+        self.operation = "update"
+        self.payload = values
+        return self
+
+    def delete(self, **kwargs):
+        self.operation = "delete"
+        return self
+
+    # --- Filters ---
+
+    def _filter(self, column, operator, value):
+        path, _, name = column.rpartition(".")
+        self.filters.append((path, _condition(name, operator, value)))
+        return self
+
+    def eq(self, column, value):
+        if column == "id":
+            self.point_id = value
+        return self._filter(column, "eq", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "neq", value)
+
+    def gt(self, column, value):
+        return self._filter(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._filter(column, "gte", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "lte", value)
+
+    def like(self, column, pattern):
+        return self._filter(column, "like", pattern)
+
+    def ilike(self, column, pattern):
+        return self._filter(column, "ilike", pattern)
+
+    def is_(self, column, value):
+        return self._filter(column, "is", None if value in (None, "null") else value)
+
+    def in_(self, column, values):
+        return self._filter(column, "in", list(values))
+
+    def cs(self, column, values):
+        return self._filter(column, "cs", list(values))
+
+    contains = cs
+
+    def or_(self, expression, reference_table=None):
+        self.filters.append((reference_table or "", _parse_or(expression)))
+        return self
+
+    # --- Shaping ---
+
+    def order(self, column, desc=False, nullsfirst=None, foreign_table=None):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, size, foreign_table=None):
+        self.max_rows = size
+        return self
+
+    def range(self, start, end, foreign_table=None):
+        self.offset = start
+        self.max_rows = end - start + 1
+        return self
+
+    def single(self):
+        self.single_row = True
+        return self
+
+    def maybe_single(self):
+        self.single_row = True
+        self.maybe = True
+        return self
+
+    def execute(self):
+        return self.backend.execute(self)
+
+
+class FakeAuth:
+    def __init__(self, backend):
+        self.backend = backend
+        self.user = None
+
+    def _user(self, account):
+        return SimpleNamespace(id=account["id"], email=account["email"], user_metadata=account["user_metadata"])
+
+    def sign_in_with_password(self, credentials):
+        self.backend.round_trip()
+        account = self.backend.accounts.get(credentials["email"])
+        if account is None or account["password"] != credentials["password"]:
+            raise Exception("Invalid login credentials")
+        self.user = self._user(account)
+        return SimpleNamespace(user=self.user, session=SimpleNamespace(access_token=f"fake-{account['id']}"))
+
+    def sign_up(self, credentials):
+        self.backend.round_trip()
+        metadata = (credentials.get("options") or {}).get("data") or {}
+        account = self.backend.create_account(credentials["email"], credentials["password"], metadata)
+        return SimpleNamespace(user=self._user(account), session=None)
+
+    def sign_out(self):
+        self.backend.round_trip()
+        self.user = None
+
+    def get_user(self):
+        self.backend.round_trip()
+        return SimpleNamespace(user=self.user)
+
+    def get_session(self):
+        # The token never expires here, so there is nothing to refresh
+        return SimpleNamespace(access_token=f"fake-{self.user.id}") if self.user else None
+
+
+class FakeRpc:
+    def __init__(self, backend, fn, params, caller=None):
+        self.backend = backend
+        self.fn = fn
+        self.params = params or {}
+        # The auth whose user auth.uid() returns; the backend's own by default
+        self.caller = caller
+
+    def execute(self):
+        self.backend.round_trip()
+        handler = getattr(self.backend, f"rpc_{self.fn}", None)
+        if handler is None:
+            raise APIError({"code": "PGRST202", "message": f"Could not find the function public.{self.fn}"})
+        started = time.perf_counter()
+        with self.backend.lock:
+            self.backend.caller = self.caller
+            try:
+                data = handler(**self.params)
+            finally:
+                self.backend.caller = None
+        self.backend.add_eval_time(time.perf_counter() - started)
+        return self.backend.add_response(FakeResponse(data=data, count=None))
+
+
+class FakeSessionClient:
+    """One browser session's client over a shared FakeSupabase.
+
+    Like a real per-session client it has its own auth state, so RPCs see
+    its user; data, latency, faults and stats are the backend's.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.auth = FakeAuth(backend)
+
+    def table(self, table_name):
+        return FakeQuery(self.backend, table_name)
+
+    from_ = table
+
+    def rpc(self, fn, params=None, **kwargs):
+        return FakeRpc(self.backend, fn, params, caller=self.auth)
+
+
+class FakeSupabase:
+    """Client-shaped in-memory backend.
+
+    ``latency`` is the simulated seconds per round trip and ``jitter`` a
+    fraction of it added at random. ``stats()`` returns the round trips,
+    simulated backend time and response payload bytes (as JSON) since the
+    last ``reset_stats()``.
+    """
+
+    def __init__(self, data=None, latency=0.0, jitter=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.lock = threading.RLock()
+        self.tables = {}
+        self._unique = {}
+        self.accounts = {}
+        self.auth = FakeAuth(self)
+        self.caller = None
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+        self.inject_faults()
+        for table, rows in (data or {}).items():
+            self.load(table, rows)
+
+    # --- Client interface ---
+
+    def table(self, table_name):
+        return FakeQuery(self, table_name)
+
+    from_ = table
+
+    def rpc(self, fn, params=None, **kwargs):
+        return FakeRpc(self, fn, params)
+
+    def session_client(self) -> FakeSessionClient:
+        """A client with its own auth state, for one simulated session."""
+        return FakeSessionClient(self)
+
+    # --- Data ---
+
+    def rows(self, table):
+        return self.tables.setdefault(table, {})
+
+    def load(self, table, rows):
+        """Bulk load rows as-is, without defaults, round trips or latency."""
+        self._unique.pop(table, None)
+        target = self.rows(table)
+        for row in rows:
+            row = dict(row)
+            self._derive(table, row)
+            target[self._key(table, row)] = row
+
+    def create_account(self, email, password, metadata, user_id=None):
+        if email in self.accounts:
+            raise Exception("User already registered")
+        account = {"id": user_id or str(uuid.uuid4()), "email": email, "password": password, "user_metadata": metadata}
+        self.accounts[email] = account
+        # on_auth_user_created trigger
+        self.rows("profiles_names")[account["id"]] = {
+            "id": account["id"], "email": email, "role": metadata.get("role"),
+            "full_name": metadata.get("full_name"), "created_at": now(), "updated_at": now(),
+        }
+        return account
+
+    def _key(self, table, row):
+        if table == "deleted_rows":
+            return (row["table_name"], row["row_id"])
+        if table == "message_threads":
+            return (row["owner_id"], row["partner_id"])
+        return row["id"]
+
+    def _derive(self, table, row):
+        # Generated columns and the message_threads trigger
+        if table != "messages":
+            return
+        row["user_low"], row["user_high"] = sorted([row["sender_id"], row["receiver_id"]])
+        threads = self.rows("message_threads")
+        for owner, partner in ((row["sender_id"], row["receiver_id"]), (row["receiver_id"], row["sender_id"])):
+            thread = threads.get((owner, partner))
+            if thread is None or _comparable(thread["last_message_at"]) <= _comparable(row["created_at"]):
+                threads[(owner, partner)] = {
+                    "owner_id": owner, "partner_id": partner, "last_message_at": row["created_at"],
+                    "last_message_preview": row["content"][:120], "last_sender_id": row["sender_id"],
+                }
+
+    # --- Stats and latency ---
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.round_trips = 0
+            self.backend_seconds = 0.0
+            self.response_bytes = 0
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "round_trips": self.round_trips,
+                "backend_ms": round(self.backend_seconds * 1000, 1),
+                "response_bytes": self.response_bytes,
+            }
+
+    def inject_faults(self, error_rate=0.0, slow_rate=0.0, slow_seconds=0.0, down=False):
+        """Make later round trips fail or stall, for resilience checks.
+
+        ``error_rate`` of them raise a 503 APIError and ``slow_rate`` take
+        ``slow_seconds`` longer; while ``down`` every one raises a
+        connection error. Call with no arguments to clear.
+        """
+        self.faults = {"error_rate": error_rate, "slow_rate": slow_rate, "slow_seconds": slow_seconds, "down": down}
+
+    def round_trip(self):
+        delay = self.latency * (1 + self.jitter * self.random.random())
+        faults = self.faults
+        roll = self.random.random()
+        if faults["error_rate"] <= roll < faults["error_rate"] + faults["slow_rate"]:
+            delay += faults["slow_seconds"]
+        with self._stats_lock:
+            self.round_trips += 1
+            self.backend_seconds += delay
+        if delay:
+            time.sleep(delay)
+        if faults["down"]:
+            raise httpx.ConnectError("fake backend is down")
+        if roll < faults["error_rate"]:
+            raise APIError({"code": "503", "message": "Service Unavailable"})
+
+    def add_eval_time(self, seconds):
+        with self._stats_lock:
+            self.backend_seconds += seconds
+
+    def add_response(self, response):
+        # What PostgREST would send: the JSON body
+        size = len(json.dumps(response.data, default=str).encode()) if response.data is not None else 0
+        with self._stats_lock:
+            self.response_bytes += size
+        return response
+
+    # --- Query execution ---
+
+    def execute(self, query):
+        self.round_trip()
+        started = time.perf_counter()
+        with self.lock:
+            if query.operation in ("insert", "upsert"):
+                data = self._insert(query)
+            elif query.operation == "update":
+                data = self._update(query)
+            elif query.operation == "delete":
+                data = self._delete(query)
+            else:
+                data = None
+            if query.returning == "minimal":
+                # Prefer: return=minimal sends no body back
+                response = FakeResponse(data=[], count=None)
+            else:
+                response = self._select(query, data)
+        self.add_eval_time(time.perf_counter() - started)
+        return response if query.returning == "minimal" else self.add_response(response)
+
+    def _matches(self, query):
+        plain_filters = [test for path, test in query.filters if not path]
+        rows = self.rows(query.table)
+        if query.point_id is not None:
+            # Point lookups by primary key skip the scan
+            row = rows.get(query.point_id)
+            rows = {query.point_id: row} if row is not None else {}
+        return [row for row in rows.values() if all(test(row) for test in plain_filters)]
+
+    def _select(self, query, written=None):
+        plain, embeds = _parse_select(query.columns)
+        rows = written if written is not None else self._matches(query)
+
+        shaped = []
+        for row in rows:
+            result = self._shape(query.table, row, plain, embeds, query.filters)
+            if result is not None:
+                shaped.append(result)
+        # Stable sorts applied last key first give a multi-column order;
+        # nulls sort last ascending and first descending, as in Postgres
+        for column, desc in reversed(query.orders):
+            shaped.sort(key=lambda r: _sort_key(r.get(column)), reverse=desc)
+
+        count = len(shaped) if query.count else None
+        if written is None:
+            end = None if query.max_rows is None else query.offset + query.max_rows
+            shaped = shaped[query.offset:end]
+        if query.head:
+            shaped = []
+        if query.single_row:
+            if len(shaped) != 1:
+                if query.maybe and not shaped:
+                    return None
+                raise APIError({"code": "PGRST116", "message": "JSON object requested, multiple (or no) rows returned"})
+            return FakeResponse(data=shaped[0], count=count)
+        return FakeResponse(data=shaped, count=count)
+
+    def _shape(self, table, row, plain, embeds, filters, path=""):
+        # Filters on embedded columns ("internships.company_id") apply to the
+        # embedded row; with !inner a failed embed drops the parent row
+        if path:
+            tests = [test for filter_path, test in filters if filter_path == path]
+            if not all(test(row) for test in tests):
+                return None
+        result = dict(row) if "*" in plain else {c: row.get(c) for c in plain}
+        for alias, embedded_table, hint, (sub_plain, sub_embeds) in embeds:
+            fk = RELATIONSHIPS.get((table, embedded_table)) if hint in ("", "inner") else hint
+            target = self.rows(embedded_table).get(row.get(fk))
+            sub_path = f"{path}.{alias}" if path else alias
+            shaped = None
+            if target is not None:
+                shaped = self._shape(embedded_table, target, sub_plain, sub_embeds, filters, sub_path)
+            if shaped is None and hint == "inner":
+                return None
+            result[alias] = shaped
+        return result
+
+    def _insert(self, query):
+        rows = query.payload if isinstance(query.payload, list) else [query.payload]
+        table = self.rows(query.table)
+        inserted = []
+        for values in rows:
+            row = {**DEFAULTS.get(query.table, {}), **values}
+            row.setdefault("id", str(uuid.uuid4()))
+            timestamp = now()
+            for column in ("created_at", "applied_at", "updated_at"):
+                if row.get(column) is None and (column != "applied_at" or query.table == "applications"):
+                    row[column] = timestamp
+            unique = UNIQUE.get(query.table)
+            if unique and query.operation == "insert":
+                keys = self._unique_keys(query.table)
+                key = tuple(row.get(c) for c in unique)
+                if key in keys:
+                    raise APIError({"code": "23505", "message": f"duplicate key value violates unique constraint \"{query.table}_{'_'.join(unique)}_key\""})
+                keys.add(key)
+            if query.operation == "upsert" and row["id"] in table:
+                row = {**table[row["id"]], **values, "updated_at": timestamp}
+            self._derive(query.table, row)
+            table[self._key(query.table, row)] = row
+            inserted.append(row)
+        return inserted
+
+    def _unique_keys(self, table):
+        # Built on first use and kept current by inserts; updates and deletes
+        # of the table drop it
+        keys = self._unique.get(table)
+        if keys is None:
+            columns = UNIQUE[table]
+            keys = self._unique[table] = {tuple(row.get(c) for c in columns) for row in self.rows(table).values()}
+        return keys
+
+    def _update(self, query):
+        self._unique.pop(query.table, None)
+        updated = []
+        for row in self._matches(query):
+            row.update(query.payload)
+            if query.table in TOUCHED_TABLES:
+                row["updated_at"] = now()
+            updated.append(row)
+        return updated
+
+    def _delete(self, query):
+        self._unique.pop(query.table, None)
+        deleted = self._matches(query)
+        table = self.rows(query.table)
+        for row in deleted:
+            del table[self._key(query.table, row)]
+            if query.table in TRACKED_TABLES:
+                tombstone = {"table_name": query.table, "row_id": row["id"], "deleted_at": now()}
+                self.rows("deleted_rows")[self._key("deleted_rows", tombstone)] = tombstone
+        return deleted
+
+    # --- RPC functions (see schema.sql) ---
+
+    def _uid(self):
+        auth = self.caller or self.auth
+        return auth.user.id if auth.user else None
+
+    def _match_open_internships(self, search_text=None, location_text=None, skill_text=None):
+        # Letters and digits only, as in match_open_internships
+        words = re.findall(r"[^\W_]+", (search_text or "").lower())
+        for row in self.rows("internships").values():
+            if row.get("status") != "open":
+                continue
+            if words:
+                text = " ".join(str(row.get(c) or "") for c in ("title", "role", "description"))
+                tokens = re.findall(r"\w+", (text + " " + " ".join(row.get("skills_required") or [])).lower())
+                if not all(any(token.startswith(word) for token in tokens) for word in words):
+                    continue
+            if location_text and location_text.lower() not in (row.get("location") or "").lower():
+                continue
+            if skill_text and skill_text.lower() not in " ".join(row.get("skills_required") or []).lower():
+                continue
+            yield row
+
+    def _facet_filter(self, row, facet_location=None, facet_skill=None, facet_duration=None, facet_company=None, skip=None):
+        return (
+            (skip == "location" or not facet_location or row.get("location") == facet_location)
+            and (skip == "skill" or not facet_skill or facet_skill in (row.get("skills_required") or []))
+            and (skip == "duration" or not facet_duration or row.get("duration") == facet_duration)
+            and (skip == "company" or not facet_company or row.get("company_id") == facet_company)
+        )
+
+    def _company_name(self, company_id):
+        return (self.rows("profiles_names").get(company_id) or {}).get("company_name")
+
+    def rpc_search_internships(self, search_text=None, location_text=None, skill_text=None, page_size=20, page_offset=0, **facets):
+        # Rank ties are broken by recency upstream; the fake ranks by recency only
+        rows = [row for row in self._match_open_internships(search_text, location_text, skill_text) if self._facet_filter(row, **facets)]
+        rows.sort(key=lambda r: (_comparable(r["created_at"]), r["id"]), reverse=True)
+        columns = ("id", "company_id", "title", "role", "location", "stipend", "duration", "skills_required", "created_at")
+        return [
+            {**{c: row.get(c) for c in columns}, "company_name": self._company_name(row["company_id"]), "rank": 0.0}
+            for row in rows[page_offset:page_offset + page_size]
+        ]
+
+    def rpc_internship_facets(self, search_text=None, location_text=None, skill_text=None, facet_limit=20, **facets):
+        matches = list(self._match_open_internships(search_text, location_text, skill_text))
+        result = {}
+        for name in ("location", "skill", "duration", "company"):
+            counts = {}
+            for row in matches:
+                if not self._facet_filter(row, skip=name, **facets):
+                    continue
+                values = row.get("skills_required") or [] if name == "skill" else [row.get("company_id" if name == "company" else name)]
+                for value in values:
+                    if value is not None:
+                        counts[value] = counts.get(value, 0) + 1
+            labels = {value: (self._company_name(value) or "Unknown Company") if name == "company" else value for value in counts}
+            ordered = sorted(counts.items(), key=lambda item: (-item[1], labels[item[0]]))[:facet_limit]
+            result[name] = [{"value": value, "label": labels[value], "count": count} for value, count in ordered]
+        return result
+
+    def _display_name(self, profile):
+        # coalesce(company_name, full_name, email)
+        return next((profile[c] for c in ("company_name", "full_name", "email") if profile and profile.get(c)), None)
+
+    def rpc_inbox_threads(self, page_size=20, after_at=None, after_partner=None):
+        uid = self._uid()
+        threads = [t for (owner, _), t in self.rows("message_threads").items() if owner == uid]
+        threads.sort(key=lambda t: (_comparable(t["last_message_at"]), t["partner_id"]), reverse=True)
+        if after_at is not None:
+            after = (_comparable(after_at), after_partner)
+            threads = [t for t in threads if (_comparable(t["last_message_at"]), t["partner_id"]) < after]
+        unread = {}
+        for message in self.rows("messages").values():
+            if message["receiver_id"] == uid and not message["read"]:
+                unread[message["sender_id"]] = unread.get(message["sender_id"], 0) + 1
+        profiles = self.rows("profiles_names")
+        return [
+            {
+                "partner_id": t["partner_id"],
+                "partner_name": self._display_name(profiles.get(t["partner_id"])),
+                "last_message_at": t["last_message_at"], "last_message_preview": t["last_message_preview"],
+                "last_sender_id": t["last_sender_id"], "unread": unread.get(t["partner_id"], 0),
+            }
+            for t in threads[:page_size]
+        ]
+
+    def rpc_sync_watermark(self):
+        return now()
+
+    def rpc_pull_changes(self, target_table, columns, scope=None, since=None, page_offset=0, max_rows=1000):
+        after = _comparable(since) if since else None
+        rows = [row for row in self.rows(target_table).values()
+                if all(row.get(column) == value for column, value in (scope or {}).items())
+                and (after is None or _comparable(row["updated_at"]) > after)]
+        rows.sort(key=lambda row: (_comparable(row["updated_at"]), row["id"]))
+        page = [{**{column: row.get(column) for column in columns}, "updated_at": row["updated_at"]}
+                for row in rows[page_offset:page_offset + max_rows]]
+        deleted = []
+        if after is not None and page_offset == 0:
+            deleted = [{"row_id": row["row_id"], "deleted_at": row["deleted_at"]}
+                       for row in self.rows("deleted_rows").values()
+                       if row["table_name"] == target_table and _comparable(row["deleted_at"]) > after]
+        return {"watermark": now(), "rows": page, "deleted": deleted}
+
+    def rpc_table_changes(self, target_table, since, max_rows=100):
+        since = _comparable(since)
+        updated = [{"id": row["id"], "changed_at": row["updated_at"]}
+                   for row in self.rows(target_table).values() if _comparable(row["updated_at"]) > since]
+        deleted = [{"id": row["row_id"], "changed_at": row["deleted_at"]}
+                   for row in self.rows("deleted_rows").values()
+                   if row["table_name"] == target_table and _comparable(row["deleted_at"]) > since]
+        newest = lambda change: _comparable(change["changed_at"])
+        changes = sorted(updated, key=newest, reverse=True)[:max_rows] + sorted(deleted, key=newest, reverse=True)[:max_rows]
+        return {"watermark": now(), "changes": changes}
+
+    def rpc_company_application_counts(self, filter_internship_id=None):
+        mine = {row["id"] for row in self.rows("internships").values() if row["company_id"] == self._uid()}
+        counts = {}
+        for app in self.rows("applications").values():
+            if app["internship_id"] in mine and (filter_internship_id is None or app["internship_id"] == filter_internship_id):
+                counts[app["status"]] = counts.get(app["status"], 0) + 1
+        return [{"status": status, "count": count} for status, count in counts.items()]
+
+    def rpc_company_dashboard_stats(self):
+        per_internship = {
+            row["id"]: {"id": row["id"], "title": row["title"], "status": row["status"],
+                        "pending_applications": 0, "accepted_applications": 0, "active_tasks": 0}
+            for row in self.rows("internships").values() if row["company_id"] == self._uid()
+        }
+        for app in self.rows("applications").values():
+            stats = per_internship.get(app["internship_id"])
+            if stats and app["status"] in ("pending", "accepted"):
+                stats[f"{app['status']}_applications"] += 1
+        for task in self.rows("tasks").values():
+            stats = per_internship.get(task["internship_id"])
+            if stats and task["status"] == "pending":
+                stats["active_tasks"] += 1
+        rows = sorted(per_internship.values(), key=lambda r: r["title"])
+        return {
+            "internships": len(rows),
+            "open_internships": sum(r["status"] == "open" for r in rows),
+            "pending_applications": sum(r["pending_applications"] for r in rows),
+            "accepted_applications": sum(r["accepted_applications"] for r in rows),
+            "active_tasks": sum(r["active_tasks"] for r in rows),
+            "per_internship": rows,
+        }
+
+
+def seeded(scale="small", latency=0.0, jitter=0.0, seed=7, **sizes) -> FakeSupabase:
+    """A fake backend loaded with one of the SCALES datasets.
+
+    ``sizes`` override the scale's row counts, as in ``internships=10_000``.
+    Every profile gets an account with the password ``password``.
+    """
+    fake = FakeSupabase(generate_dataset(**{**SCALES[scale], **sizes}, seed=seed), latency=latency, jitter=jitter, seed=seed)
+    for profile in fake.rows("profiles_names").values():
+        fake.accounts[profile["email"]] = {
+            "id": profile["id"], "email": profile["email"], "password": "password",
+            "user_metadata": {"role": profile["role"], "full_name": profile["full_name"]},
+        }
+    return fake
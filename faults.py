@@ -0,0 +1,177 @@
+"""Fault-injection checks of the call policy, against the fake backend.
+
+Each check injects a fault into a seeded FakeSupabase (errors, stalls or a
+full outage) and verifies how resilience.py handles it: retries, timeouts,
+hedged reads, the circuit breaker serving stale cached data and bulk
+imports that never send a failed chunk twice. Exits
+non-zero if any check fails.
+
+    python faults.py
+    python faults.py --checks hedging,breaker
+"""
+import argparse
+import logging
+import statistics
+import sys
+import time
+
+import fake_supabase
+import importer
+import repository
+import resilience
+import tracing
+from utils import use_client
+
+CALLS = 100
+
+
+def timed(call):
+    started = time.perf_counter()
+    try:
+        call()
+        return time.perf_counter() - started, None
+    except Exception as e:
+        return time.perf_counter() - started, e
+
+
+def fresh_read():
+    # One uncached read of the first browse page
+    repository.cache.clear()
+    return repository.get_open_internships_page(20)
+
+
+def check_retries(fake):
+    fake.inject_faults(error_rate=0.2)
+    resilience.READ_ATTEMPTS = 1
+    single = sum(timed(fresh_read)[1] is None for _ in range(CALLS))
+    resilience.READ_ATTEMPTS = 3
+    retried = sum(timed(fresh_read)[1] is None for _ in range(CALLS))
+    return retried >= CALLS * 0.97, f"20% errors: {single}/{CALLS} reads succeed with one attempt, {retried}/{CALLS} with retries"
+
+
+def check_writes_not_retried(fake):
+    fake.inject_faults(error_rate=0.5)
+    # Keep the breaker out of it: every insert must reach the backend
+    resilience.get_breaker().failure_threshold = CALLS
+    sender, receiver = [p["id"] for p in list(fake.rows("profiles_names").values())[:2]]
+    fake.reset_stats()
+    failures = sum(timed(lambda: repository.send_message(sender, receiver, "fault check"))[1] is not None for _ in range(20))
+    round_trips = fake.stats()["round_trips"]
+    return round_trips == 20, f"50% errors: 20 inserts made {round_trips} round trips, {failures} failed"
+
+
+def check_timeout(fake):
+    fake.inject_faults(slow_rate=1.0, slow_seconds=2.0)
+    resilience.READ_TIMEOUT_SECONDS = 0.3
+    resilience.READ_ATTEMPTS = 1
+    seconds, error = timed(fresh_read)
+    return isinstance(error, resilience.CallTimeout) and seconds < 0.5, f"2s stall: read gave up after {seconds:.2f}s with {type(error).__name__}"
+
+
+def check_hedging(fake):
+    fake.inject_faults(slow_rate=0.1, slow_seconds=1.0)
+    resilience.HEDGE_AFTER_SECONDS = 0.05
+    results = {}
+    for view in ("browse_internships", "company_dashboard"):
+        with tracing.in_view(view):
+            timings = sorted(timed(fresh_read)[0] for _ in range(CALLS))
+        results[view] = (statistics.median(timings), timings[int(CALLS * 0.95) - 1])
+    hedged, plain = results["browse_internships"][1], results["company_dashboard"][1]
+    return hedged < plain / 2, (
+        f"10% of calls stall 1s: p95 {hedged * 1000:.0f}ms hedged (browse_internships) "
+        f"vs {plain * 1000:.0f}ms unhedged"
+    )
+
+
+def check_breaker(fake):
+    breaker = resilience.get_breaker()
+    breaker.reset_seconds = 0.5
+    repository.cache.clear()
+    repository.cache.ttl = 0
+    try:
+        cached = repository.get_open_internships_page(20)
+    finally:
+        repository.cache.ttl = repository.CACHE_TTL_SECONDS
+
+    fake.inject_faults(down=True)
+    # Each read retries, so the breaker opens within a couple of reads; all
+    # of them are answered from the expired cache entry
+    served = [repository.get_open_internships_page(20) for _ in range(3)]
+    stale = all(page == cached for page in served)
+    opened = breaker.state == "open"
+    fake.reset_stats()
+    user_id = next(iter(fake.rows("profiles_names")))
+    seconds, error = timed(lambda: repository.get_unread_message_count(user_id))
+    fast_fail = isinstance(error, resilience.CircuitOpenError) and fake.stats()["round_trips"] == 0
+
+    fake.inject_faults()
+    time.sleep(breaker.reset_seconds)
+    recovered = timed(fresh_read)[1] is None and breaker.state == "closed"
+    ok = stale and opened and fast_fail and recovered
+    return ok, (
+        f"outage: stale page served {stale}, breaker opened {opened}, "
+        f"uncached read failed fast {fast_fail} ({seconds * 1000:.1f}ms), closed after recovery {recovered}"
+    )
+
+
+def check_import(fake):
+    # 501 rows: the last chunk is partial, and progress reads the upload's
+    # position after it, as the Post Internship page does
+    company_id = next(p["id"] for p in fake.rows("profiles_names").values() if p["role"] == "company")
+    upload = importer.sample_csv(501)
+    positions = []
+    report = importer.import_internships(company_id, upload, on_progress=lambda *_: positions.append(upload.tell()))
+    complete = report["inserted"] == 501 and len(positions) == 2 and not upload.closed
+
+    # A chunk that fails in transit is reported, not inserted again row by row
+    fake.inject_faults(error_rate=1.0)
+    before = len(fake.rows("internships"))
+    fake.reset_stats()
+    failed = importer.import_internships(company_id, importer.sample_csv(501))
+    round_trips = fake.stats()["round_trips"]
+    added = len(fake.rows("internships")) - before
+    ok = complete and round_trips == 2 and failed["failed"] == 501 and added == 0
+    return ok, (
+        f"501 rows: {report['inserted']} inserted, upload open {not upload.closed}; "
+        f"all chunks failing: {round_trips} round trips, {failed['failed']} reported failed"
+    )
+
+
+CHECKS = {
+    "retries": check_retries,
+    "writes": check_writes_not_retried,
+    "timeout": check_timeout,
+    "hedging": check_hedging,
+    "breaker": check_breaker,
+    "import": check_import,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checks", help="comma-separated check names (default: all)")
+    parser.add_argument("--latency-ms", type=float, default=10, help="simulated round-trip latency")
+    args = parser.parse_args()
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+    # Expected failures are the point here
+    logging.getLogger("resilience").setLevel(logging.ERROR)
+    logging.getLogger("tracing").setLevel(logging.ERROR)
+
+    fake = fake_supabase.seeded("small", latency=args.latency_ms / 1000)
+    defaults = {name: getattr(resilience, name) for name in ("READ_ATTEMPTS", "READ_TIMEOUT_SECONDS", "HEDGE_AFTER_SECONDS")}
+    failed = False
+    for name in args.checks.split(",") if args.checks else CHECKS:
+        for setting, value in defaults.items():
+            setattr(resilience, setting, value)
+        resilience.get_breaker().reset()
+        resilience.get_breaker().failure_threshold = resilience.BREAKER_FAILURE_THRESHOLD
+        with use_client(fake):
+            ok, detail = CHECKS[name](fake)
+        fake.inject_faults()
+        failed = failed or not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name:8} {detail}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+import csv
+import io
+import time
+
+from postgrest.exceptions import APIError
+
+import repository
+import resilience
+
+IMPORT_CHUNK_SIZE = 500
+# Errors beyond this many are counted but not listed
+MAX_REPORTED_ERRORS = 1000
+
+# The fields the Post Internship form requires, besides the company name
+REQUIRED_FIELDS = ("title", "role", "description")
+IMPORT_COLUMNS = ("title", "role", "description", "location", "duration", "stipend", "skills_required", "status")
+COLUMN_ALIASES = {"skills": "skills_required"}
+INTERNSHIP_STATUSES = ("open", "closed")
+
+TEMPLATE_CSV = (
+    "title,role,description,location,duration,stipend,skills_required,status\n"
+    'Frontend Intern,Frontend Developer,Build UI components with the web team.,Remote,3 months,$1000/month,"ReactJS, TypeScript",open\n'
+)
+
+
+def missing_fields(values) -> list:
+    """Required fields left empty, shared by the form and the CSV import."""
+    return [field for field in REQUIRED_FIELDS if not (values.get(field) or "").strip()]
+
+
+def parse_skills(text) -> list:
+    return [s.strip() for s in (text or "").split(",") if s.strip()]
+
+
+def _column(header):
+    name = (header or "").strip().lower().replace(" ", "_")
+    return COLUMN_ALIASES.get(name, name)
+
+
+def parse_internships(file):
+    """Yield ``(line, internship, errors)`` for each row of a CSV upload.
+
+    The file is read one row at a time; ``line`` is the row's line number
+    in the file, counting the header as line 1. The file is left open.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        yield from _parse_rows(csv.reader(text))
+    finally:
+        # Otherwise the wrapper closes the upload when it is collected
+        text.detach()
+
+
+def _parse_rows(reader):
+    header = next(reader, None)
+    if header is None:
+        raise ValueError("The file is empty.")
+    columns = [_column(h) for h in header]
+    missing = [field for field in REQUIRED_FIELDS if field not in columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+    for values in reader:
+        if not any(v.strip() for v in values):
+            continue
+        row = {column: value.strip() for column, value in zip(columns, values) if column in IMPORT_COLUMNS}
+        errors = [f"{field} is required" for field in missing_fields(row)]
+        status = (row.get("status") or "open").lower()
+        if status not in INTERNSHIP_STATUSES:
+            errors.append(f"status must be one of {', '.join(INTERNSHIP_STATUSES)}")
+        if len(values) > len(columns):
+            errors.append("more values than columns")
+        internship = {
+            "title": row.get("title"),
+            "role": row.get("role"),
+            "description": row.get("description"),
+            "location": row.get("location") or "",
+            "duration": row.get("duration") or "",
+            "stipend": row.get("stipend") or "",
+            "skills_required": parse_skills(row.get("skills_required")),
+            "status": status,
+        }
+        yield reader.line_num, internship, errors
+
+
+def sample_csv(rows, invalid_every=0):
+    """An in-memory CSV upload of ``rows`` postings, for benchmarks and checks.
+
+    With ``invalid_every`` set, every n-th row is missing its role.
+    """
+    buffer = io.BytesIO()
+    text = io.TextIOWrapper(buffer, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(IMPORT_COLUMNS)
+    for n in range(rows):
+        invalid = invalid_every and n % invalid_every == invalid_every - 1
+        writer.writerow([
+            f"Intern #{n}", "" if invalid else "Developer", f"Posting number {n}.",
+            "Remote", "3 months", "$1000/month", "Python, SQL", "open",
+        ])
+    text.flush()
+    text.detach()
+    buffer.seek(0)
+    return buffer
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_internships(company_id, file, chunk_size=IMPORT_CHUNK_SIZE, on_progress=None) -> dict:
+    """Validate and insert every internship in a CSV upload.
+
+    Valid rows are inserted ``chunk_size`` at a time, one request per
+    chunk. Invalid rows are reported and skipped; a chunk the database
+    rejects is retried row by row so only the bad rows are lost. A chunk
+    that times out or fails in transit may have been inserted, so it is
+    reported as failed rather than sent again.
+    ``on_progress(rows_read, inserted)`` is called after each chunk.
+    """
+    report = {"rows": 0, "inserted": 0, "failed": 0, "errors": [], "chunks": 0, "seconds": 0.0}
+
+    def fail(line, message):
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": line, "error": message})
+
+    def valid_rows():
+        for line, internship, errors in parse_internships(file):
+            report["rows"] += 1
+            if errors:
+                fail(line, "; ".join(errors))
+            else:
+                yield line, internship
+
+    started = time.perf_counter()
+    try:
+        for chunk in _chunks(valid_rows(), chunk_size):
+            report["chunks"] += 1
+            try:
+                repository.insert_internships(company_id, [internship for _, internship in chunk])
+                report["inserted"] += len(chunk)
+            except Exception as e:
+                if isinstance(e, APIError) and not resilience.is_unavailable(e):
+                    for line, internship in chunk:
+                        try:
+                            repository.insert_internships(company_id, [internship])
+                            report["inserted"] += 1
+                        except Exception as row_error:
+                            fail(line, str(row_error))
+                else:
+                    # Writes are never retried: the chunk may be in the database already
+                    for line, _ in chunk:
+                        fail(line, f"not confirmed, check before importing again: {e}")
+            if on_progress:
+                on_progress(report["rows"], report["inserted"])
+    finally:
+        report["seconds"] = time.perf_counter() - started
+        if report["inserted"]:
+            repository.invalidate_company_internships(company_id)
+    return report
+
+
+if __name__ == "__main__":
+    # Import throughput: python importer.py [rows] [chunk size] [latency ms]
+    import logging
+    import sys
+
+    import fake_supabase
+    from utils import use_client
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else IMPORT_CHUNK_SIZE
+    latency = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.02
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+
+    # Every 100th row misses its role
+    buffer = sample_csv(rows, invalid_every=100)
+    fake = fake_supabase.seeded("small", latency=latency)
+    company_id = next(p["id"] for p in fake.rows("profiles_names").values() if p["role"] == "company")
+    fake.reset_stats()
+    with use_client(fake):
+        report = import_internships(company_id, buffer, chunk_size)
+    print(
+        f"{report['rows']} rows, {report['inserted']} inserted, {report['failed']} rejected "
+        f"in {report['seconds']:.2f}s ({report['rows'] / report['seconds']:.0f} rows/s), "
+        f"{fake.stats()['round_trips']} round trips at {latency * 1000:g} ms"
+    )
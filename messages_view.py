@@ -0,0 +1,162 @@
+import streamlit as st
+import repository
+import tracing
+from utils import get_session_profile
+from datetime import datetime, timedelta
+
+INBOX_PAGE_SIZE = 20
+CONVERSATION_PAGE_SIZE = 30
+# How often the open conversation checks for new messages
+POLL_SECONDS = 10
+# New messages are fetched from slightly before the newest one held, since a
+# message stamped earlier can commit later; duplicates are dropped by id
+SINCE_OVERLAP_SECONDS = 5
+
+def unread_count(user):
+    try:
+        return repository.get_unread_message_count(user.id)
+    except Exception as e:
+        st.sidebar.error(f"Error fetching unread messages: {e}")
+        return 0
+
+def menu_label(option, unread):
+    return f"{option} ({unread})" if option == "Messages" and unread else option
+
+@tracing.view
+def messages(user):
+    st.header("Messages")
+
+    cursors = st.session_state.setdefault("inbox_cursors", [None])
+    try:
+        page = repository.get_inbox_page(INBOX_PAGE_SIZE, after=cursors[-1])
+    except Exception as e:
+        st.error(f"Error fetching conversations: {e}")
+        page = {"rows": [], "next_cursor": None}
+
+    selected = st.session_state.get("message_partner")
+    if selected and selected[0] != user.id:
+        selected = None
+
+    col_threads, col_conversation = st.columns([1, 2], gap="large")
+    with col_threads:
+        new_conversation(user)
+
+        if not page["rows"]:
+            st.info("No conversations yet.")
+        for thread in page["rows"]:
+            name = thread['partner_name'] or "Unknown"
+            label = f"{name} ({thread['unread']} new)" if thread['unread'] else name
+            is_open = selected is not None and selected[1] == thread['partner_id']
+            if st.button(label, key=f"thread_{thread['partner_id']}", type="primary" if is_open else "secondary", width="stretch"):
+                st.session_state["message_partner"] = (user.id, thread['partner_id'], name)
+                st.rerun()
+            preview = thread['last_message_preview'] or ""
+            st.caption(f"{'You: ' if thread['last_sender_id'] == user.id else ''}{preview}")
+
+        col_prev, col_page, col_next = st.columns([1, 1, 1])
+        with col_prev:
+            if st.button("Previous", disabled=len(cursors) == 1, key="inbox_prev"):
+                cursors.pop()
+                st.rerun()
+        with col_page:
+            st.caption(f"Page {len(cursors)}")
+        with col_next:
+            if st.button("Next", disabled=page["next_cursor"] is None, key="inbox_next"):
+                cursors.append(page["next_cursor"])
+                st.rerun()
+
+    with col_conversation:
+        if selected is None:
+            st.info("Select a conversation to read it.")
+        else:
+            conversation(user, selected[1], selected[2])
+
+def new_conversation(user):
+    # Contacts are only loaded when asked for
+    if not st.toggle("New conversation", key="new_conversation"):
+        return
+    role = get_session_profile().get("role") or user.user_metadata.get("role")
+    try:
+        contacts = repository.get_message_contacts(user.id, role)
+    except Exception as e:
+        st.error(f"Error fetching contacts: {e}")
+        return
+    if not contacts:
+        st.info("You can message companies you applied to." if role == "student" else "You can message your applicants.")
+        return
+    partner_id = st.selectbox("To", list(contacts.keys()), format_func=lambda p: contacts[p], key="new_conversation_partner")
+    if st.button("Open Conversation"):
+        st.session_state["message_partner"] = (user.id, partner_id, contacts[partner_id])
+        st.session_state["new_conversation"] = False
+        st.rerun()
+
+def load_conversation(user, partner_id):
+    """The conversation held in the session, topped up with new messages."""
+    conversations = st.session_state.setdefault("conversations", {})
+    state = conversations.get((user.id, partner_id))
+    if state is None or not state["messages"]:
+        page = repository.get_conversation_page(user.id, partner_id, CONVERSATION_PAGE_SIZE)
+        state = conversations[(user.id, partner_id)] = {"messages": page["rows"], "older_cursor": page["older_cursor"]}
+        return state
+
+    since = datetime.fromisoformat(state["messages"][-1]['created_at']) - timedelta(seconds=SINCE_OVERLAP_SECONDS)
+    known = {m['id'] for m in state["messages"]}
+    arrived = [m for m in repository.get_new_messages(user.id, partner_id, since.isoformat()) if m['id'] not in known]
+    if arrived:
+        state["messages"] = sorted(state["messages"] + arrived, key=lambda m: (datetime.fromisoformat(m['created_at']), m['id']))
+    return state
+
+@st.fragment(run_every=POLL_SECONDS)
+@tracing.view
+def conversation(user, partner_id, partner_name):
+    # Runs as a fragment so polling for new messages only reruns this panel
+    st.subheader(partner_name)
+    try:
+        state = load_conversation(user, partner_id)
+    except Exception as e:
+        st.error(f"Error fetching messages: {e}")
+        return
+
+    # Everything the partner sent is marked read in one update
+    if any(m['receiver_id'] == user.id and not m['read'] for m in state["messages"]):
+        try:
+            marked = repository.mark_thread_read(user.id, partner_id)
+            for m in state["messages"]:
+                if m['receiver_id'] == user.id:
+                    m['read'] = True
+            if marked:
+                # Refresh the unread badge and the inbox counts
+                st.rerun()
+        except Exception as e:
+            st.error(f"Error marking messages read: {e}")
+
+    if state["older_cursor"] and st.button("Load older messages", key=f"older_{partner_id}"):
+        try:
+            page = repository.get_conversation_page(user.id, partner_id, CONVERSATION_PAGE_SIZE, before=state["older_cursor"])
+            state["messages"] = page["rows"] + state["messages"]
+            state["older_cursor"] = page["older_cursor"]
+            st.rerun(scope="fragment")
+        except Exception as e:
+            st.error(f"Error fetching older messages: {e}")
+
+    with st.container(height=450):
+        if not state["messages"]:
+            st.caption("No messages yet. Say hello!")
+        for message in state["messages"]:
+            mine = message['sender_id'] == user.id
+            with st.chat_message("user" if mine else partner_name):
+                st.write(message['content'])
+                st.caption(datetime.fromisoformat(message['created_at']).strftime('%Y-%m-%d %H:%M'))
+
+    with st.form(f"send_{partner_id}", clear_on_submit=True):
+        content = st.text_area("Message", height=80, label_visibility="collapsed", placeholder="Write a message...")
+        if st.form_submit_button("Send", type="primary"):
+            if content.strip():
+                try:
+                    state["messages"].append(repository.send_message(user.id, partner_id, content.strip()))
+                    # Full rerun so the inbox shows this as the latest message
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Error sending message: {e}")
+            else:
+                st.warning("Message cannot be empty.")
@@ -0,0 +1,418 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+import streamlit as st
+
+import repository
+import tracing
+from sync import SyncedTable
+from utils import create_session_client, use_client
+
+# Read from the mirror ("mirror") or query Supabase on every rerun ("direct")
+DEFAULT_MODE = "direct"
+DEFAULT_MIRROR_PATH = "catalog_mirror.db"
+MIRROR_SYNC_SECONDS = 15
+FACET_LIMIT = 20
+
+MIRROR_COLUMNS = "id, company_id, title, role, description, location, stipend, duration, skills_required, created_at, status"
+# Every profile is synced, not only companies: role is not fixed, so it
+# cannot scope the pull (see SyncedTable)
+COMPANY_COLUMNS = "id, role, company_name"
+
+SCHEMA = """
+create table if not exists internships (
+  id text primary key,
+  company_id text,
+  title text,
+  role text,
+  description text,
+  location text,
+  stipend text,
+  duration text,
+  skills_required text not null default '[]',
+  skills_text text not null default '',
+  created_at text not null
+);
+create index if not exists internships_created_idx on internships (created_at desc, id desc);
+create index if not exists internships_location_idx on internships (location);
+create index if not exists internships_duration_idx on internships (duration);
+create index if not exists internships_company_idx on internships (company_id);
+
+create table if not exists companies (
+  id text primary key,
+  company_name text
+);
+
+create table if not exists sync_state (
+  key text primary key,
+  value text
+);
+
+-- Same fields as the search_vector in schema.sql. No stemming: the porter
+-- tokenizer would also stem prefix queries ('analy' -> 'anali')
+create virtual table if not exists internships_fts using fts5(
+  title, role, skills_text, description,
+  content='internships', content_rowid='rowid', tokenize='unicode61'
+);
+
+create trigger if not exists internships_fts_insert after insert on internships begin
+  insert into internships_fts (rowid, title, role, skills_text, description)
+  values (new.rowid, new.title, new.role, new.skills_text, new.description);
+end;
+create trigger if not exists internships_fts_delete after delete on internships begin
+  insert into internships_fts (internships_fts, rowid, title, role, skills_text, description)
+  values ('delete', old.rowid, old.title, old.role, old.skills_text, old.description);
+end;
+create trigger if not exists internships_fts_update after update on internships begin
+  insert into internships_fts (internships_fts, rowid, title, role, skills_text, description)
+  values ('delete', old.rowid, old.title, old.role, old.skills_text, old.description);
+  insert into internships_fts (rowid, title, role, skills_text, description)
+  values (new.rowid, new.title, new.role, new.skills_text, new.description);
+end;
+"""
+
+CARD_SELECT = """
+select i.id, i.company_id, i.title, i.role, i.location, i.stipend, i.duration,
+  i.skills_required, i.created_at, c.company_name
+from internships i left join companies c on c.id = i.company_id
+"""
+
+
+def get_mode() -> str:
+    return st.secrets.get("catalog", {}).get("mode", DEFAULT_MODE)
+
+
+def _sortable_timestamp(value):
+    # PostgREST trims trailing zeros from fractional seconds; a fixed width
+    # keeps the ISO strings in the same order as the timestamps
+    return datetime.fromisoformat(value).astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _fts_query(search_text):
+    # Every word must match as a prefix, like the ':*' tsquery upstream,
+    # which also keeps only letters and digits
+    words = re.findall(r"[^\W_]+", (search_text or "").lower())
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def _card(row) -> dict:
+    card = dict(row)
+    card["skills_required"] = json.loads(card["skills_required"])
+    # Match the shape of the embedded select used by the browse cards
+    card["profiles_names"] = {"company_name": card.pop("company_name")}
+    return card
+
+
+class CatalogMirror:
+    """Local SQLite copy of the open internship catalog.
+
+    A background thread applies delta pulls (see SyncedTable) of postings
+    and company profiles to the database; browse reads are then served
+    locally with FTS5 search, so a slow upstream only delays freshness.
+    Only open postings are kept. The method names and return shapes match
+    the repository functions they stand in for.
+    """
+
+    def __init__(self, path, sync_seconds=MIRROR_SYNC_SECONDS):
+        self.path = path
+        self.sync_seconds = sync_seconds
+        self.table = SyncedTable("internships", MIRROR_COLUMNS, {})
+        self.profiles = SyncedTable("profiles_names", COMPANY_COLUMNS, {})
+        self.synced_at = None
+        self.last_error = None
+        # Bumped whenever the mirrored rows change; keys the cached facet counts
+        self.version = 0
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+        with self._write_lock:
+            db = self._connect()
+            db.execute("pragma journal_mode = wal")
+            db.executescript(SCHEMA)
+            state = dict(db.execute("select key, value from sync_state").fetchall())
+        # Resume from the cursors of the last run instead of a full reload
+        self.table.cursor = state.get("cursor")
+        self.profiles.cursor = state.get("profiles_cursor")
+        self.synced_at = float(state["synced_at"]) if "synced_at" in state else None
+
+    def _connect(self):
+        # One connection per thread; WAL lets readers run during a sync
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.row_factory = sqlite3.Row
+            self._local.db = db
+        return db
+
+    @property
+    def ready(self) -> bool:
+        return self.synced_at is not None
+
+    # --- Sync ---
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="catalog-mirror", daemon=True)
+            self._thread.start()
+
+    def request_sync(self):
+        """Wake the sync thread now instead of at the next interval."""
+        self._wake.set()
+
+    def _run(self):
+        # The sync thread has no browser session; it reads public rows anonymously
+        with use_client(create_session_client()), tracing.in_view("catalog_mirror"):
+            while True:
+                try:
+                    self.sync()
+                except Exception as e:
+                    # Keep serving the last good copy
+                    self.last_error = e
+                self._wake.wait(self.sync_seconds)
+                self._wake.clear()
+
+    def sync(self):
+        changed, deleted = self.table.fetch_changes()
+        profiles, _ = self.profiles.fetch_changes()
+        self.apply(changed, deleted, profiles)
+        self.last_error = None
+
+    def apply(self, changed, deleted, profiles=()):
+        db = self._connect()
+        with self._write_lock, db:
+            for row in changed:
+                if row['status'] != 'open':
+                    db.execute("delete from internships where id = ?", (row['id'],))
+                    continue
+                skills = row['skills_required'] or []
+                db.execute(
+                    """
+                    insert into internships (id, company_id, title, role, description, location, stipend,
+                      duration, skills_required, skills_text, created_at)
+                    values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    on conflict (id) do update set
+                      company_id = excluded.company_id, title = excluded.title, role = excluded.role,
+                      description = excluded.description, location = excluded.location,
+                      stipend = excluded.stipend, duration = excluded.duration,
+                      skills_required = excluded.skills_required, skills_text = excluded.skills_text,
+                      created_at = excluded.created_at
+                    """,
+                    (row['id'], row['company_id'], row['title'], row['role'], row['description'], row['location'],
+                     row['stipend'], row['duration'], json.dumps(skills), " ".join(skills).lower(),
+                     _sortable_timestamp(row['created_at'])),
+                )
+            db.executemany("delete from internships where id = ?", [(row_id,) for row_id in deleted])
+            for profile in profiles:
+                if profile['role'] == 'company':
+                    db.execute(
+                        "insert into companies (id, company_name) values (?, ?) "
+                        "on conflict (id) do update set company_name = excluded.company_name",
+                        (profile['id'], profile['company_name']),
+                    )
+                else:
+                    db.execute("delete from companies where id = ?", (profile['id'],))
+            if changed or deleted or profiles:
+                self.version += 1
+            self.synced_at = time.time()
+            db.executemany(
+                "insert or replace into sync_state (key, value) values (?, ?)",
+                [("cursor", self.table.cursor), ("profiles_cursor", self.profiles.cursor), ("synced_at", str(self.synced_at))],
+            )
+
+    # --- Reads ---
+
+    def get_open_internships_page(self, page_size=20, after=None) -> dict:
+        query = CARD_SELECT
+        params = []
+        if after:
+            created_at, last_id = after
+            query += " where i.created_at < ? or (i.created_at = ? and i.id < ?)"
+            params = [created_at, created_at, last_id]
+        query += " order by i.created_at desc, i.id desc limit ?"
+        rows = self._connect().execute(query, params + [page_size + 1]).fetchall()
+        page = [_card(row) for row in rows[:page_size]]
+        next_cursor = (page[-1]['created_at'], page[-1]['id']) if len(rows) > page_size else None
+        return {"rows": page, "next_cursor": next_cursor}
+
+    def search_internships(self, filters, page_size=20, after=None) -> dict:
+        offset = after or 0
+        query = CARD_SELECT
+        order = "i.created_at desc, i.id desc"
+        where, params = self._where(filters)
+        match = _fts_query(filters.get("search_text"))
+        if match:
+            query += " join internships_fts on internships_fts.rowid = i.rowid and internships_fts match ?"
+            params = [match] + params
+            order = "bm25(internships_fts), " + order
+        if where:
+            query += " where " + " and ".join(where)
+        query += f" order by {order} limit ? offset ?"
+        rows = self._connect().execute(query, params + [page_size + 1, offset]).fetchall()
+        page = [_card(row) for row in rows[:page_size]]
+        next_cursor = offset + page_size if len(rows) > page_size else None
+        return {"rows": page, "next_cursor": next_cursor}
+
+    def get_internship_facets(self, filters) -> dict:
+        """Facet counts with the semantics of the internship_facets RPC.
+
+        Counting scans every matching row, so results are cached until the
+        mirrored data changes.
+        """
+        params = tuple(filters.get(name) or None for name in repository.BROWSE_FILTERS)
+        return repository.cached_query("mirror_facets", None, (self.version,) + params, lambda: self._count_facets(filters))
+
+    def _count_facets(self, filters):
+        facets = {}
+        for name, value, label, source in (
+            ("location", "i.location", "i.location", "internships i"),
+            ("skill", "s.value", "s.value", "internships i, json_each(i.skills_required) s"),
+            ("duration", "i.duration", "i.duration", "internships i"),
+            ("company", "i.company_id", "coalesce(c.company_name, 'Unknown Company')",
+             "internships i left join companies c on c.id = i.company_id"),
+        ):
+            # Each facet is counted under every active filter except its own
+            where, params = self._where(filters, skip=f"facet_{name}")
+            match = _fts_query(filters.get("search_text"))
+            if match:
+                where.append("i.rowid in (select rowid from internships_fts where internships_fts match ?)")
+                params.append(match)
+            where.append(f"{value} is not null")
+            rows = self._connect().execute(
+                f"select {value} as value, {label} as label, count(*) as count from {source} "
+                f"where {' and '.join(where)} group by 1, 2 order by 3 desc, 2 limit ?",
+                params + [FACET_LIMIT],
+            ).fetchall()
+            facets[name] = [dict(row) for row in rows]
+        return facets
+
+    def get_internship_description(self, internship_id) -> str:
+        row = self._connect().execute("select description from internships where id = ?", (internship_id,)).fetchone()
+        return (row and row['description']) or ""
+
+    def _where(self, filters, skip=None):
+        where, params = [], []
+        if filters.get("location_text"):
+            where.append("i.location like ?")
+            params.append(f"%{filters['location_text']}%")
+        if filters.get("skill_text"):
+            where.append("i.skills_text like ?")
+            params.append(f"%{filters['skill_text'].lower()}%")
+        for name, column in (("facet_location", "i.location"), ("facet_duration", "i.duration"), ("facet_company", "i.company_id")):
+            if filters.get(name) and name != skip:
+                where.append(f"{column} = ?")
+                params.append(filters[name])
+        if filters.get("facet_skill") and skip != "facet_skill":
+            where.append("exists (select 1 from json_each(i.skills_required) where value = ?)")
+            params.append(filters["facet_skill"])
+        return where, params
+
+    def stats(self) -> dict:
+        rows = self._connect().execute("select count(*) from internships").fetchone()[0]
+        return {
+            "mode": "mirror",
+            "rows": rows,
+            "synced_at": self.synced_at,
+            "pulls": self.table.pulls,
+            "total_bytes": self.table.total_bytes,
+            "last_error": str(self.last_error) if self.last_error else None,
+        }
+
+
+@st.cache_resource
+def get_mirror() -> CatalogMirror:
+    settings = st.secrets.get("catalog", {})
+    mirror = CatalogMirror(
+        settings.get("mirror_path", DEFAULT_MIRROR_PATH),
+        settings.get("sync_seconds", MIRROR_SYNC_SECONDS),
+    )
+    mirror.start()
+    return mirror
+
+
+def get_catalog_source():
+    """Where browse reads the catalog from: the mirror or the repository.
+
+    Falls back to direct reads until the mirror has completed a first sync.
+    """
+    if get_mode() == "mirror":
+        mirror = get_mirror()
+        if mirror.ready:
+            return mirror
+    return repository
+
+
+def request_sync():
+    """Tell the mirror (if in use) that the catalog just changed."""
+    if get_mode() == "mirror":
+        get_mirror().request_sync()
+
+
+# Browse reads timed by the benchmarks, against the mirror or the repository
+BENCH_READS = {
+    "latest page": lambda source: source.get_open_internships_page(20),
+    "search 'data analy'": lambda source: source.search_internships({"search_text": "data analy"}, 20),
+    "location 'Bangalor'": lambda source: source.search_internships({"location_text": "Bangalor"}, 20),
+    "facets": lambda source: source.get_internship_facets({"search_text": "intern", "facet_location": "Remote"}),
+}
+
+
+if __name__ == "__main__":
+    # Mirror read latency: python mirror.py [postings] [--direct]
+    # --direct also times the same reads against the configured Supabase project.
+    import random
+    import sys
+    import tempfile
+    import uuid
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    postings = int(args[0]) if args else 100_000
+    random.seed(7)
+
+    titles = ["Frontend Intern", "Backend Intern", "Data Analyst Intern", "ML Research Intern", "Design Intern"]
+    locations = ["Remote", "New York", "Bangalore", "London", "Berlin", "San Francisco"]
+    skills = [["ReactJS", "TypeScript"], ["Python", "Django"], ["SQL", "Tableau"], ["Python", "PyTorch"], ["Figma", "UX Research"]]
+    companies = [{"id": str(uuid.uuid4()), "role": "company", "company_name": f"Company {n}"} for n in range(50)]
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "company_id": random.choice(companies)["id"],
+            "title": f"{titles[n % 5]} #{n}",
+            "role": titles[n % 5].replace(" Intern", ""),
+            "description": f"Work with the team on real projects. Posting number {n}.",
+            "location": locations[n % 6],
+            "stipend": f"${500 + n % 10 * 100}/month",
+            "duration": f"{1 + n % 6} months",
+            "skills_required": skills[n % 5],
+            "created_at": datetime.fromtimestamp(1_700_000_000 + n, timezone.utc).isoformat(),
+            "status": "open",
+        }
+        for n in range(postings)
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        mirror = CatalogMirror(f"{directory}/mirror.db")
+        started = time.perf_counter()
+        mirror.apply(rows, [], companies)
+        print(f"Loaded {postings} postings in {time.perf_counter() - started:.2f}s")
+
+        sources = {"mirror": mirror}
+        if "--direct" in sys.argv:
+            sources["direct"] = repository
+
+        for name, read in BENCH_READS.items():
+            for source_name, source in sources.items():
+                timings = []
+                for _ in range(20):
+                    # Time the query itself, not the repository's result cache
+                    repository.cache.clear()
+                    started = time.perf_counter()
+                    read(source)
+                    timings.append(time.perf_counter() - started)
+                timings.sort()
+                print(f"{name:22} {source_name:7} p50 {timings[10] * 1000:7.1f} ms, p95 {timings[18] * 1000:7.1f} ms")
@@ -0,0 +1,260 @@
+import math
+import re
+import threading
+import time
+
+import numpy as np
+import streamlit as st
+from scipy import sparse
+
+from repository import INTERNSHIP_CARD_COLUMNS, get_company_names
+from sync import SyncedTable
+
+# Spellings that mean the same skill, keyed by their normalized form
+SKILL_ALIASES = {
+    "reactjs": "react",
+    "react.js": "react",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "nodejs": "node",
+    "node.js": "node",
+    "js": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "python3": "python",
+    "golang": "go",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "ml": "machine learning",
+    "ai": "artificial intelligence",
+    "ux": "ux design",
+    "ui": "ui design",
+    "c sharp": "c#",
+    "cpp": "c++",
+    "k8s": "kubernetes",
+}
+
+# Rows added or changed since the last rebuild are scored from a small side
+# matrix; the main matrix is rebuilt once either limit is crossed, or when
+# there is no main matrix yet.
+MAX_PENDING_ROWS = 2000
+MAX_DEAD_FRACTION = 0.25
+CATALOG_REFRESH_SECONDS = 30
+
+
+def normalize_skill(skill) -> str:
+    skill = re.sub(r"\s+", " ", (skill or "").strip().lower())
+    return SKILL_ALIASES.get(skill, skill)
+
+
+def normalize_skills(skills) -> list:
+    return sorted({normalize_skill(s) for s in skills or [] if normalize_skill(s)})
+
+
+class SkillIndex:
+    """Scores internships against a student's skills in one sparse product.
+
+    Keeps an inverted index (skill -> internship IDs) for document
+    frequencies and a CSR matrix of internships x skills whose rows are
+    length-normalized. A student's skill vector is IDF-weighted, so a match
+    on a rare skill counts for more than a match on a common one.
+
+    Updates are incremental: changed rows are tombstoned in the main matrix
+    and scored from a pending side matrix until the next compaction.
+    """
+
+    def __init__(self):
+        self.vocabulary = {}
+        self.postings = {}
+        self.skills_of = {}
+        self._lock = threading.Lock()
+        self._ids = []
+        self._row_of = {}
+        self._matrix = sparse.csr_matrix((0, 0))
+        self._alive = np.zeros(0, dtype=bool)
+        self._pending = {}
+        # The side matrix, built once per batch of pending rows
+        self._pending_matrix = None
+
+    def __len__(self):
+        return len(self.skills_of)
+
+    def upsert(self, internship_id, skills):
+        with self._lock:
+            self._remove(internship_id)
+            normalized = normalize_skills(skills)
+            if not normalized:
+                return
+            self.skills_of[internship_id] = normalized
+            for skill in normalized:
+                self.vocabulary.setdefault(skill, len(self.vocabulary))
+                self.postings.setdefault(skill, set()).add(internship_id)
+            self._pending[internship_id] = normalized
+            self._pending_matrix = None
+
+    def remove(self, internship_id):
+        with self._lock:
+            self._remove(internship_id)
+
+    def recommend(self, skills, limit=20) -> list:
+        """Return (internship_id, score, matched_skills) for the best matches."""
+        with self._lock:
+            if self._needs_rebuild():
+                self._rebuild()
+            query = self._query_vector(skills)
+            if not query.any():
+                return []
+
+            scores = np.asarray(self._matrix @ query[:self._matrix.shape[1]]).ravel()
+            scores[~self._alive] = 0
+            ids = list(self._ids)
+            if self._pending:
+                pending_ids = list(self._pending)
+                if self._pending_matrix is None:
+                    self._pending_matrix = self._build_matrix(pending_ids)
+                # The vocabulary may have grown since the side matrix was built
+                pending_scores = np.asarray(self._pending_matrix @ query[:self._pending_matrix.shape[1]]).ravel()
+                scores = np.concatenate([scores, pending_scores])
+                ids.extend(pending_ids)
+
+            limit = min(limit, int((scores > 0).sum()))
+            if limit == 0:
+                return []
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            top = top[np.argsort(-scores[top])]
+
+            wanted = set(normalize_skills(skills))
+            return [
+                (ids[i], float(scores[i]), [s for s in self.skills_of[ids[i]] if s in wanted])
+                for i in top
+            ]
+
+    def _remove(self, internship_id):
+        for skill in self.skills_of.pop(internship_id, []):
+            postings = self.postings.get(skill)
+            if postings is not None:
+                postings.discard(internship_id)
+        if self._pending.pop(internship_id, None) is not None:
+            self._pending_matrix = None
+        row = self._row_of.get(internship_id)
+        if row is not None:
+            self._alive[row] = False
+
+    def compact(self):
+        """Fold pending rows into the main matrix now."""
+        with self._lock:
+            if self._pending:
+                self._rebuild()
+
+    def _needs_rebuild(self):
+        if self._pending and not self._alive.any():
+            return True
+        dead = len(self._alive) - int(self._alive.sum())
+        return len(self._pending) > MAX_PENDING_ROWS or (len(self._alive) and dead / len(self._alive) > MAX_DEAD_FRACTION)
+
+    def _rebuild(self):
+        self._ids = list(self.skills_of)
+        self._row_of = {internship_id: row for row, internship_id in enumerate(self._ids)}
+        self._matrix = self._build_matrix(self._ids)
+        self._alive = np.ones(len(self._ids), dtype=bool)
+        self._pending = {}
+        self._pending_matrix = None
+
+    def _build_matrix(self, internship_ids):
+        indptr = [0]
+        indices = []
+        data = []
+        for internship_id in internship_ids:
+            skills = self.skills_of[internship_id]
+            weight = 1 / math.sqrt(len(skills))
+            indices.extend(self.vocabulary[s] for s in skills)
+            data.extend([weight] * len(skills))
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+            shape=(len(internship_ids), len(self.vocabulary)),
+        )
+
+    def _query_vector(self, skills):
+        query = np.zeros(len(self.vocabulary), dtype=np.float32)
+        total = max(len(self.skills_of), 1)
+        for skill in normalize_skills(skills):
+            column = self.vocabulary.get(skill)
+            if column is not None and self.postings[skill]:
+                query[column] = math.log(1 + total / len(self.postings[skill]))
+        return query
+
+
+class InternshipCatalog:
+    """Process-wide open-internship catalog feeding the skill index."""
+
+    def __init__(self, columns):
+        self.table = SyncedTable("internships", columns, {})
+        self.index = SkillIndex()
+        self._lock = threading.Lock()
+        self._refreshed_at = 0
+
+    def refresh(self, force=False):
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < CATALOG_REFRESH_SECONDS:
+                return
+            self.table.pull()
+            for row in self.table.last_changed:
+                if row['status'] == 'open':
+                    self.index.upsert(row['id'], row['skills_required'])
+                else:
+                    self.index.remove(row['id'])
+            for internship_id in self.table.last_deleted:
+                self.index.remove(internship_id)
+            if not self._refreshed_at:
+                # The first load is the whole catalog; index it in one matrix
+                self.index.compact()
+            self._refreshed_at = time.monotonic()
+
+    def recommend(self, skills, limit=20) -> list:
+        self.refresh()
+        matches = self.index.recommend(skills, limit)
+        rows = [self.table.rows[internship_id] for internship_id, _, _ in matches]
+        # Company renames don't touch internship rows, so names are read fresh
+        names = get_company_names(row['company_id'] for row in rows)
+        return [
+            {**row, "profiles_names": {"company_name": names.get(row['company_id'])}, "match_score": score, "matched_skills": matched}
+            for row, (_, score, matched) in zip(rows, matches)
+        ]
+
+
+@st.cache_resource
+def get_catalog() -> InternshipCatalog:
+    return InternshipCatalog(f"{INTERNSHIP_CARD_COLUMNS}, status")
+
+
+if __name__ == "__main__":
+    # Ranking latency at catalog scale: python recommend.py [postings]
+    import random
+    import sys
+
+    postings = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    pool = [f"skill {i}" for i in range(2000)] + list(SKILL_ALIASES)
+    random.seed(7)
+
+    index = SkillIndex()
+    started = time.perf_counter()
+    for i in range(postings):
+        index.upsert(i, random.sample(pool, random.randint(2, 8)))
+    index.recommend(["python"])
+    print(f"Indexed {postings} postings in {time.perf_counter() - started:.2f}s")
+
+    student = ["Python", "ReactJS", "SQL", "skill 12", "skill 99"]
+    timings = []
+    for _ in range(50):
+        started = time.perf_counter()
+        index.recommend(student, limit=20)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(f"Ranking: p50 {timings[25] * 1000:.1f} ms, p95 {timings[47] * 1000:.1f} ms")
+
+    for i in range(500):
+        index.upsert(postings + i, random.sample(pool, 4))
+    started = time.perf_counter()
+    index.recommend(student, limit=20)
+    print(f"Ranking with 500 pending updates: {(time.perf_counter() - started) * 1000:.1f} ms")
@@ -0,0 +1,548 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import resilience
+import tracing
+from utils import get_supabase, supabase, use_client
+
+CACHE_MAX_ENTRIES = 1024
+CACHE_TTL_SECONDS = 60
+# How long past expiry a cached read may still be served while Supabase is down
+STALE_MAX_SECONDS = 600
+FANOUT_MAX_WORKERS = 8
+MESSAGE_CONTACTS_LIMIT = 500
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a fixed TTL.
+
+    Keys are tuples of (query name, user id, *params) so that every entry
+    belonging to one query for one user can be invalidated together.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._groups = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return (found, value) for a key, counting the hit or miss.
+
+        Expired entries count as misses but are kept until evicted, so
+        get_stale can fall back on them.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def get_stale(self, key, max_age=STALE_MAX_SECONDS):
+        """Return (found, value) for a key up to ``max_age`` past its expiry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] + max_age < time.monotonic():
+                return False, None
+            self.stale_hits += 1
+            return True, entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._groups.setdefault(key[:2], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, name, user_id=None):
+        """Drop every entry cached for a query name and user id."""
+        with self._lock:
+            for key in list(self._groups.get((name, user_id), ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "stale_hits": self.stale_hits,
+                "entries": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        group = self._groups.get(key[:2])
+        if group is not None:
+            group.discard(key)
+            if not group:
+                del self._groups[key[:2]]
+
+
+cache = TTLCache()
+
+
+def cached_query(name, user_id, params, fetch):
+    key = (name, user_id) + tuple(params)
+    found, value = cache.get(key)
+    if found:
+        return value
+    try:
+        value = fetch()
+    except Exception as e:
+        # While upstream is unhealthy an outdated answer beats an error
+        if resilience.is_unavailable(e):
+            found, value = cache.get_stale(key)
+            if found:
+                return value
+        raise
+    cache.set(key, value)
+    return value
+
+
+def cache_stats() -> dict:
+    return cache.stats()
+
+
+_fanout_executor = ThreadPoolExecutor(max_workers=FANOUT_MAX_WORKERS, thread_name_prefix="repository-fanout")
+
+
+def fetch_concurrently(queries) -> tuple:
+    """Run independent reads in parallel and wait for all of them.
+
+    ``queries`` maps a name to a zero-argument callable. Returns
+    ``(results, errors)``: dicts keyed by the same names, so one failing
+    query does not hide the others.
+    """
+    # Worker threads have no Streamlit session, so hand them the caller's
+    # client and view name
+    client = get_supabase()
+    view = tracing.current_view()
+
+    def run(fetch):
+        with use_client(client), tracing.in_view(view):
+            return fetch()
+
+    futures = {name: _fanout_executor.submit(run, fetch) for name, fetch in queries.items()}
+    results, errors = {}, {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            errors[name] = e
+    return results, errors
+
+
+# --- Reads ---
+
+def get_profile(user_id) -> dict:
+    def fetch():
+        response = supabase.table("profiles_names").select("*").eq("id", user_id).single().execute()
+        return response.data or {}
+    return cached_query("profile", user_id, (), fetch)
+
+
+# Columns needed to render a browse card; the description is loaded lazily
+INTERNSHIP_CARD_COLUMNS = "id, company_id, title, role, location, stipend, duration, skills_required, created_at, profiles_names(company_name)"
+
+
+def get_open_internships_page(page_size=20, after=None) -> dict:
+    """Fetch one page of open internships, newest first.
+
+    Pagination is keyset based on (created_at, id): ``after`` is the
+    ``next_cursor`` returned with the previous page.
+    """
+    def fetch():
+        query = supabase.table("internships").select(INTERNSHIP_CARD_COLUMNS).eq("status", "open")
+        if after:
+            created_at, last_id = after
+            query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{last_id})')
+        # Fetch one extra row to know whether a next page exists
+        rows = query.order("created_at", desc=True).order("id", desc=True).limit(page_size + 1).execute().data
+        page = rows[:page_size]
+        next_cursor = (page[-1]['created_at'], page[-1]['id']) if len(rows) > page_size else None
+        return {"rows": page, "next_cursor": next_cursor}
+    return cached_query("open_internships", None, (page_size, after), fetch)
+
+
+# Filters understood by the search_internships and internship_facets RPCs
+BROWSE_FILTERS = ("search_text", "location_text", "skill_text", "facet_location", "facet_skill", "facet_duration", "facet_company")
+
+
+def search_internships(filters, page_size=20, after=None) -> dict:
+    """Relevance-ranked search through the ``search_internships`` RPC.
+
+    ``filters`` maps names from BROWSE_FILTERS to values. Results are
+    ordered by rank, so pages are addressed by offset; ``after`` is the
+    ``next_cursor`` returned with the previous page.
+    """
+    offset = after or 0
+    params = {name: filters.get(name) or None for name in BROWSE_FILTERS}
+
+    def fetch():
+        rows = supabase.rpc("search_internships", {
+            **params,
+            "page_size": page_size + 1,
+            "page_offset": offset
+        }).execute().data
+        for row in rows:
+            # Match the shape of the embedded select used by the browse cards
+            row["profiles_names"] = {"company_name": row.pop("company_name")}
+        page = rows[:page_size]
+        next_cursor = offset + page_size if len(rows) > page_size else None
+        return {"rows": page, "next_cursor": next_cursor}
+    return cached_query("open_internships", None, ("search",) + tuple(params.values()) + (page_size, offset), fetch)
+
+
+def get_internship_facets(filters) -> dict:
+    """Location, skill, duration and company counts under the active filters."""
+    params = {name: filters.get(name) or None for name in BROWSE_FILTERS}
+
+    def fetch():
+        return supabase.rpc("internship_facets", params).execute().data
+    return cached_query("open_internships", None, ("facets",) + tuple(params.values()), fetch)
+
+
+def get_company_names(company_ids) -> dict:
+    """Current name of each company, for rows copied before a rename."""
+    company_ids = tuple(sorted(set(company_ids)))
+    def fetch():
+        if not company_ids:
+            return {}
+        rows = supabase.table("profiles_names").select("id, company_name").in_("id", list(company_ids)).execute().data
+        return {row['id']: row['company_name'] for row in rows}
+    return cached_query("company_names", None, company_ids, fetch)
+
+
+def get_internship_summaries(internship_ids) -> dict:
+    """Current title and company of each internship, by ID.
+
+    Shaped like an embedded ``internships`` object, for synced rows that
+    only store the internship's ID.
+    """
+    internship_ids = tuple(sorted(set(internship_ids)))
+    def fetch():
+        if not internship_ids:
+            return {}
+        rows = supabase.table("internships").select(
+            "id, title, company_id, profiles_names(company_name)"
+        ).in_("id", list(internship_ids)).execute().data
+        return {row.pop('id'): row for row in rows}
+    return cached_query("internship_summaries", None, internship_ids, fetch)
+
+
+def get_internship_description(internship_id) -> str:
+    def fetch():
+        response = supabase.table("internships").select("description").eq("id", internship_id).single().execute()
+        return (response.data or {}).get("description") or ""
+    return cached_query("internship_description", None, (internship_id,), fetch)
+
+
+def get_applied_internship_ids(student_id) -> set:
+    def fetch():
+        response = supabase.table("applications").select("internship_id").eq("student_id", student_id).execute()
+        return {app['internship_id'] for app in response.data}
+    return cached_query("applied_ids", student_id, (), fetch)
+
+
+def get_accepted_interns(company_id) -> list:
+    """Lightweight (internship, student, name) rows for the company's accepted applicants."""
+    def fetch():
+        response = supabase.table("applications").select(
+            "internship_id, student_id, profiles_names(full_name), internships!inner(title)"
+        ).eq("internships.company_id", company_id).eq("status", "accepted").execute()
+        return response.data
+    return cached_query("accepted_interns", company_id, (), fetch)
+
+
+def get_company_internships(company_id) -> list:
+    def fetch():
+        response = supabase.table("internships").select("id, title, status").eq("company_id", company_id).order("created_at", desc=True).execute()
+        return response.data
+    return cached_query("company_internships", company_id, (), fetch)
+
+
+def get_application_counts(company_id, internship_id=None) -> dict:
+    """Number of applications per status, optionally for one internship."""
+    def fetch():
+        rows = supabase.rpc("company_application_counts", {"filter_internship_id": internship_id}).execute().data
+        return {row['status']: row['count'] for row in rows}
+    return cached_query("application_counts", company_id, (internship_id,), fetch)
+
+
+def get_company_applications_page(company_id, internship_id=None, status=None, page_size=20, after=None) -> dict:
+    """Fetch one page of a company's applications, newest first.
+
+    Pagination is keyset based on (applied_at, id). Only the columns shown in
+    the list are selected; applicant details are loaded with get_profile.
+    """
+    def fetch():
+        # Scope explicitly to the company instead of relying on RLS alone
+        query = supabase.table("applications").select(
+            "id, internship_id, student_id, status, applied_at, internships!inner(title, company_id), profiles_names(full_name)"
+        ).eq("internships.company_id", company_id)
+        if internship_id:
+            query = query.eq("internship_id", internship_id)
+        if status:
+            query = query.eq("status", status)
+        if after:
+            applied_at, last_id = after
+            query = query.or_(f'applied_at.lt."{applied_at}",and(applied_at.eq."{applied_at}",id.lt.{last_id})')
+        rows = query.order("applied_at", desc=True).order("id", desc=True).limit(page_size + 1).execute().data
+        page = rows[:page_size]
+        next_cursor = (page[-1]['applied_at'], page[-1]['id']) if len(rows) > page_size else None
+        return {"rows": page, "next_cursor": next_cursor}
+    return cached_query("company_applications", company_id, (internship_id, status, page_size, after), fetch)
+
+
+def get_company_stats(company_id) -> dict:
+    """Dashboard counts for the calling company from one RPC round trip."""
+    def fetch():
+        return supabase.rpc("company_dashboard_stats", {}).execute().data
+    return cached_query("company_stats", company_id, (), fetch)
+
+
+# Messages are read fresh: the inbox polls for new ones, and each poll is
+# a single indexed query
+
+def get_unread_message_count(user_id) -> int:
+    """Unread messages for the badge; served by the partial unread index."""
+    response = supabase.table("messages").select("id", count="exact", head=True).eq("receiver_id", user_id).eq("read", False).execute()
+    return response.count or 0
+
+
+def get_inbox_page(page_size=20, after=None) -> dict:
+    """One page of the caller's conversations, latest message first.
+
+    Pagination is keyset based on (last_message_at, partner_id); ``after``
+    is the ``next_cursor`` returned with the previous page.
+    """
+    after_at, after_partner = after or (None, None)
+    rows = supabase.rpc("inbox_threads", {
+        "page_size": page_size + 1,
+        "after_at": after_at,
+        "after_partner": after_partner
+    }).execute().data
+    page = rows[:page_size]
+    next_cursor = (page[-1]['last_message_at'], page[-1]['partner_id']) if len(rows) > page_size else None
+    return {"rows": page, "next_cursor": next_cursor}
+
+
+# Columns of a message bubble
+MESSAGE_COLUMNS = "id, sender_id, receiver_id, content, read, created_at"
+
+
+def _conversation(user_id, partner_id):
+    # Matches the (user_low, user_high) columns; UUIDs compare like their text
+    user_low, user_high = sorted([user_id, partner_id])
+    return supabase.table("messages").select(MESSAGE_COLUMNS).eq("user_low", user_low).eq("user_high", user_high)
+
+
+def get_conversation_page(user_id, partner_id, page_size=30, before=None) -> dict:
+    """One page of a conversation, returned oldest first.
+
+    Pages walk back in time, keyset based on (created_at, id): ``before``
+    is the ``older_cursor`` returned with the previous page.
+    """
+    query = _conversation(user_id, partner_id)
+    if before:
+        created_at, last_id = before
+        query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{last_id})')
+    rows = query.order("created_at", desc=True).order("id", desc=True).limit(page_size + 1).execute().data
+    page = rows[:page_size]
+    older_cursor = (page[-1]['created_at'], page[-1]['id']) if len(rows) > page_size else None
+    return {"rows": page[::-1], "older_cursor": older_cursor}
+
+
+def get_new_messages(user_id, partner_id, since) -> list:
+    """Messages of a conversation created after ``since``, oldest first."""
+    return _conversation(user_id, partner_id).gt("created_at", since).order("created_at").order("id").execute().data
+
+
+def get_message_contacts(user_id, role) -> dict:
+    """People the user can start a conversation with: partner id -> name.
+
+    Students can write to companies they applied to; companies to their
+    applicants.
+    """
+    def fetch():
+        if role == "company":
+            rows = supabase.table("applications").select(
+                "student_id, profiles_names(full_name), internships!inner(company_id)"
+            ).eq("internships.company_id", user_id).order("applied_at", desc=True).limit(MESSAGE_CONTACTS_LIMIT).execute().data
+            return {row['student_id']: row['profiles_names']['full_name'] for row in rows if row['profiles_names']}
+        rows = supabase.table("applications").select(
+            "internships(company_id, profiles_names(company_name))"
+        ).eq("student_id", user_id).order("applied_at", desc=True).limit(MESSAGE_CONTACTS_LIMIT).execute().data
+        return {
+            row['internships']['company_id']: (row['internships']['profiles_names'] or {}).get('company_name') or "Unknown Company"
+            for row in rows if row['internships']
+        }
+    return cached_query("message_contacts", user_id, (role,), fetch)
+
+
+# Exports read every row once, so their pages are not cached. They walk one
+# internship at a time, where (internship_id, applied_at/created_at, id)
+# indexes make each page a range scan.
+
+EXPORT_APPLICATION_COLUMNS = "id, status, applied_at, profiles_names(full_name, email, phone, location, skills, resume_url, portfolio_url)"
+EXPORT_TASK_COLUMNS = "id, title, status, due_date, submission_link, feedback, created_at, profiles_names(full_name, email)"
+
+
+def get_applications_export_page(internship_id, status=None, page_size=1000, after=None) -> dict:
+    """One page of an internship's applications with applicant details, newest first."""
+    query = supabase.table("applications").select(EXPORT_APPLICATION_COLUMNS).eq("internship_id", internship_id)
+    if status:
+        query = query.eq("status", status)
+    if after:
+        applied_at, last_id = after
+        query = query.or_(f'applied_at.lt."{applied_at}",and(applied_at.eq."{applied_at}",id.lt.{last_id})')
+    rows = query.order("applied_at", desc=True).order("id", desc=True).limit(page_size + 1).execute().data
+    page = rows[:page_size]
+    next_cursor = (page[-1]['applied_at'], page[-1]['id']) if len(rows) > page_size else None
+    return {"rows": page, "next_cursor": next_cursor}
+
+
+def get_tasks_export_page(internship_id, page_size=1000, after=None) -> dict:
+    """One page of an internship's tasks with intern names, newest first."""
+    query = supabase.table("tasks").select(EXPORT_TASK_COLUMNS).eq("internship_id", internship_id)
+    if after:
+        created_at, last_id = after
+        query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{last_id})')
+    rows = query.order("created_at", desc=True).order("id", desc=True).limit(page_size + 1).execute().data
+    page = rows[:page_size]
+    next_cursor = (page[-1]['created_at'], page[-1]['id']) if len(rows) > page_size else None
+    return {"rows": page, "next_cursor": next_cursor}
+
+
+def invalidate_open_internships():
+    """Drop every cached browse and search page."""
+    cache.invalidate("open_internships")
+
+
+# --- Writes (each invalidates exactly the cache entries it makes stale) ---
+
+def update_profile(user_id, updates):
+    supabase.table("profiles_names").update(updates).eq("id", user_id).execute()
+    cache.invalidate("profile", user_id)
+    if "company_name" in updates:
+        # Company names are embedded in internship listings and applications
+        cache.invalidate("open_internships")
+        cache.invalidate("company_names")
+        cache.invalidate("internship_summaries")
+
+
+def apply_for_internship(student_id, internship):
+    supabase.table("applications").insert({
+        "internship_id": internship['id'],
+        "student_id": student_id,
+        "status": "pending"
+    }).execute()
+    cache.invalidate("applied_ids", student_id)
+    if internship.get('company_id'):
+        cache.invalidate("company_applications", internship['company_id'])
+        cache.invalidate("application_counts", internship['company_id'])
+        cache.invalidate("company_stats", internship['company_id'])
+
+
+def update_application_status(company_id, application, status):
+    supabase.table("applications").update({"status": status}).eq("id", application['id']).execute()
+    cache.invalidate("company_applications", company_id)
+    cache.invalidate("accepted_interns", company_id)
+    cache.invalidate("application_counts", company_id)
+    cache.invalidate("company_stats", company_id)
+
+
+def bulk_update_application_status(company_id, application_ids, status) -> list:
+    """Set the status of many applications in one request; returns updated rows."""
+    rows = supabase.table("applications").update({"status": status}).in_("id", list(application_ids)).execute().data
+    invalidate_company_applications(company_id)
+    return rows
+
+
+def reject_pending_applications(company_id, internship_id) -> list:
+    """Reject every application still pending for an internship."""
+    rows = supabase.table("applications").update({"status": "rejected"}).eq("internship_id", internship_id).eq("status", "pending").execute().data
+    invalidate_company_applications(company_id)
+    return rows
+
+
+def invalidate_company_applications(company_id):
+    """Drop every cached application read for a company."""
+    cache.invalidate("company_applications", company_id)
+    cache.invalidate("accepted_interns", company_id)
+    cache.invalidate("application_counts", company_id)
+    cache.invalidate("company_stats", company_id)
+
+
+def post_internship(company_id, internship):
+    supabase.table("internships").insert({**internship, "company_id": company_id}).execute()
+    invalidate_company_internships(company_id)
+
+
+def insert_internships(company_id, internships):
+    """Insert many internships in one request without returning them.
+
+    Callers invalidate once with invalidate_company_internships when done.
+    """
+    supabase.table("internships").insert(
+        [{**internship, "company_id": company_id} for internship in internships], returning="minimal"
+    ).execute()
+
+
+def invalidate_company_internships(company_id):
+    """Drop cached reads that list a company's internships."""
+    cache.invalidate("open_internships")
+    cache.invalidate("company_internships", company_id)
+    cache.invalidate("company_stats", company_id)
+
+
+def assign_tasks(company_id, tasks) -> list:
+    """Insert one task row per intern in a single bulk request."""
+    rows = supabase.table("tasks").insert(tasks).execute().data
+    cache.invalidate("company_stats", company_id)
+    return rows
+
+
+def submit_task(student_id, task, submission_link):
+    supabase.table("tasks").update({
+        "submission_link": submission_link,
+        "status": "submitted"
+    }).eq("id", task['id']).execute()
+    cache.invalidate("company_stats", task['internships']['company_id'])
+
+
+def send_message(sender_id, receiver_id, content) -> dict:
+    rows = supabase.table("messages").insert({
+        "sender_id": sender_id,
+        "receiver_id": receiver_id,
+        "content": content
+    }).execute().data
+    return rows[0]
+
+
+def mark_thread_read(user_id, partner_id) -> int:
+    """Mark everything a partner sent the user as read in one update."""
+    rows = supabase.table("messages").update({"read": True}).eq("receiver_id", user_id).eq("sender_id", partner_id).eq("read", False).execute().data
+    return len(rows)
@@ -0,0 +1,258 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import httpx
+import streamlit as st
+from postgrest.exceptions import APIError
+
+import tracing
+
+logger = logging.getLogger(__name__)
+
+READ_TIMEOUT_SECONDS = 5
+# Writes are not retried, so they get the whole HTTP timeout and then some
+WRITE_TIMEOUT_SECONDS = 15
+AUTH_TIMEOUT_SECONDS = 15
+READ_ATTEMPTS = 3
+BACKOFF_BASE_SECONDS = 0.1
+BACKOFF_MAX_SECONDS = 1.0
+# Reads from these views send a duplicate request when the first one has
+# not answered after HEDGE_AFTER_SECONDS; the first response wins
+HEDGED_VIEWS = ("browse_internships", "internship_card")
+HEDGE_AFTER_SECONDS = 0.3
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30
+CALL_MAX_WORKERS = 32
+
+# RPC functions that only read (all "stable" in schema.sql), safe to retry
+READ_ONLY_RPCS = (
+    "search_internships", "internship_facets", "company_application_counts", "company_dashboard_stats",
+    "inbox_threads", "sync_watermark", "table_changes", "pull_changes",
+)
+READ_OPERATIONS = ("select", "count")
+# PostgREST and Postgres error codes worth retrying: gateway errors, rate
+# limiting, connection pool trouble, statement timeouts and serialization
+# failures
+TRANSIENT_API_CODES = ("429", "502", "503", "504", "PGRST000", "PGRST001", "PGRST003", "57014", "53300", "40001", "40P01")
+
+
+class CallTimeout(TimeoutError):
+    pass
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+
+def _settings():
+    try:
+        return st.secrets.get("resilience", {})
+    except FileNotFoundError:
+        # No secrets file: CLI scripts and benchmarks run with the defaults
+        return {}
+
+
+def is_transient(error) -> bool:
+    """Whether a failed call may succeed if tried again."""
+    if isinstance(error, (CallTimeout, httpx.TimeoutException, httpx.TransportError)):
+        return True
+    return isinstance(error, APIError) and str(error.code) in TRANSIENT_API_CODES
+
+
+def is_unavailable(error) -> bool:
+    """Whether a call failed because upstream is unhealthy, not because of the call."""
+    return isinstance(error, CircuitOpenError) or is_transient(error)
+
+
+class CircuitBreaker:
+    """Stops calling upstream after repeated transient failures.
+
+    After ``failure_threshold`` transient failures in a row the breaker
+    opens and calls fail fast with CircuitOpenError. Once ``reset_seconds``
+    have passed a single trial call is let through: success closes the
+    breaker, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+            self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half-open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def is_open(self) -> bool:
+        return self.state != "closed"
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            retry_in = self.reset_seconds - (time.monotonic() - self.opened_at)
+            if retry_in > 0 or self.trial_running:
+                raise CircuitOpenError(f"Supabase is not responding; retrying in {max(retry_in, 0):.0f}s")
+            self.trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.warning("Circuit breaker closed: Supabase is responding again")
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self, error):
+        if not is_transient(error):
+            # The call was wrong, not upstream; it still counts as a response
+            self.record_success()
+            return
+        with self._lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    self.times_opened += 1
+                    logger.warning("Circuit breaker opened after %d failures: %s", self.failures, error)
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        state = self.state
+        with self._lock:
+            return {"state": state, "consecutive_failures": self.failures, "times_opened": self.times_opened}
+
+
+@st.cache_resource
+def get_breaker() -> CircuitBreaker:
+    settings = _settings()
+    return CircuitBreaker(
+        settings.get("breaker_failure_threshold", BREAKER_FAILURE_THRESHOLD),
+        settings.get("breaker_reset_seconds", BREAKER_RESET_SECONDS),
+    )
+
+
+_call_executor = ThreadPoolExecutor(max_workers=CALL_MAX_WORKERS, thread_name_prefix="resilience-call")
+
+
+def _submit(call):
+    # Attempts run on pool threads so a hung request can be abandoned; the
+    # view name goes with them for tracing
+    view = tracing.current_view()
+
+    def run():
+        with tracing.in_view(view):
+            return call()
+    return _call_executor.submit(run)
+
+
+def _attempt(call, timeout, hedge_after=None):
+    """One attempt, with a hedged duplicate if ``hedge_after`` passes first."""
+    deadline = time.monotonic() + timeout
+    futures = [_submit(call)]
+    if hedge_after is not None and hedge_after < timeout:
+        done, _ = wait(futures, timeout=hedge_after)
+        if not done:
+            futures.append(_submit(call))
+    error = None
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    if error is not None and not pending:
+        raise error
+    raise CallTimeout(f"No response within {timeout:g}s")
+
+
+def _backoff(attempt):
+    # Full jitter: a random wait up to an exponentially growing cap
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def run(kind, target, operation, call):
+    """Run ``call`` (one request) under the policy for its operation.
+
+    Reads get a short timeout, jittered retries on transient errors and,
+    from HEDGED_VIEWS, a hedged duplicate. Writes and auth calls get one
+    attempt with a longer timeout. Every call goes through the circuit
+    breaker.
+    """
+    settings = _settings()
+    is_read = operation in READ_OPERATIONS or (kind == "rpc" and target in READ_ONLY_RPCS)
+    if is_read:
+        timeout = settings.get("read_timeout_seconds", READ_TIMEOUT_SECONDS)
+        attempts = settings.get("read_attempts", READ_ATTEMPTS)
+        hedged = tracing.current_view() in settings.get("hedged_views", HEDGED_VIEWS)
+        hedge_after = settings.get("hedge_after_seconds", HEDGE_AFTER_SECONDS) if hedged else None
+    else:
+        timeout = AUTH_TIMEOUT_SECONDS if kind == "auth" else settings.get("write_timeout_seconds", WRITE_TIMEOUT_SECONDS)
+        attempts, hedge_after = 1, None
+
+    breaker = get_breaker()
+    for attempt in range(attempts):
+        breaker.before_call()
+        try:
+            result = _attempt(call, timeout, hedge_after)
+        except Exception as e:
+            breaker.record_failure(e)
+            if attempt + 1 == attempts or not is_transient(e):
+                raise
+            logger.info("Retrying %s %s %s after %s", operation, kind, target, e)
+            time.sleep(_backoff(attempt))
+        else:
+            breaker.record_success()
+            return result
+
+
+class ResilientQuery:
+    """Wraps a traced request builder so ``execute()`` runs under the call policy."""
+
+    def __init__(self, query):
+        self._query = query
+
+    def __getattr__(self, name):
+        attr = getattr(self._query, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return ResilientQuery(attr(*args, **kwargs))
+        return call
+
+    def execute(self):
+        kind, target, operation = self._query.describe()
+        return run(kind, target, operation, self._query.execute)
+
+
+class ResilientAuth:
+    """Wraps the traced auth client so each call gets a timeout and the breaker."""
+
+    def __init__(self, auth):
+        self._auth = auth
+
+    def __getattr__(self, name):
+        attr = getattr(self._auth, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def call(*args, **kwargs):
+            return run("auth", name, "call", lambda: attr(*args, **kwargs))
+        return call
@@ -1,7 +1,11 @@
 -- Enable UUID extension
 create extension if not exists "uuid-ossp";
 
--- DROP EVERYTHING to ensure a clean slate
+-- DROP EVERYTHING to ensure a clean slate; indexes, policies and table
+-- triggers go with their tables
+drop trigger if exists on_auth_user_created on auth.users;
+drop table if exists public.deleted_rows;
+drop table if exists public.message_threads;
 drop table if exists public.messages;
 drop table if exists public.tasks;
 drop table if exists public.applications;
@@ -9,6 +13,22 @@ drop table if exists public.internships;
 drop table if exists public.profiles_names;
 drop table if exists public.profiles;
 
+drop function if exists public.company_internship_ids;
+drop function if exists public.handle_new_user;
+drop function if exists public.internships_search_refresh;
+drop function if exists public.match_open_internships;
+drop function if exists public.search_internships;
+drop function if exists public.internship_facets;
+drop function if exists public.company_dashboard_stats;
+drop function if exists public.company_application_counts;
+drop function if exists public.touch_updated_at;
+drop function if exists public.record_deleted_row;
+drop function if exists public.sync_watermark;
+drop function if exists public.table_changes;
+drop function if exists public.pull_changes;
+drop function if exists public.record_message_thread;
+drop function if exists public.inbox_threads;
+
 -- 1. Profiles Table (Extends Supabase Auth)
 create table public.profiles_names (
   id uuid references auth.users on delete cascade not null primary key,
@@ -39,11 +59,11 @@ create policy "Public profiles are viewable by everyone."
 
 create policy "Users can insert their own profile."
   on profiles_names for insert
-  with check ( auth.uid() = id );
+  with check ( (select auth.uid()) = id );
 
 create policy "Users can update own profile."
   on profiles_names for update
-  using ( auth.uid() = id );
+  using ( (select auth.uid()) = id );
 
 -- 2. Internships Table
 create table public.internships (
@@ -68,11 +88,23 @@ create policy "Internships are viewable by everyone."
 
 create policy "Companies can insert internships."
   on internships for insert
-  with check ( auth.uid() = company_id );
+  with check ( (select auth.uid()) = company_id );
 
 create policy "Companies can update their internships."
   on internships for update
-  using ( auth.uid() = company_id );
+  using ( (select auth.uid()) = company_id );
+
+-- Internship IDs owned by the calling company. Security definer so RLS
+-- policies on applications/tasks can use it without re-checking the
+-- internships policies; called as "in (select ...)" it runs once per
+-- statement instead of once per row.
+create or replace function public.company_internship_ids()
+returns setof uuid
+language sql stable security definer
+set search_path = public
+as $$
+  select id from public.internships where company_id = auth.uid();
+$$;
 
 -- 3. Applications Table
 create table public.applications (
@@ -90,30 +122,22 @@ alter table public.applications enable row level security;
 
 create policy "Students can see their own applications."
   on applications for select
-  using ( auth.uid() = student_id );
+  using ( (select auth.uid()) = student_id );
 
 create policy "Companies can see applications for their internships."
   on applications for select
   using ( 
-    exists (
-      select 1 from internships 
-      where internships.id = applications.internship_id 
-      and internships.company_id = auth.uid()
-    )
+    internship_id in (select public.company_internship_ids())
   );
 
 create policy "Students can insert applications."
   on applications for insert
-  with check ( auth.uid() = student_id );
+  with check ( (select auth.uid()) = student_id );
 
 create policy "Companies can update application status."
   on applications for update
   using ( 
-    exists (
-      select 1 from internships 
-      where internships.id = applications.internship_id 
-      and internships.company_id = auth.uid()
-    )
+    internship_id in (select public.company_internship_ids())
   );
 
 -- 4. Tasks Table
@@ -135,33 +159,21 @@ alter table public.tasks enable row level security;
 create policy "Users can view tasks related to them"
   on tasks for select
   using ( 
-    auth.uid() = student_id OR 
-    exists (
-      select 1 from internships 
-      where internships.id = tasks.internship_id 
-      and internships.company_id = auth.uid()
-    )
+    (select auth.uid()) = student_id or
+    internship_id in (select public.company_internship_ids())
   );
 
 create policy "Companies can insert tasks"
   on tasks for insert
   with check (
-    exists (
-      select 1 from internships 
-      where internships.id = tasks.internship_id 
-      and internships.company_id = auth.uid()
-    )
+    internship_id in (select public.company_internship_ids())
   );
 
 create policy "Users can update tasks (Students submit, Companies review)"
   on tasks for update
   using (
-    auth.uid() = student_id OR 
-    exists (
-      select 1 from internships 
-      where internships.id = tasks.internship_id 
-      and internships.company_id = auth.uid()
-    )
+    (select auth.uid()) = student_id or
+    internship_id in (select public.company_internship_ids())
   );
 
 -- 5. Messages Table (Simple implementation)
@@ -178,11 +190,11 @@ alter table public.messages enable row level security;
 
 create policy "Users can view their own messages"
   on messages for select
-  using ( auth.uid() = sender_id or auth.uid() = receiver_id );
+  using ( (select auth.uid()) = sender_id or (select auth.uid()) = receiver_id );
 
 create policy "Users can send messages"
   on messages for insert
-  with check ( auth.uid() = sender_id );
+  with check ( (select auth.uid()) = sender_id );
 
 -- Trigger to handle new user creation
 create or replace function public.handle_new_user() 
@@ -199,3 +211,561 @@ drop trigger if exists on_auth_user_created on auth.users;
 create trigger on_auth_user_created
   after insert on auth.users
   for each row execute procedure public.handle_new_user();
+
+-- 6. Internship Search (full-text + trigram)
+create extension if not exists pg_trgm;
+
+alter table public.internships add column if not exists skills_text text;
+alter table public.internships add column if not exists search_vector tsvector;
+
+-- Keep the search columns in sync with the posting
+create or replace function public.internships_search_refresh()
+returns trigger as $$
+begin
+  new.skills_text := lower(coalesce(array_to_string(new.skills_required, ' '), ''));
+  new.search_vector :=
+    setweight(to_tsvector('english', coalesce(new.title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(new.role, '')), 'A') ||
+    setweight(to_tsvector('english', new.skills_text), 'B') ||
+    setweight(to_tsvector('english', coalesce(new.description, '')), 'C');
+  return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists internships_search_refresh on public.internships;
+create trigger internships_search_refresh
+  before insert or update of title, role, description, skills_required on public.internships
+  for each row execute procedure public.internships_search_refresh();
+
+-- Backfill rows created before the trigger existed
+update public.internships set title = title where search_vector is null;
+
+create index if not exists internships_search_vector_idx on public.internships using gin (search_vector);
+create index if not exists internships_location_trgm_idx on public.internships using gin (location gin_trgm_ops);
+create index if not exists internships_skills_trgm_idx on public.internships using gin (skills_text gin_trgm_ops);
+
+-- Open internships matching the free-text filters, with a relevance rank.
+-- Every word of search_text is matched as a prefix ("react" matches
+-- "reactjs"); location and skill use trigram similarity so partial and
+-- misspelled terms still match.
+create or replace function public.match_open_internships(
+  search_text text default null,
+  location_text text default null,
+  skill_text text default null
+)
+returns table (id uuid, rank real)
+language sql stable
+as $$
+  with q as (
+    select (
+      select to_tsquery('english', string_agg(quote_literal(word) || ':*', ' & '))
+      -- Letters and digits only: tsquery operators, quotes and backslashes
+      -- in user input would otherwise be a syntax error
+      from regexp_split_to_table(lower(regexp_replace(search_text, '[^[:alnum:]]+', ' ', 'g')), '\s+') as word
+      where word <> ''
+    ) as query
+  )
+  select
+    i.id,
+    (
+      coalesce(ts_rank(i.search_vector, q.query), 0)
+      + case when coalesce(location_text, '') = '' then 0 else similarity(i.location, location_text) end
+      + case when coalesce(skill_text, '') = '' then 0 else word_similarity(lower(skill_text), i.skills_text) end
+    )::real as rank
+  from public.internships i
+  cross join q
+  where i.status = 'open'
+    and (q.query is null or numnode(q.query) = 0 or i.search_vector @@ q.query)
+    and (
+      coalesce(location_text, '') = ''
+      or i.location ilike '%' || location_text || '%'
+      or i.location % location_text
+    )
+    and (
+      coalesce(skill_text, '') = ''
+      or i.skills_text like '%' || lower(skill_text) || '%'
+      or lower(skill_text) <% i.skills_text
+    );
+$$;
+
+-- Ranked search page: free-text filters plus exact facet selections
+drop function if exists public.search_internships(text, text, text, int, int);
+create or replace function public.search_internships(
+  search_text text default null,
+  location_text text default null,
+  skill_text text default null,
+  facet_location text default null,
+  facet_skill text default null,
+  facet_duration text default null,
+  facet_company uuid default null,
+  page_size int default 20,
+  page_offset int default 0
+)
+returns table (
+  id uuid,
+  company_id uuid,
+  title text,
+  role text,
+  location text,
+  stipend text,
+  duration text,
+  skills_required text[],
+  created_at timestamp with time zone,
+  company_name text,
+  rank real
+)
+language sql stable
+as $$
+  select
+    i.id, i.company_id, i.title, i.role, i.location, i.stipend, i.duration,
+    i.skills_required, i.created_at, p.company_name, m.rank
+  from public.match_open_internships(search_text, location_text, skill_text) m
+  join public.internships i on i.id = m.id
+  left join public.profiles_names p on p.id = i.company_id
+  where (facet_location is null or i.location = facet_location)
+    and (facet_skill is null or facet_skill = any(i.skills_required))
+    and (facet_duration is null or i.duration = facet_duration)
+    and (facet_company is null or i.company_id = facet_company)
+  order by m.rank desc, i.created_at desc, i.id desc
+  limit page_size offset page_offset;
+$$;
+
+-- Facet counts for the browse filters in one round trip. Each facet is
+-- counted under every active filter except its own, so picking a location
+-- still shows how many postings the other locations have.
+create or replace function public.internship_facets(
+  search_text text default null,
+  location_text text default null,
+  skill_text text default null,
+  facet_location text default null,
+  facet_skill text default null,
+  facet_duration text default null,
+  facet_company uuid default null,
+  facet_limit int default 20
+)
+returns json
+language sql stable
+as $$
+  with matches as (
+    select i.location, i.duration, i.company_id, i.skills_required
+    from public.match_open_internships(search_text, location_text, skill_text) m
+    join public.internships i on i.id = m.id
+  )
+  select json_build_object(
+    'location', (
+      select coalesce(json_agg(f), '[]'::json) from (
+        select location as value, location as label, count(*) as count
+        from matches
+        where location is not null
+          and (facet_skill is null or facet_skill = any(skills_required))
+          and (facet_duration is null or duration = facet_duration)
+          and (facet_company is null or company_id = facet_company)
+        group by location order by count(*) desc, location limit facet_limit
+      ) f
+    ),
+    'skill', (
+      select coalesce(json_agg(f), '[]'::json) from (
+        select skill as value, skill as label, count(*) as count
+        from matches, unnest(skills_required) as skill
+        where (facet_location is null or location = facet_location)
+          and (facet_duration is null or duration = facet_duration)
+          and (facet_company is null or company_id = facet_company)
+        group by skill order by count(*) desc, skill limit facet_limit
+      ) f
+    ),
+    'duration', (
+      select coalesce(json_agg(f), '[]'::json) from (
+        select duration as value, duration as label, count(*) as count
+        from matches
+        where duration is not null
+          and (facet_location is null or location = facet_location)
+          and (facet_skill is null or facet_skill = any(skills_required))
+          and (facet_company is null or company_id = facet_company)
+        group by duration order by count(*) desc, duration limit facet_limit
+      ) f
+    ),
+    'company', (
+      select coalesce(json_agg(f), '[]'::json) from (
+        select m.company_id as value, coalesce(p.company_name, 'Unknown Company') as label, count(*) as count
+        from matches m
+        left join public.profiles_names p on p.id = m.company_id
+        where (facet_location is null or m.location = facet_location)
+          and (facet_skill is null or facet_skill = any(m.skills_required))
+          and (facet_duration is null or m.duration = facet_duration)
+        group by m.company_id, p.company_name order by count(*) desc, label limit facet_limit
+      ) f
+    )
+  );
+$$;
+
+-- 7. Company Dashboard Stats (one round trip)
+create or replace function public.company_dashboard_stats()
+returns json
+language sql stable
+as $$
+  with mine as (
+    select id, title, status from public.internships where company_id = (select auth.uid())
+  ),
+  app_counts as (
+    select a.internship_id,
+      count(*) filter (where a.status = 'pending') as pending,
+      count(*) filter (where a.status = 'accepted') as accepted
+    from public.applications a
+    join mine on mine.id = a.internship_id
+    group by a.internship_id
+  ),
+  task_counts as (
+    select t.internship_id, count(*) as active_tasks
+    from public.tasks t
+    join mine on mine.id = t.internship_id
+    where t.status = 'pending'
+    group by t.internship_id
+  ),
+  per_internship as (
+    select mine.id, mine.title, mine.status,
+      coalesce(app_counts.pending, 0) as pending_applications,
+      coalesce(app_counts.accepted, 0) as accepted_applications,
+      coalesce(task_counts.active_tasks, 0) as active_tasks
+    from mine
+    left join app_counts on app_counts.internship_id = mine.id
+    left join task_counts on task_counts.internship_id = mine.id
+  )
+  select json_build_object(
+    'internships', (select count(*) from per_internship),
+    'open_internships', (select count(*) from per_internship where status = 'open'),
+    'pending_applications', (select coalesce(sum(pending_applications), 0) from per_internship),
+    'accepted_applications', (select coalesce(sum(accepted_applications), 0) from per_internship),
+    'active_tasks', (select coalesce(sum(active_tasks), 0) from per_internship),
+    'per_internship', (select coalesce(json_agg(per_internship order by title), '[]'::json) from per_internship)
+  );
+$$;
+
+-- 8. Performance Indexes
+-- Browse: open internships, newest first (keyset on created_at, id)
+create index if not exists internships_open_created_idx
+  on public.internships (created_at desc, id desc) where status = 'open';
+create index if not exists internships_company_created_idx
+  on public.internships (company_id, created_at desc);
+
+-- unique(internship_id, student_id) already covers lookups by internship
+create index if not exists applications_student_idx
+  on public.applications (student_id, applied_at desc);
+create index if not exists applications_internship_status_idx
+  on public.applications (internship_id, status);
+create index if not exists applications_pending_idx
+  on public.applications (internship_id, applied_at desc) where status = 'pending';
+
+create index if not exists tasks_student_idx
+  on public.tasks (student_id, created_at desc);
+create index if not exists tasks_internship_status_idx
+  on public.tasks (internship_id, status);
+
+create index if not exists messages_receiver_idx
+  on public.messages (receiver_id, created_at desc);
+create index if not exists messages_sender_idx
+  on public.messages (sender_id, created_at desc);
+
+-- 9. Application Counts per Status (Manage Applications tabs)
+create or replace function public.company_application_counts(filter_internship_id uuid default null)
+returns table (status text, count bigint)
+language sql stable
+as $$
+  select a.status, count(*)
+  from public.applications a
+  where a.internship_id in (select public.company_internship_ids())
+    and (filter_internship_id is null or a.internship_id = filter_internship_id)
+  group by a.status;
+$$;
+
+-- 10. Change Tracking (updated_at cursors and delete tombstones)
+alter table public.internships add column if not exists updated_at timestamp with time zone default timezone('utc'::text, now()) not null;
+alter table public.applications add column if not exists updated_at timestamp with time zone default timezone('utc'::text, now()) not null;
+alter table public.tasks add column if not exists updated_at timestamp with time zone default timezone('utc'::text, now()) not null;
+-- Profiles are tracked for company names only; they have no tombstones
+alter table public.profiles_names add column if not exists updated_at timestamp with time zone default timezone('utc'::text, now()) not null;
+
+create or replace function public.touch_updated_at()
+returns trigger as $$
+begin
+  new.updated_at := clock_timestamp();
+  return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists internships_touch_updated_at on public.internships;
+create trigger internships_touch_updated_at
+  before update on public.internships
+  for each row execute procedure public.touch_updated_at();
+
+drop trigger if exists applications_touch_updated_at on public.applications;
+create trigger applications_touch_updated_at
+  before update on public.applications
+  for each row execute procedure public.touch_updated_at();
+
+drop trigger if exists tasks_touch_updated_at on public.tasks;
+create trigger tasks_touch_updated_at
+  before update on public.tasks
+  for each row execute procedure public.touch_updated_at();
+
+drop trigger if exists profiles_names_touch_updated_at on public.profiles_names;
+create trigger profiles_names_touch_updated_at
+  before update on public.profiles_names
+  for each row execute procedure public.touch_updated_at();
+
+create index if not exists internships_updated_idx on public.internships (updated_at);
+create index if not exists applications_updated_idx on public.applications (updated_at);
+create index if not exists tasks_updated_idx on public.tasks (updated_at);
+create index if not exists profiles_names_updated_idx on public.profiles_names (updated_at);
+
+-- Deleted rows, so incremental readers can drop them from their local copy
+create table if not exists public.deleted_rows (
+  table_name text not null,
+  row_id uuid not null,
+  student_id uuid,
+  company_id uuid,
+  deleted_at timestamp with time zone default timezone('utc'::text, now()) not null,
+  primary key (table_name, row_id)
+);
+
+alter table public.deleted_rows enable row level security;
+
+drop policy if exists "Users can see tombstones of rows they could see" on deleted_rows;
+create policy "Users can see tombstones of rows they could see"
+  on deleted_rows for select
+  using (
+    table_name = 'internships' or
+    (select auth.uid()) = student_id or
+    (select auth.uid()) = company_id
+  );
+
+create index if not exists deleted_rows_deleted_idx on public.deleted_rows (table_name, deleted_at);
+
+create or replace function public.record_deleted_row()
+returns trigger as $$
+declare
+  owner_student uuid;
+  owner_company uuid;
+begin
+  if tg_table_name = 'internships' then
+    owner_company := old.company_id;
+  else
+    owner_student := old.student_id;
+    select company_id into owner_company from public.internships where id = old.internship_id;
+  end if;
+  insert into public.deleted_rows (table_name, row_id, student_id, company_id)
+  values (tg_table_name, old.id, owner_student, owner_company)
+  on conflict (table_name, row_id) do update set deleted_at = excluded.deleted_at;
+  return old;
+end;
+$$ language plpgsql security definer set search_path = public;
+
+drop trigger if exists internships_record_deleted on public.internships;
+create trigger internships_record_deleted
+  after delete on public.internships
+  for each row execute procedure public.record_deleted_row();
+
+drop trigger if exists applications_record_deleted on public.applications;
+create trigger applications_record_deleted
+  after delete on public.applications
+  for each row execute procedure public.record_deleted_row();
+
+drop trigger if exists tasks_record_deleted on public.tasks;
+create trigger tasks_record_deleted
+  after delete on public.tasks
+  for each row execute procedure public.record_deleted_row();
+
+-- Server clock for sync cursors, so they never depend on the app host's clock
+create or replace function public.sync_watermark()
+returns timestamp with time zone as $$
+  select now();
+$$ language sql stable;
+
+-- IDs of rows updated or deleted since a timestamp (newest first, at most
+-- max_rows of each), with the server time to check from next. Runs with the
+-- caller's RLS, so it only lists rows the caller can see.
+create or replace function public.table_changes(target_table text, since timestamp with time zone, max_rows int default 100)
+returns json as $$
+declare
+  changes json;
+begin
+  if target_table not in ('internships', 'applications', 'tasks') then
+    raise exception 'table_changes: % is not change-tracked', target_table;
+  end if;
+  execute format(
+    'select coalesce(json_agg(c), ''[]'') from (
+       (select id, updated_at as changed_at from public.%I where updated_at > $1 order by updated_at desc limit $2)
+       union all
+       (select row_id, deleted_at from public.deleted_rows where table_name = $3 and deleted_at > $1 order by deleted_at desc limit $2)
+     ) c', target_table)
+  into changes using since, max_rows, target_table;
+  return json_build_object('watermark', now(), 'changes', changes);
+end;
+$$ language plpgsql stable;
+
+-- One page of a delta pull: the listed columns of rows in scope updated
+-- since a timestamp (all of them when since is null), the tombstones of
+-- rows deleted since (with the first page), and the server time the pull
+-- read up to. scope is a json object of column = value filters. Runs with
+-- the caller's RLS, like a select would.
+create or replace function public.pull_changes(
+  target_table text,
+  columns text[],
+  scope json default '{}',
+  since timestamp with time zone default null,
+  page_offset int default 0,
+  max_rows int default 1000
+)
+returns json as $$
+declare
+  filters text := '';
+  scope_column text;
+  scope_value text;
+  changed json;
+  deleted json := '[]';
+begin
+  if target_table not in ('internships', 'applications', 'tasks', 'profiles_names') then
+    raise exception 'pull_changes: % is not change-tracked', target_table;
+  end if;
+  for scope_column, scope_value in select * from json_each_text(scope) loop
+    filters := filters || format(' and %I = %L', scope_column, scope_value);
+  end loop;
+  if since is not null then
+    filters := filters || format(' and updated_at > %L', since);
+  end if;
+  execute format(
+    'select coalesce(json_agg(r), ''[]'') from (
+       select %s, updated_at from public.%I where true%s order by updated_at, id offset $1 limit $2
+     ) r',
+    (select string_agg(format('%I', c), ', ') from unnest(columns) c), target_table, filters)
+  into changed using page_offset, max_rows;
+  if since is not null and page_offset = 0 then
+    select coalesce(json_agg(json_build_object('row_id', row_id, 'deleted_at', deleted_at)), '[]') into deleted
+    from public.deleted_rows where table_name = target_table and deleted_at > since;
+  end if;
+  return json_build_object('watermark', now(), 'rows', changed, 'deleted', deleted);
+end;
+$$ language plpgsql stable;
+
+-- 11. Messaging (inbox threads, unread counts, mark-as-read)
+-- Each conversation's two participants in a fixed order, so one index
+-- serves a thread whichever side sent each message
+alter table public.messages add column if not exists user_low uuid generated always as (least(sender_id, receiver_id)) stored;
+alter table public.messages add column if not exists user_high uuid generated always as (greatest(sender_id, receiver_id)) stored;
+
+do $$
+begin
+  alter table public.messages add constraint messages_not_to_self check (sender_id <> receiver_id) not valid;
+exception when duplicate_object then null;
+end;
+$$;
+
+-- Conversation pages (keyset on created_at, id) and "since" fetches
+create index if not exists messages_conversation_idx
+  on public.messages (user_low, user_high, created_at desc, id desc);
+-- Unread badge and per-thread unread counts; only unread rows are indexed,
+-- so the index stays small however many messages have been read
+create index if not exists messages_unread_idx
+  on public.messages (receiver_id, sender_id) where not read;
+
+-- Receivers may mark messages read, and may change nothing else
+drop policy if exists "Receivers can mark messages read" on messages;
+create policy "Receivers can mark messages read"
+  on messages for update
+  using ( (select auth.uid()) = receiver_id )
+  with check ( (select auth.uid()) = receiver_id );
+
+revoke update on public.messages from anon, authenticated;
+grant update (read) on public.messages to authenticated;
+
+-- One row per participant and conversation with its latest message, so the
+-- inbox never scans messages
+create table if not exists public.message_threads (
+  owner_id uuid references public.profiles_names(id) not null,
+  partner_id uuid references public.profiles_names(id) not null,
+  last_message_at timestamp with time zone not null,
+  last_message_preview text,
+  last_sender_id uuid,
+  primary key (owner_id, partner_id)
+);
+
+alter table public.message_threads enable row level security;
+
+drop policy if exists "Users can view their own threads" on message_threads;
+create policy "Users can view their own threads"
+  on message_threads for select
+  using ( (select auth.uid()) = owner_id );
+
+create index if not exists message_threads_inbox_idx
+  on public.message_threads (owner_id, last_message_at desc, partner_id desc);
+
+create or replace function public.record_message_thread()
+returns trigger as $$
+begin
+  insert into public.message_threads (owner_id, partner_id, last_message_at, last_message_preview, last_sender_id)
+  values
+    (new.sender_id, new.receiver_id, new.created_at, left(new.content, 120), new.sender_id),
+    (new.receiver_id, new.sender_id, new.created_at, left(new.content, 120), new.sender_id)
+  on conflict (owner_id, partner_id) do update set
+    last_message_at = excluded.last_message_at,
+    last_message_preview = excluded.last_message_preview,
+    last_sender_id = excluded.last_sender_id
+  where message_threads.last_message_at <= excluded.last_message_at;
+  return new;
+end;
+$$ language plpgsql security definer set search_path = public;
+
+drop trigger if exists messages_record_thread on public.messages;
+create trigger messages_record_thread
+  after insert on public.messages
+  for each row execute procedure public.record_message_thread();
+
+-- Threads for messages sent before the trigger existed
+insert into public.message_threads (owner_id, partner_id, last_message_at, last_message_preview, last_sender_id)
+select distinct on (owner_id, partner_id) owner_id, partner_id, created_at, left(content, 120), sender_id
+from (
+  select sender_id as owner_id, receiver_id as partner_id, created_at, content, sender_id from public.messages
+  union all
+  select receiver_id, sender_id, created_at, content, sender_id from public.messages
+) m
+order by owner_id, partner_id, created_at desc
+on conflict (owner_id, partner_id) do nothing;
+
+-- One inbox page, newest conversation first (keyset on last_message_at, partner_id)
+create or replace function public.inbox_threads(
+  page_size int default 20,
+  after_at timestamp with time zone default null,
+  after_partner uuid default null
+)
+returns table (
+  partner_id uuid,
+  partner_name text,
+  last_message_at timestamp with time zone,
+  last_message_preview text,
+  last_sender_id uuid,
+  unread bigint
+)
+language sql stable
+as $$
+  select
+    t.partner_id,
+    coalesce(p.company_name, p.full_name, p.email),
+    t.last_message_at,
+    t.last_message_preview,
+    t.last_sender_id,
+    (
+      select count(*) from public.messages m
+      where m.receiver_id = t.owner_id and m.sender_id = t.partner_id and not m.read
+    )
+  from public.message_threads t
+  left join public.profiles_names p on p.id = t.partner_id
+  where t.owner_id = (select auth.uid())
+    and (after_at is null or (t.last_message_at, t.partner_id) < (after_at, after_partner))
+  order by t.last_message_at desc, t.partner_id desc
+  limit page_size;
+$$;
+
+-- 12. Exports (keyset pages of one internship's applications and tasks)
+create index if not exists applications_internship_applied_idx
+  on public.applications (internship_id, applied_at desc, id desc);
+create index if not exists tasks_internship_created_idx
+  on public.tasks (internship_id, created_at desc, id desc);
@@ -0,0 +1,383 @@
+"""Generate synthetic portal data and bulk load it for load testing.
+
+Rows are derived from their index with a seeded hash, so any scale is
+generated as a stream in constant memory and the same seed always yields
+the same dataset. Tables load in foreign-key order; applications map each
+index to a distinct (internship, student) pair, so unique(internship_id,
+student_id) holds without tracking seen pairs.
+
+    python seed.py --scale large --target fake
+    python seed.py --scale xlarge --target postgres --dsn "$DATABASE_URL" --workers 8
+    python seed.py --internships 500000 --applications 5000000 --target postgres --max-rows-per-second 50000
+
+The Postgres target needs psycopg (pip install "psycopg[binary]") and a
+local Supabase database with schema.sql applied: users go into auth.users
+so on_auth_user_created creates their profiles.
+"""
+import argparse
+import math
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+
+SCALES = {
+    "small": {"companies": 5, "students": 50, "internships": 100, "applications": 300, "tasks": 100, "messages": 100},
+    "medium": {"companies": 20, "students": 1000, "internships": 2000, "applications": 10000, "tasks": 2000, "messages": 5000},
+    "large": {"companies": 50, "students": 5000, "internships": 20000, "applications": 100000, "tasks": 20000, "messages": 50000},
+    "xlarge": {"companies": 500, "students": 200000, "internships": 200000, "applications": 2000000, "tasks": 500000, "messages": 1000000},
+}
+# Foreign-key order
+TABLES = ("profiles_names", "internships", "applications", "tasks", "messages")
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_WORKERS = 4
+BASE_TIME = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+COMPANY_WORDS = ["Blue", "Harbor", "Quantum", "Cedar", "Pixel", "Nimbus", "Atlas", "Summit", "Vector", "Lumen", "Orbit", "Granite"]
+COMPANY_SUFFIXES = ["Labs", "Systems", "Analytics", "Studio", "Technologies", "Health", "Robotics", "Works"]
+FIRST_NAMES = ["Aarav", "Maya", "Liam", "Sofia", "Noah", "Priya", "Ethan", "Zara", "Lucas", "Ananya", "Omar", "Chloe", "Kenji", "Ines"]
+LAST_NAMES = ["Sharma", "Garcia", "Chen", "Okafor", "Muller", "Silva", "Nguyen", "Patel", "Rossi", "Kim", "Haddad", "Novak"]
+ROLES = [
+    ("Frontend Developer", ["ReactJS", "TypeScript", "CSS", "Figma"]),
+    ("Backend Developer", ["Python", "Django", "PostgreSQL", "Docker"]),
+    ("Data Analyst", ["SQL", "Python", "Tableau", "Excel"]),
+    ("ML Engineer", ["Python", "PyTorch", "scikit-learn", "SQL"]),
+    ("Product Designer", ["Figma", "UX Research", "Prototyping"]),
+    ("Mobile Developer", ["Kotlin", "Swift", "Flutter"]),
+    ("DevOps Engineer", ["Docker", "Kubernetes", "Terraform", "Go"]),
+    ("Marketing Analyst", ["Excel", "SEO", "Google Analytics"]),
+]
+SKILLS = sorted({skill for _, skills in ROLES for skill in skills})
+LOCATIONS = ["Remote", "New York", "Bangalore", "London", "Berlin", "San Francisco", "Toronto", "Singapore", "Hyderabad", "Austin"]
+DURATIONS = ["1 month", "2 months", "3 months", "6 months", "12 months"]
+TASK_TITLES = ["Set up the development environment", "Write a design doc", "Fix a starter bug", "Build the prototype", "Present a demo"]
+MESSAGES = [
+    "Thanks for applying! Are you available for a call this week?",
+    "Sure, Thursday afternoon works for me.",
+    "Could you share a link to a recent project?",
+    "Here is my portfolio, happy to walk through it.",
+    "We'd like to move you to the next round.",
+    "Thank you, looking forward to it!",
+]
+
+_MASK = (1 << 64) - 1
+
+
+class Generator:
+    """Rows for every table at a given scale, as one stream per table."""
+
+    def __init__(self, companies, students, internships, applications, tasks, messages=0, seed=7):
+        if applications > internships * students:
+            raise ValueError("more applications than distinct (internship, student) pairs")
+        self.companies = companies
+        self.students = students
+        self.internships = internships
+        self.applications = applications
+        self.tasks = tasks
+        self.messages = messages
+        self.seed = seed
+
+    def _hash(self, *values) -> int:
+        # splitmix64 over the seed and the values
+        h = self.seed
+        for value in values:
+            h = (h ^ value) + 0x9E3779B97F4A7C15 & _MASK
+            h = (h ^ (h >> 30)) * 0xBF58476D1CE4E5B9 & _MASK
+            h = (h ^ (h >> 27)) * 0x94D049BB133111EB & _MASK
+            h ^= h >> 31
+        return h
+
+    def _pick(self, options, *values):
+        return options[self._hash(*values) % len(options)]
+
+    def _timestamp(self, seconds):
+        return (BASE_TIME + timedelta(seconds=seconds)).isoformat(timespec="microseconds")
+
+    # --- Keys ---
+
+    def user_id(self, n):
+        return str(uuid.UUID(int=n + 1))
+
+    def student_id(self, n):
+        return self.user_id(self.companies + n)
+
+    def internship_id(self, n):
+        return str(uuid.UUID(int=(1 << 64) + n))
+
+    def company_of(self, internship):
+        return self._hash(internship, 1) % self.companies
+
+    def application_pair(self, n):
+        # Index n -> (internship, student); for a fixed internship the
+        # students are consecutive from a per-internship offset, so pairs
+        # never repeat while n < internships * students
+        internship = n % self.internships
+        student = (n // self.internships + self._hash(internship, 2)) % self.students
+        return internship, student
+
+    def application_status(self, n):
+        roll = self._hash(n, 3) % 10
+        return "pending" if roll < 5 else "accepted" if roll < 7 else "rejected"
+
+    # --- Tables ---
+
+    def profiles_rows(self):
+        for n in range(self.companies):
+            name = f"{self._pick(COMPANY_WORDS, n, 10)} {self._pick(COMPANY_WORDS, n, 11)} {self._pick(COMPANY_SUFFIXES, n, 12)}"
+            yield {
+                "id": self.user_id(n), "email": f"company{n}@example.com", "role": "company",
+                "full_name": f"{self._pick(FIRST_NAMES, n, 13)} {self._pick(LAST_NAMES, n, 14)}",
+                "company_name": f"{name} {n}" if n >= len(COMPANY_WORDS) else name,
+                "created_at": self._timestamp(n), "updated_at": self._timestamp(n),
+            }
+        for n in range(self.students):
+            skills = {self._pick(SKILLS, n, 20 + k) for k in range(2 + self._hash(n, 19) % 4)}
+            yield {
+                "id": self.student_id(n), "email": f"student{n}@example.com", "role": "student",
+                "full_name": f"{self._pick(FIRST_NAMES, n, 15)} {self._pick(LAST_NAMES, n, 16)}",
+                "skills": sorted(skills), "created_at": self._timestamp(n), "updated_at": self._timestamp(n),
+            }
+
+    def internships_rows(self):
+        for n in range(self.internships):
+            role, skills = self._pick(ROLES, n, 30)
+            level = self._pick(["Intern", "Summer Intern", "Research Intern", "Part-time Intern"], n, 31)
+            location = self._pick(LOCATIONS, n, 32)
+            created_at = self._timestamp(n * 60)
+            yield {
+                "id": self.internship_id(n), "company_id": self.user_id(self.company_of(n)),
+                "title": f"{role} {level}", "role": role,
+                "description": f"Join the team as a {role.lower()} and ship real work in {location}. Posting {n}.",
+                "location": location, "duration": self._pick(DURATIONS, n, 33),
+                "stipend": f"${500 + self._hash(n, 34) % 20 * 100}/month",
+                "skills_required": sorted({skills[self._hash(n, 35 + k) % len(skills)] for k in range(2)}),
+                "status": "closed" if self._hash(n, 36) % 10 == 0 else "open",
+                "created_at": created_at, "updated_at": created_at,
+            }
+
+    def applications_rows(self):
+        for n in range(self.applications):
+            internship, student = self.application_pair(n)
+            applied_at = self._timestamp(internship * 60 + 3600 + self._hash(n, 40) % (30 * 86400))
+            yield {
+                "id": str(uuid.UUID(int=(2 << 64) + n)), "internship_id": self.internship_id(internship),
+                "student_id": self.student_id(student), "status": self.application_status(n),
+                "applied_at": applied_at, "updated_at": applied_at,
+            }
+
+    def tasks_rows(self):
+        accepted = max(1, self.applications * 2 // 10)
+        # A little extra per application covers the spread of accepted counts
+        per_application = math.ceil(self.tasks * 1.1 / accepted)
+        count = 0
+        for n in range(self.applications):
+            if self.application_status(n) != "accepted":
+                continue
+            internship, student = self.application_pair(n)
+            for k in range(per_application):
+                if count == self.tasks:
+                    return
+                created_at = self._timestamp(internship * 60 + 40 * 86400 + k * 86400)
+                yield {
+                    "id": str(uuid.UUID(int=(3 << 64) + count)), "internship_id": self.internship_id(internship),
+                    "student_id": self.student_id(student), "title": self._pick(TASK_TITLES, count, 50),
+                    "description": "See the internship handbook for details.",
+                    "due_date": (BASE_TIME + timedelta(days=45 + internship // 1440 + k * 7)).date().isoformat(),
+                    "status": self._pick(["pending", "pending", "submitted", "completed"], count, 51),
+                    "submission_link": None, "feedback": None,
+                    "created_at": created_at, "updated_at": created_at,
+                }
+                count += 1
+
+    def messages_rows(self):
+        if not self.applications:
+            return
+        for n in range(self.messages):
+            # Conversations happen between a company and its applicants
+            internship, student = self.application_pair(self._hash(n, 60) % self.applications)
+            company, student = self.user_id(self.company_of(internship)), self.student_id(student)
+            turn = self._hash(n, 61) % len(MESSAGES)
+            sender, receiver = (company, student) if turn % 2 == 0 else (student, company)
+            yield {
+                "id": str(uuid.UUID(int=(4 << 64) + n)), "sender_id": sender, "receiver_id": receiver,
+                "content": MESSAGES[turn], "read": self._hash(n, 62) % 10 < 7,
+                "created_at": self._timestamp(internship * 60 + 86400 + n),
+            }
+
+    def tables(self) -> dict:
+        """Table name -> row iterator, in foreign-key order."""
+        return {
+            "profiles_names": self.profiles_rows(),
+            "internships": self.internships_rows(),
+            "applications": self.applications_rows(),
+            "tasks": self.tasks_rows(),
+            "messages": self.messages_rows(),
+        }
+
+
+def generate_dataset(companies, students, internships, applications, tasks, messages=0, seed=7) -> dict:
+    """Every table as a list; for in-memory use at small scales."""
+    generator = Generator(companies, students, internships, applications, tasks, messages, seed)
+    return {table: list(rows) for table, rows in generator.tables().items()}
+
+
+# --- Loading ---
+
+class RateLimiter:
+    """Token bucket limiting rows per second across all workers."""
+
+    def __init__(self, rows_per_second):
+        self.rows_per_second = rows_per_second
+        self._allowance = rows_per_second
+        self._checked = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, rows):
+        if not self.rows_per_second:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._allowance = min(self.rows_per_second, self._allowance + (now - self._checked) * self.rows_per_second)
+            self._checked = now
+            self._allowance -= rows
+            wait_seconds = -self._allowance / self.rows_per_second if self._allowance < 0 else 0
+        if wait_seconds:
+            time.sleep(wait_seconds)
+
+
+class FakeSink:
+    """Loads into a FakeSupabase through its insert path."""
+
+    def __init__(self, fake):
+        self.fake = fake
+
+    def insert(self, table, rows) -> int:
+        self.fake.table(table).insert(rows).execute()
+        if table == "profiles_names":
+            for profile in rows:
+                self.fake.accounts[profile["email"]] = {
+                    "id": profile["id"], "email": profile["email"], "password": "password",
+                    "user_metadata": {"role": profile["role"], "full_name": profile["full_name"]},
+                }
+        return len(rows)
+
+
+class PostgresSink:
+    """Loads into Postgres with one COPY per batch, a connection per worker."""
+
+    def __init__(self, dsn):
+        try:
+            import psycopg
+            from psycopg.types.json import Jsonb
+        except ImportError:
+            raise SystemExit('The postgres target needs psycopg: pip install "psycopg[binary]"')
+        self._psycopg = psycopg
+        self._jsonb = Jsonb
+        self.dsn = dsn
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._psycopg.connect(self.dsn)
+        return connection
+
+    def insert(self, table, rows) -> int:
+        connection = self._connection()
+        with connection.transaction(), connection.cursor() as cursor:
+            if table == "profiles_names":
+                self._insert_users(cursor, rows)
+            else:
+                columns = list(rows[0])
+                with cursor.copy(f"copy public.{table} ({', '.join(columns)}) from stdin") as copy:
+                    for row in rows:
+                        copy.write_row([row[column] for column in columns])
+        return len(rows)
+
+    def _insert_users(self, cursor, rows):
+        # on_auth_user_created creates each profile from the user metadata;
+        # the remaining profile columns are filled in from a staging table
+        with cursor.copy("copy auth.users (id, email, raw_user_meta_data) from stdin") as copy:
+            for row in rows:
+                copy.write_row([row["id"], row["email"], self._jsonb({"role": row["role"], "full_name": row["full_name"]})])
+        cursor.execute("create temporary table seed_profiles (id uuid, company_name text, skills text[]) on commit drop")
+        with cursor.copy("copy seed_profiles (id, company_name, skills) from stdin") as copy:
+            for row in rows:
+                copy.write_row([row["id"], row.get("company_name"), row.get("skills")])
+        cursor.execute(
+            "update public.profiles_names p set company_name = s.company_name, skills = s.skills "
+            "from seed_profiles s where p.id = s.id"
+        )
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load(generator, sink, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS, rows_per_second=None, report=print) -> dict:
+    """Insert every table in order; returns rows loaded per table."""
+    limiter = RateLimiter(rows_per_second)
+    loaded = {}
+    total_started = time.perf_counter()
+    for table, rows in generator.tables().items():
+        started = time.perf_counter()
+        count = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"seed-{table}") as pool:
+            in_flight = set()
+            for batch in _batches(rows, batch_size):
+                limiter.acquire(len(batch))
+                in_flight.add(pool.submit(sink.insert, table, batch))
+                # Bound the batches held in memory
+                if len(in_flight) >= workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    count += sum(future.result() for future in done)
+            count += sum(future.result() for future in in_flight)
+        seconds = time.perf_counter() - started
+        loaded[table] = count
+        report(f"{table:16} {count:>10,} rows in {seconds:7.2f}s  {count / seconds if seconds else 0:>10,.0f} rows/s")
+    seconds = time.perf_counter() - total_started
+    total = sum(loaded.values())
+    report(f"{'total':16} {total:>10,} rows in {seconds:7.2f}s  {total / seconds if seconds else 0:>10,.0f} rows/s")
+    return loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    for table in SCALES["small"]:
+        parser.add_argument(f"--{table}", type=int, help=f"number of {table} (overrides --scale)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--target", choices=("fake", "postgres"), default="fake")
+    parser.add_argument("--dsn", help="Postgres connection string for --target postgres")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--max-rows-per-second", type=float, help="rate limit across all workers")
+    parser.add_argument("--latency-ms", type=float, default=0, help="simulated round-trip latency for --target fake")
+    args = parser.parse_args()
+
+    counts = {table: getattr(args, table) if getattr(args, table) is not None else default for table, default in SCALES[args.scale].items()}
+    generator = Generator(**counts, seed=args.seed)
+    if args.target == "postgres":
+        if not args.dsn:
+            parser.error("--target postgres needs --dsn")
+        sink = PostgresSink(args.dsn)
+    else:
+        from fake_supabase import FakeSupabase
+        sink = FakeSink(FakeSupabase(latency=args.latency_ms / 1000))
+
+    load(generator, sink, args.batch_size, args.workers, args.max_rows_per_second)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,16 @@
 import streamlit as st
-from utils import supabase
-import pandas as pd
+import messages_view
+import mirror
+import repository
+import sync
+import tracing
+from utils import get_session_profile, update_session_profile
 from datetime import datetime
 
+@tracing.view
 def student_profile(user):
-    # Fetch existing profile
-    try:
-        response = supabase.table("profiles_names").select("*").eq("id", user.id).single().execute()
-        profile = response.data if response.data else {}
-    except Exception as e:
-        st.error(f"Error fetching profile: {e}")
-        profile = {}
+    # Profile cached in the session at login
+    profile = get_session_profile()
 
     st.markdown("## My Profile")
 
@@ -45,9 +45,9 @@ def student_profile(user):
         
         # Social Links
         if profile.get('resume_url'):
-            st.link_button("📄 Resume", profile['resume_url'], use_container_width=True)
+            st.link_button("📄 Resume", profile['resume_url'], width="stretch")
         if profile.get('portfolio_url'):
-            st.link_button("🌐 Portfolio", profile['portfolio_url'], use_container_width=True)
+            st.link_button("🌐 Portfolio", profile['portfolio_url'], width="stretch")
             
         st.markdown("</div>", unsafe_allow_html=True)
 
@@ -89,7 +89,8 @@ def student_profile(user):
                         "skills": skills
                     }
                     try:
-                        supabase.table("profiles_names").update(updates).eq("id", user.id).execute()
+                        repository.update_profile(user.id, updates)
+                        update_session_profile(updates)
                         st.success("Profile updated successfully!")
                         st.rerun()
                     except Exception as e:
@@ -105,144 +106,283 @@ def student_profile(user):
         else:
             st.info("Add skills to see them here.")
 
+PAGE_SIZES = [10, 20, 50]
+FACETS = {"location": "Location", "skill": "Skill", "duration": "Duration", "company": "Company"}
+RECOMMENDATION_LIMIT = 20
+# Stands in for an internship the student can no longer see
+UNKNOWN_INTERNSHIP = {"title": "Unknown internship", "company_id": None, "profiles_names": {"company_name": "Unknown Company"}}
+
+def get_applied_internship_ids(user):
+    # Load the student's applied internship IDs once per session instead of
+    # querying applications for every listed internship.
+    if not has_applied_internship_ids(user):
+        try:
+            remember_applied_internship_ids(user, repository.get_applied_internship_ids(user.id))
+        except Exception as e:
+            st.error(f"Error fetching applications: {e}")
+            return set()
+    return st.session_state["applied_internship_ids"]
+
+def has_applied_internship_ids(user):
+    return st.session_state.get("applied_internship_ids_user") == user.id
+
+def remember_applied_internship_ids(user, applied_ids):
+    st.session_state["applied_internship_ids"] = set(applied_ids)
+    st.session_state["applied_internship_ids_user"] = user.id
+
+@tracing.view
 def browse_internships(user):
     st.header("Browse Internships")
     
-    # Filters
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        search_term = st.text_input("Search by Title or Role")
-    with col2:
-        location_filter = st.text_input("Filter by Location")
-    with col3:
-        skill_filter = st.text_input("Filter by Skill")
+    # Text filters live in a form so a query is only issued on submit
+    with st.form("browse_search"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.text_input("Search by Title, Role, Skills or Description", key="browse_search_text")
+        with col2:
+            st.text_input("Filter by Location", key="browse_location_text")
+        with col3:
+            st.text_input("Filter by Skill", key="browse_skill_text")
+        st.form_submit_button("Search")
 
-    # Fetch Internships
-    query = supabase.table("internships").select("*, profiles_names(company_name)").eq("status", "open")
-    
-    if search_term:
-        query = query.ilike("title", f"%{search_term}%")
-    if location_filter:
-        query = query.ilike("location", f"%{location_filter}%")
-    if skill_filter:
-        # Filter where skills_required array contains the skill_filter
-        # Note: 'cs' operator checks if the array contains the value. 
-        # Since we are searching for a single string in an array of strings, we wrap it in a list.
-        # However, exact match might be too strict. Let's try to find a way to do partial match if possible,
-        # but Supabase/PostgREST array support is limited for partial match inside elements.
-        # For now, we will use 'cs' which requires exact match of the element, or we can fetch all and filter in Python.
-        # Fetching all and filtering in Python is safer for partial matches (e.g. "React" matching "ReactJS").
-        # But let's try to use the database first for efficiency. 'cs' expects {value}.
-        query = query.cs("skills_required", [skill_filter])
+    # Facet selections are read from widget state up front so the page and
+    # the facet counts can be fetched in parallel
+    filters = {name: st.session_state.get(f"browse_{name}") or None for name in repository.BROWSE_FILTERS}
+    page_size = st.session_state.get("browse_page_size", PAGE_SIZES[1])
+
+    # The catalog is read from the local mirror or straight from Supabase;
+    # applying always goes upstream
+    catalog = mirror.get_catalog_source()
+
+    # Reset pagination whenever the filters or the catalog source change
+    pagination_key = tuple(filters.values()) + (page_size, catalog is repository)
+    if st.session_state.get("browse_filters") != pagination_key:
+        st.session_state["browse_filters"] = pagination_key
+        st.session_state["browse_cursors"] = [None]
+    cursors = st.session_state["browse_cursors"]
+
+    if catalog is repository:
+        # Cached pages are reused until a change probe sees a changed posting
+        if sync.get_change_cursor("open_internships", "internships").changed():
+            repository.invalidate_open_internships()
+
+    # Fetch Internships, facet counts, and the applied IDs if not loaded yet, in parallel
+    queries = {"facets": lambda: catalog.get_internship_facets(filters)}
+    if any(filters.values()):
+        queries["page"] = lambda: catalog.search_internships(filters, page_size, after=cursors[-1])
+    else:
+        queries["page"] = lambda: catalog.get_open_internships_page(page_size, after=cursors[-1])
+    if not has_applied_internship_ids(user):
+        queries["applied_ids"] = lambda: repository.get_applied_internship_ids(user.id)
+    results, errors = repository.fetch_concurrently(queries)
+
+    if "facets" in errors:
+        st.error(f"Error fetching filters: {errors['facets']}")
+    facets = results.get("facets") or {}
+    with st.expander("Refine", expanded=any(filters[f"facet_{name}"] for name in FACETS)):
+        columns = st.columns(len(FACETS))
+        for column, (name, label) in zip(columns, FACETS.items()):
+            with column:
+                facet_select(label, f"browse_facet_{name}", facets.get(name) or [])
+        st.selectbox("Results per page", PAGE_SIZES, index=1, key="browse_page_size")
+
+    if "applied_ids" in results:
+        remember_applied_internship_ids(user, results["applied_ids"])
+    if "page" in errors:
+        st.error(f"Error fetching internships: {errors['page']}")
+    page = results.get("page", {"rows": [], "next_cursor": None})
+    internships = page["rows"]
+
+    if not internships:
+        st.info("No internships found.")
+        return
+
+    applied_ids = get_applied_internship_ids(user)
+
+    for internship in internships:
+        internship_card(user, internship, applied_ids)
+
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if st.button("Previous", disabled=len(cursors) == 1, key="browse_prev"):
+            cursors.pop()
+            st.rerun()
+    with col_page:
+        st.caption(f"Page {len(cursors)}")
+    with col_next:
+        if st.button("Next", disabled=page["next_cursor"] is None, key="browse_next"):
+            cursors.append(page["next_cursor"])
+            st.rerun()
+
+def facet_select(label, key, values):
+    counts = {value['value']: f"{value['label']} ({value['count']})" for value in values}
+    selected = st.session_state.get(key)
+    if selected is not None and selected not in counts:
+        # Keep the current selection even when it has no matches left
+        counts[selected] = f"{selected} (0)"
+    st.selectbox(label, [None] + list(counts.keys()), format_func=lambda v: "Any" if v is None else counts[v], key=key)
+
+@st.fragment
+@tracing.view
+def internship_card(user, internship, applied_ids):
+    # Runs as a fragment so applying only reruns this card, not the page
+    with st.expander(f"{internship['title'] or 'Untitled'} at {internship['profiles_names']['company_name'] or 'Unknown Company'}"):
+        st.write(f"**Role:** {internship['role'] or 'Not specified'}")
+        st.write(f"**Location:** {internship['location'] or 'Not specified'}")
+        st.write(f"**Stipend:** {internship['stipend'] or 'Not specified'}")
+        st.write(f"**Duration:** {internship['duration'] or 'Not specified'}")
+        st.write(f"**Skills Required:** {', '.join(internship['skills_required'] or []) or 'None'}")
+
+        # Only fetch the full description when the student asks for it
+        if st.toggle("Show description", key=f"desc_{internship['id']}"):
+            try:
+                description = mirror.get_catalog_source().get_internship_description(internship['id'])
+            except Exception as e:
+                st.error(f"Error fetching description: {e}")
+                description = ""
+            st.write(f"**Description:** {description or 'No description provided.'}")
         
+        if internship['id'] in applied_ids:
+            st.button("Applied", disabled=True, key=f"btn_{internship['id']}")
+        else:
+            if st.button("Apply Now", key=f"apply_{internship['id']}"):
+                apply_for_internship(user, internship)
+
+@tracing.view
+def recommended_internships(user):
+    st.header("Recommended for You")
+
+    skills = get_session_profile().get("skills") or []
+    if not skills:
+        st.info("Add skills to your profile to get recommendations.")
+        return
+
     try:
-        response = query.execute()
-        internships = response.data
+        # numpy and scipy are only loaded once a student asks for recommendations
+        import recommend
+        internships = recommend.get_catalog().recommend(skills, limit=RECOMMENDATION_LIMIT)
     except Exception as e:
-        st.error(f"Error fetching internships: {e}")
+        st.error(f"Error fetching recommendations: {e}")
         internships = []
 
     if not internships:
-        st.info("No internships found.")
+        st.info("No internships match your skills yet.")
         return
 
+    applied_ids = get_applied_internship_ids(user)
     for internship in internships:
-        with st.expander(f"{internship['title'] or 'Untitled'} at {internship['profiles_names']['company_name'] or 'Unknown Company'}"):
-            st.write(f"**Role:** {internship['role'] or 'Not specified'}")
-            st.write(f"**Location:** {internship['location'] or 'Not specified'}")
-            st.write(f"**Stipend:** {internship['stipend'] or 'Not specified'}")
-            st.write(f"**Duration:** {internship['duration'] or 'Not specified'}")
-            st.write(f"**Description:** {internship['description'] or 'No description provided.'}")
-            st.write(f"**Skills Required:** {', '.join(internship['skills_required'] or []) or 'None'}")
-            
-            # Check if already applied
-            try:
-                app_check = supabase.table("applications").select("id").eq("internship_id", internship['id']).eq("student_id", user.id).execute()
-                already_applied = len(app_check.data) > 0
-            except:
-                already_applied = False
-            
-            if already_applied:
-                st.button("Applied", disabled=True, key=f"btn_{internship['id']}")
-            else:
-                if st.button("Apply Now", key=f"apply_{internship['id']}"):
-                    apply_for_internship(user, internship['id'])
+        st.caption(f"Matches your skills: {', '.join(internship['matched_skills'])}")
+        internship_card(user, internship, applied_ids)
 
-def apply_for_internship(user, internship_id):
+def apply_for_internship(user, internship):
     # Simple application for now, can be expanded to a modal or form
     try:
-        supabase.table("applications").insert({
-            "internship_id": internship_id,
-            "student_id": user.id,
-            "status": "pending"
-        }).execute()
-        st.success("Application submitted successfully!")
-        st.rerun()
+        repository.apply_for_internship(user.id, internship)
+        # The card reads this set, so updating it is all the refresh it needs
+        get_applied_internship_ids(user).add(internship['id'])
+        st.toast("Application submitted successfully!")
+        st.rerun(scope="fragment")
     except Exception as e:
         st.error(f"Error submitting application: {e}")
 
+@tracing.view
 def student_dashboard(user):
     st.header("My Dashboard")
     
+    # Local copies that only pull rows changed since the last rerun; the two
+    # tabs are independent, so both pulls run in parallel
+    applications_table = sync.get_synced_table(
+        "student_applications", "applications",
+        "id, internship_id, status, applied_at",
+        {"student_id": user.id}
+    )
+    tasks_table = sync.get_synced_table(
+        "student_tasks", "tasks",
+        "id, internship_id, title, description, due_date, status, submission_link, feedback",
+        {"student_id": user.id}
+    )
+    results, errors = repository.fetch_concurrently({
+        "applications": lambda: sorted(applications_table.pull().values(), key=lambda a: a['applied_at'], reverse=True),
+        "tasks": lambda: sorted(tasks_table.pull().values(), key=lambda t: t['due_date'] or "")
+    })
+    st.caption(f"Synced {applications_table.last_pull_bytes + tasks_table.last_pull_bytes} bytes this refresh.")
+
+    # Titles and company names are read fresh: renaming them does not touch
+    # the synced rows
+    try:
+        internship_ids = [row['internship_id'] for rows in results.values() for row in rows]
+        summaries = repository.get_internship_summaries(internship_ids)
+    except Exception as e:
+        st.error(f"Error fetching internships: {e}")
+        summaries = {}
+    for name, rows in results.items():
+        results[name] = [{**row, "internships": summaries.get(row['internship_id'], UNKNOWN_INTERNSHIP)} for row in rows]
+
     tab1, tab2 = st.tabs(["My Applications", "My Tasks"])
     
     with tab1:
-        try:
-            response = supabase.table("applications").select("*, internships(title, profiles_names(company_name))").eq("student_id", user.id).execute()
-            applications = response.data
-        except Exception as e:
-            st.error(f"Error fetching applications: {e}")
-            applications = []
+        if "applications" in errors:
+            st.error(f"Error fetching applications: {errors['applications']}")
+        applications = results.get("applications", [])
             
         if applications:
+            import pandas as pd
             df = pd.DataFrame(applications)
             # Flatten data for display
             df['Internship'] = df['internships'].apply(lambda x: x['title'])
             df['Company'] = df['internships'].apply(lambda x: x['profiles_names']['company_name'])
             df['Applied At'] = pd.to_datetime(df['applied_at']).dt.strftime('%Y-%m-%d')
             
-            st.dataframe(df[['Internship', 'Company', 'status', 'Applied At']], use_container_width=True)
+            st.dataframe(df[['Internship', 'Company', 'status', 'Applied At']], width="stretch")
         else:
             st.info("You haven't applied to any internships yet.")
 
     with tab2:
-        try:
-            response = supabase.table("tasks").select("*, internships(title)").eq("student_id", user.id).execute()
-            tasks = response.data
-        except Exception as e:
-            st.error(f"Error fetching tasks: {e}")
-            tasks = []
+        if "tasks" in errors:
+            st.error(f"Error fetching tasks: {errors['tasks']}")
+        tasks = results.get("tasks", [])
             
         if tasks:
             for task in tasks:
-                with st.expander(f"{task['title']} ({task['status']})"):
-                    st.write(f"**Internship:** {task['internships']['title']}")
-                    st.write(f"**Due Date:** {task['due_date']}")
-                    st.write(f"**Description:** {task['description']}")
-                    if task['feedback']:
-                        st.info(f"**Feedback:** {task['feedback']}")
-                    
-                    if task['status'] != 'completed':
-                        submission_link = st.text_input("Submission Link", key=f"sub_{task['id']}", value=task.get('submission_link', ''))
-                        if st.button("Submit Task", key=f"btn_sub_{task['id']}"):
-                            try:
-                                supabase.table("tasks").update({
-                                    "submission_link": submission_link,
-                                    "status": "submitted"
-                                }).eq("id", task['id']).execute()
-                                st.success("Task submitted!")
-                                st.rerun()
-                            except Exception as e:
-                                st.error(f"Error submitting task: {e}")
+                task_card(user, task)
         else:
             st.info("No tasks assigned yet.")
 
+@st.fragment
+@tracing.view
+def task_card(user, task):
+    # Runs as a fragment so submitting only reruns this task, not the dashboard
+    with st.expander(f"{task['title']} ({task['status']})"):
+        st.write(f"**Internship:** {task['internships']['title']}")
+        st.write(f"**Due Date:** {task['due_date']}")
+        st.write(f"**Description:** {task['description']}")
+        if task['feedback']:
+            st.info(f"**Feedback:** {task['feedback']}")
+        
+        if task['status'] != 'completed':
+            submission_link = st.text_input("Submission Link", key=f"sub_{task['id']}", value=task.get('submission_link', ''))
+            if st.button("Submit Task", key=f"btn_sub_{task['id']}"):
+                try:
+                    repository.submit_task(user.id, task, submission_link)
+                    # Refresh this card from the write instead of refetching
+                    task['submission_link'] = submission_link
+                    task['status'] = "submitted"
+                    st.toast("Task submitted!")
+                    st.rerun(scope="fragment")
+                except Exception as e:
+                    st.error(f"Error submitting task: {e}")
+
 def show_student_view(user):
-    selected = st.sidebar.radio("Menu", ["Dashboard", "Browse Internships", "Profile"])
+    unread = messages_view.unread_count(user)
+    selected = st.sidebar.radio("Menu", ["Dashboard", "Recommended", "Browse Internships", "Profile", "Messages"], format_func=lambda option: messages_view.menu_label(option, unread))
     
     if selected == "Dashboard":
         student_dashboard(user)
+    elif selected == "Recommended":
+        recommended_internships(user)
     elif selected == "Browse Internships":
         browse_internships(user)
     elif selected == "Profile":
         student_profile(user)
+    elif selected == "Messages":
+        messages_view.messages(user)
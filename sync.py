@@ -0,0 +1,168 @@
+import json
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+from utils import supabase
+
+# Cursors are server timestamps (see pull_changes in schema.sql), never the
+# app host's clock. Every pull re-reads a short window before the cursor to
+# catch rows stamped before it but committed after the previous pull; rows
+# already seen in that window are dropped by id.
+CURSOR_OVERLAP = timedelta(seconds=5)
+PULL_PAGE_SIZE = 1000
+# Changes listed per ChangeCursor probe; more than this counts as changed
+CHANGE_PROBE_ROWS = 100
+
+
+def _rewind(cursor):
+    return (datetime.fromisoformat(cursor) - CURSOR_OVERLAP).isoformat()
+
+
+def _in_window(timestamp, cursor):
+    # Whether a row falls in the window the next pull will re-read
+    return datetime.fromisoformat(timestamp) > datetime.fromisoformat(cursor) - CURSOR_OVERLAP
+
+
+def server_time() -> str:
+    return supabase.rpc("sync_watermark").execute().data
+
+
+def _payload_bytes(rows):
+    return len(json.dumps(rows, default=str).encode())
+
+
+class SyncedTable:
+    """Per-session local copy of a table, kept current with delta pulls.
+
+    The first pull loads every row in scope; later pulls fetch only rows
+    whose ``updated_at`` is past the cursor, plus tombstones from
+    ``deleted_rows`` for rows deleted since, in one pull_changes call per
+    page. ``columns`` are the table's own columns (no embedded selects:
+    a change to an embedded row would not bump this row's ``updated_at``).
+    ``scope`` must only filter on columns that never change (such as
+    ``student_id``), otherwise rows that move out of scope would never be
+    seen again.
+    """
+
+    def __init__(self, table, columns, scope):
+        self.table = table
+        self.columns = [column.strip() for column in columns.split(",") if column.strip() != "updated_at"]
+        self.scope = scope
+        self.rows = {}
+        self.cursor = None
+        # id -> updated_at (or deleted_at) of rows the next pull will re-read
+        self._seen = {}
+        self._seen_deleted = {}
+        self.last_changed = []
+        self.last_deleted = []
+        self.last_pull_bytes = 0
+        self.total_bytes = 0
+        self.pulls = 0
+
+    def pull(self) -> dict:
+        changed, deleted = self.fetch_changes()
+        for row in changed:
+            self.rows[row['id']] = row
+        for row_id in deleted:
+            self.rows.pop(row_id, None)
+        return self.rows
+
+    def fetch_changes(self) -> tuple:
+        """Fetch rows changed and IDs deleted since the cursor, and advance it.
+
+        Callers that keep the rows somewhere other than ``rows`` (such as
+        the SQLite mirror) use this instead of ``pull``.
+        """
+        since = _rewind(self.cursor) if self.cursor else None
+        watermark = None
+        rows = {}
+        deleted = []
+        fetched = 0
+        # PostgREST caps rows per response, so read the delta in pages;
+        # tombstones come with the first page
+        while True:
+            result = supabase.rpc("pull_changes", {
+                "target_table": self.table, "columns": self.columns, "scope": self.scope,
+                "since": since, "page_offset": fetched, "max_rows": PULL_PAGE_SIZE,
+            }).execute().data
+            # The first page's server time: nothing committed after it is skipped
+            watermark = watermark or result['watermark']
+            deleted += result['deleted']
+            page = result['rows']
+            fetched += len(page)
+            for row in page:
+                rows[row['id']] = row
+            if len(page) < PULL_PAGE_SIZE:
+                break
+
+        changed = [row for row in rows.values() if self._seen.get(row['id']) != row['updated_at']]
+        self.last_changed = changed
+        self.last_deleted = [t['row_id'] for t in deleted if self._seen_deleted.get(t['row_id']) != t['deleted_at']]
+        self._seen = {row['id']: row['updated_at'] for row in rows.values() if _in_window(row['updated_at'], watermark)}
+        self._seen_deleted = {t['row_id']: t['deleted_at'] for t in deleted if _in_window(t['deleted_at'], watermark)}
+        self.cursor = watermark
+
+        self.pulls += 1
+        self.last_pull_bytes = _payload_bytes(list(rows.values())) + _payload_bytes(deleted)
+        self.total_bytes += self.last_pull_bytes
+        return self.last_changed, self.last_deleted
+
+    def stats(self) -> dict:
+        return {
+            "table": self.table,
+            "rows": len(self.rows),
+            "pulls": self.pulls,
+            "last_pull_bytes": self.last_pull_bytes,
+            "total_bytes": self.total_bytes,
+        }
+
+
+class ChangeCursor:
+    """Cheap per-session probe for "has anything in a table changed?".
+
+    Used for paginated pages that stay server-side: one table_changes call
+    lists the IDs of rows updated or deleted since the last check (visible
+    under RLS), with no row payload, and only a positive answer makes the
+    caller drop its cached pages.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.checked_at = None
+        self.seen = set()
+
+    def changed(self) -> bool:
+        if self.checked_at is None:
+            # First check only sets the baseline; cached pages are trusted
+            self.checked_at = server_time()
+            return False
+        result = supabase.rpc("table_changes", {
+            "target_table": self.table, "since": _rewind(self.checked_at), "max_rows": CHANGE_PROBE_ROWS,
+        }).execute().data
+        changes = {(change['id'], change['changed_at']) for change in result['changes']}
+        # Changes already reported by the previous check are in the overlap again
+        changed = len(result['changes']) >= CHANGE_PROBE_ROWS or bool(changes - self.seen)
+        self.seen = changes
+        self.checked_at = result['watermark']
+        return changed
+
+
+def get_synced_table(name, table, columns, scope) -> SyncedTable:
+    """The session's SyncedTable for ``name``, created on first use."""
+    tables = st.session_state.setdefault("synced_tables", {})
+    if name not in tables or tables[name].scope != scope:
+        tables[name] = SyncedTable(table, columns, scope)
+    return tables[name]
+
+
+def get_change_cursor(name, table) -> ChangeCursor:
+    cursors = st.session_state.setdefault("change_cursors", {})
+    if name not in cursors:
+        cursors[name] = ChangeCursor(table)
+    return cursors[name]
+
+
+def sync_stats() -> list:
+    """Bytes transferred by each of the session's synced tables."""
+    return [table.stats() for table in st.session_state.get("synced_tables", {}).values()]
@@ -0,0 +1,301 @@
+import bisect
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds, as in Prometheus' defaults
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DEFAULT_SLOW_CALL_SECONDS = 1.0
+METRICS_WRITE_SECONDS = 15
+MAX_RECENT_CALLS = 200
+
+# Builder methods that pick the operation, and those that add a filter
+OPERATIONS = ("select", "insert", "update", "upsert", "delete")
+FILTER_METHODS = ("eq", "neq", "gt", "gte", "lt", "lte", "like", "ilike", "is_", "in_", "cs", "cd", "or_", "match", "text_search")
+
+
+def _settings():
+    try:
+        return st.secrets.get("tracing", {})
+    except FileNotFoundError:
+        # No secrets file: CLI scripts and benchmarks run with the defaults
+        return {}
+
+
+def _payload_bytes(data):
+    return len(json.dumps(data, default=str).encode()) if data is not None else 0
+
+
+def _row_count(data):
+    if isinstance(data, list):
+        return len(data)
+    return 0 if data is None else 1
+
+
+_current = threading.local()
+
+
+def current_view():
+    return getattr(_current, "view", None)
+
+
+@contextmanager
+def in_view(name):
+    """Tag backend calls made by this thread with the view ``name``."""
+    previous = current_view()
+    _current.view = name
+    try:
+        yield
+    finally:
+        _current.view = previous
+
+
+def view(func):
+    """Decorator tagging a view function's backend calls with its name.
+
+    Fragments need it too: a fragment rerun does not pass through the view
+    that first rendered it.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with in_view(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class Tracer:
+    """Process-wide latency histograms and recent calls, keyed by view.
+
+    Every call is recorded under (view, kind, target, operation), where kind
+    is "table", "rpc" or "auth". Filters are kept as column and operator
+    only, never values, so IDs and search text stay out of logs and labels.
+    """
+
+    def __init__(self, slow_call_seconds=DEFAULT_SLOW_CALL_SECONDS):
+        self.slow_call_seconds = slow_call_seconds
+        self.histograms = {}
+        self.recent = deque(maxlen=MAX_RECENT_CALLS)
+        self.slow = deque(maxlen=MAX_RECENT_CALLS)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def record(self, kind, target, operation, filters=()):
+        call = {
+            "view": current_view() or "unknown",
+            "kind": kind,
+            "target": target,
+            "operation": operation,
+            "filters": list(filters),
+            "rows": 0,
+            "bytes": 0,
+            "error": None,
+            "started_at": time.time(),
+        }
+        started = time.perf_counter()
+        try:
+            yield call
+        except Exception as e:
+            call["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            call["seconds"] = time.perf_counter() - started
+            self._add(call)
+
+    def _add(self, call):
+        key = (call["view"], call["kind"], call["target"], call["operation"])
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+                    "count": 0, "sum": 0.0, "rows": 0, "bytes": 0, "errors": 0,
+                }
+            histogram["buckets"][bisect.bisect_left(LATENCY_BUCKETS, call["seconds"])] += 1
+            histogram["count"] += 1
+            histogram["sum"] += call["seconds"]
+            histogram["rows"] += call["rows"]
+            histogram["bytes"] += call["bytes"]
+            histogram["errors"] += call["error"] is not None
+            self.recent.append(call)
+            if call["seconds"] >= self.slow_call_seconds:
+                self.slow.append(call)
+        if call["seconds"] >= self.slow_call_seconds:
+            logger.warning(
+                "Slow %s call in %s: %s %s %s took %.3fs (%d rows, %d bytes)%s",
+                call["kind"], call["view"], call["operation"], call["target"], call["filters"],
+                call["seconds"], call["rows"], call["bytes"], f" failed: {call['error']}" if call["error"] else "",
+            )
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {key: {**h, "buckets": list(h["buckets"])} for key, h in self.histograms.items()}
+
+    def summary(self) -> list:
+        """One row per (view, kind, target, operation) with estimated percentiles."""
+        rows = []
+        for (view_name, kind, target, operation), h in sorted(self.snapshot().items()):
+            rows.append({
+                "view": view_name,
+                "kind": kind,
+                "target": target,
+                "operation": operation,
+                "calls": h["count"],
+                "errors": h["errors"],
+                "mean_ms": round(h["sum"] / h["count"] * 1000, 1),
+                "p50_ms": _quantile(h, 0.5) * 1000,
+                "p95_ms": _quantile(h, 0.95) * 1000,
+                "rows": h["rows"],
+                "bytes": h["bytes"],
+            })
+        return rows
+
+    def prometheus_text(self) -> str:
+        """All histograms in the Prometheus text exposition format."""
+        lines = [
+            "# HELP intern_backend_call_seconds Wall time of Supabase calls by issuing view.",
+            "# TYPE intern_backend_call_seconds histogram",
+        ]
+        totals = []
+        for key, h in sorted(self.snapshot().items()):
+            labels = 'view="{}",kind="{}",target="{}",operation="{}"'.format(*(_label(part) for part in key))
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), h["buckets"]):
+                cumulative += count
+                lines.append(f'intern_backend_call_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"intern_backend_call_seconds_sum{{{labels}}} {h['sum']:.6f}")
+            lines.append(f"intern_backend_call_seconds_count{{{labels}}} {h['count']}")
+            totals.append((labels, h))
+        for metric, field, help_text in (
+            ("intern_backend_call_rows_total", "rows", "Rows returned by Supabase calls."),
+            ("intern_backend_call_bytes_total", "bytes", "Response payload bytes of Supabase calls."),
+            ("intern_backend_call_errors_total", "errors", "Supabase calls that raised."),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(f"{metric}{{{labels}}} {h[field]}" for labels, h in totals)
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_file(self, path):
+        # Written whole and renamed so a scraper never reads a partial file
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(temporary, path)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.recent.clear()
+            self.slow.clear()
+
+
+def _quantile(histogram, q):
+    # Upper bound of the bucket holding the q-th call; calls past the last
+    # bound are reported at it
+    rank = q * histogram["count"]
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS, histogram["buckets"]):
+        seen += count
+        if seen >= rank:
+            return bound
+    return LATENCY_BUCKETS[-1]
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _write_metrics(tracer, path):
+    while True:
+        time.sleep(METRICS_WRITE_SECONDS)
+        try:
+            tracer.write_prometheus_file(path)
+        except Exception:
+            logger.exception("Could not write metrics to %s", path)
+
+
+@st.cache_resource
+def get_tracer() -> Tracer:
+    settings = _settings()
+    tracer = Tracer(settings.get("slow_call_seconds", DEFAULT_SLOW_CALL_SECONDS))
+    if settings.get("metrics_path"):
+        # For node_exporter's textfile collector or any scraper that reads files
+        threading.Thread(target=_write_metrics, args=(tracer, settings["metrics_path"]), name="tracing-metrics", daemon=True).start()
+    return tracer
+
+
+class TracedQuery:
+    """Wraps a postgrest request builder and times its ``execute()``.
+
+    Chained calls return new wrappers, collecting the operation and the
+    filtered columns on the way.
+    """
+
+    def __init__(self, builder, kind, target, operation, filters=()):
+        self._builder = builder
+        self._kind = kind
+        self._target = target
+        self._operation = operation
+        self._filters = filters
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            operation, filters = self._operation, self._filters
+            if name in OPERATIONS:
+                operation = "count" if kwargs.get("head") else name
+            elif name in FILTER_METHODS:
+                filters = filters + (f"{name}({args[0] if args and name not in ('or_', 'match') else ''})",)
+            return TracedQuery(attr(*args, **kwargs), self._kind, self._target, operation, filters)
+        return call
+
+    def describe(self) -> tuple:
+        """(kind, target, operation) of the request built so far."""
+        return self._kind, self._target, self._operation
+
+    def execute(self):
+        with get_tracer().record(self._kind, self._target, self._operation, self._filters) as call:
+            response = self._builder.execute()
+            data = getattr(response, "data", None)
+            call["rows"] = _row_count(data)
+            call["bytes"] = _payload_bytes(data)
+            return response
+
+
+class TracedAuth:
+    """Wraps the auth client and times each of its method calls."""
+
+    def __init__(self, auth):
+        self._auth = auth
+
+    def __getattr__(self, name):
+        attr = getattr(self._auth, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def call(*args, **kwargs):
+            with get_tracer().record("auth", name, "call"):
+                return attr(*args, **kwargs)
+        return call
+
+
+def trace_table(client, table):
+    return TracedQuery(client.table(table), "table", table, "select")
+
+
+def trace_rpc(client, fn, params=None, **kwargs):
+    # Only parameters that were actually set count as filters
+    filters = tuple(name for name, value in (params or {}).items() if value is not None)
+    return TracedQuery(client.rpc(fn, params or {}, **kwargs), "rpc", fn, "call", filters)
@@ -1,20 +1,139 @@
+import threading
+from contextlib import contextmanager
+
+import httpx
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from supabase import create_client, Client
+from supabase.lib.client_options import SyncClientOptions
+
+import resilience
+import tracing
+
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY_SECONDS = 30
+HTTP_TIMEOUT_SECONDS = 10
 
 @st.cache_resource
-def init_supabase() -> Client:
+def get_http_client() -> httpx.Client:
+    """Connection pool shared by every session's Supabase client.
+
+    The Supabase clients send their own headers on each request, so sharing
+    the pool does not share auth state between sessions.
+    """
+    return httpx.Client(
+        http2=True,
+        timeout=HTTP_TIMEOUT_SECONDS,
+        follow_redirects=True,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    )
+
+def create_session_client() -> Client:
+    """Create a Supabase client with its own auth session over the shared pool.
+
+    The client does not refresh its token on a timer: the timer thread would
+    keep the client of a closed browser tab alive for good. Each run calls
+    refresh_session instead.
+    """
     url = st.secrets["supabase"]["url"]
     key = st.secrets["supabase"]["key"]
-    return create_client(url, key)
+    options = SyncClientOptions(
+        httpx_client=get_http_client(),
+        auto_refresh_token=False,
+        persist_session=True,
+    )
+    return create_client(url, key, options=options)
+
+_script_client = None
+_thread_client = threading.local()
+
+@contextmanager
+def use_client(client):
+    """Route supabase calls made by this thread to ``client``.
+
+    Used by worker threads, which have no Streamlit session of their own.
+    """
+    previous = getattr(_thread_client, "client", None)
+    _thread_client.client = client
+    try:
+        yield client
+    finally:
+        _thread_client.client = previous
+
+def get_supabase() -> Client:
+    """Return the Supabase client for the current browser session.
+
+    Outside a Streamlit session (CLI scripts) a single process-wide client
+    is used instead.
+    """
+    global _script_client
+    client = getattr(_thread_client, "client", None)
+    if client is not None:
+        return client
+    if get_script_run_ctx(suppress_warning=True) is None:
+        if _script_client is None:
+            _script_client = create_session_client()
+        return _script_client
+    if "supabase_client" not in st.session_state:
+        st.session_state["supabase_client"] = create_session_client()
+    return st.session_state["supabase_client"]
 
-supabase = init_supabase()
+class SessionClient:
+    """Stand-in for a Client that resolves to the current session's client.
 
-def get_user_role(user_id):
-    """Fetch user role from profiles table."""
+    Table, RPC and auth calls made through it run under the call policy
+    (timeouts, retries, hedging and the circuit breaker, see resilience.py)
+    and each attempt is traced (see tracing.py).
+    """
+
+    def table(self, table_name):
+        return resilience.ResilientQuery(tracing.trace_table(get_supabase(), table_name))
+
+    from_ = table
+
+    def rpc(self, fn, params=None, **kwargs):
+        return resilience.ResilientQuery(tracing.trace_rpc(get_supabase(), fn, params, **kwargs))
+
+    @property
+    def auth(self):
+        return resilience.ResilientAuth(tracing.TracedAuth(get_supabase().auth))
+
+    def __getattr__(self, name):
+        return getattr(get_supabase(), name)
+
+supabase = SessionClient()
+
+def refresh_session():
+    """Refresh the session's access token if it is about to expire.
+
+    Local unless the token expires within seconds, so it is cheap to call
+    on every run.
+    """
+    supabase.auth.get_session()
+
+def load_session_profile(user):
+    """Fetch the user's profile once at login and keep it in session state.
+
+    Returns the role: the profile is authoritative, the sign-up metadata is
+    only a fallback because users can edit their own metadata.
+    """
     try:
-        response = supabase.table("profiles_names").select("role").eq("id", user_id).single().execute()
-        if response.data:
-            return response.data["role"]
+        response = supabase.table("profiles_names").select("*").eq("id", user.id).single().execute()
+        profile = response.data or {}
     except Exception as e:
-        st.error(f"Error fetching role: {e}")
-    return None
+        st.error(f"Error fetching profile: {e}")
+        profile = {}
+    st.session_state["profile"] = profile
+    return profile.get("role") or (user.user_metadata or {}).get("role")
+
+def get_session_profile():
+    """The logged-in user's profile, as cached at login."""
+    return st.session_state.get("profile") or {}
+
+def update_session_profile(updates):
+    st.session_state["profile"] = {**get_session_profile(), **updates}